@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+
+import sys
+sys.path.append('lib')
+import re
+import time
+from api import APIClass
+
+
+LANGUAGES = ['python', 'javascript', 'perl']
+WIDTHS = {'python': (79, ' '), 'javascript': (70, '\t'), 'perl': (70, '\t')}
+
+
+def old_wrap_line(text, width, indent_marker, indent_offset=0,
+                  indent_char=' ', indent_suffix=''):
+    """The reduce-based wrap_line which utils.wrap_line replaced."""
+    paren_index = text.find(indent_marker)
+    if paren_index == 0:
+        paren_index = 1
+    indent = indent_char * (paren_index + indent_offset)
+
+    def make_delimiter(line, word, width):
+        """Return the delimiter to put before word."""
+        isbreak = len(line)-line.rfind('\n')-1 + \
+            len(word.split('\n', 1)[0]) >= width
+        if isbreak:
+            return '\n%s%s' % (indent, indent_suffix)
+        else:
+            return ' '
+
+    return reduce(lambda line, word, width=width: '%s%s%s' %
+                  (line, make_delimiter(line, word, width),
+                   word), text.split(' '))
+
+
+def old_wrap(codestring, lang_tools, width, indent_char):
+    """The wrap() of the language modules before utils.wrap_code."""
+    wrapped_code_lines = []
+    for line in codestring.split('\n'):
+        if len(line) < width:
+            wrapped_code_lines.append(line)
+            continue
+
+        matched = None
+        for each in lang_tools.CODE_WRAP_MARKERS:
+            match = re.search(r'^\s+(%s)' % (each[0]), line)
+            if match is not None:
+                matched = True
+                wrapped_code_lines.append(old_wrap_line(
+                    line, width, each[1], indent_char=indent_char,
+                    indent_suffix=each[2], indent_offset=each[3]))
+
+        if matched is None:
+            wrapped_code_lines.append(line)
+
+    return '\n'.join(wrapped_code_lines)
+
+
+def make_spec(operations, params, summary_words):
+    """Return a synthetic Swagger API declaration with operations
+    operations of params parameters each, and summaries of summary_words
+    words.
+
+    """
+    summary = ' '.join(['word%d' % (i % 97) for i in range(summary_words)])
+    apis = []
+    for i in range(operations):
+        apis.append({
+            'path': '/widgets/{widgetId}/action%d' % (i),
+            'description': 'Widget action %d; %s' % (i, summary),
+            'operations': [{
+                'httpMethod': 'POST',
+                'summary': summary,
+                'nickname': 'actionWidget%d' % (i),
+                'responseClass': 'void',
+                'parameters': [{'name': 'widgetId', 'dataType': 'string'}]
+                + [{'name': 'option%d' % (j), 'dataType': 'string',
+                    'defaultValue': 'value%d' % (j)}
+                   for j in range(params)],
+            }],
+        })
+    return {'resourcePath': '/api-docs/widgets.{format}', 'apis': apis}
+
+
+def render(spec, lang):
+    """Return the unwrapped code generated for spec in lang."""
+    spec = dict(spec, lang=lang)
+    class_ = APIClass(spec)
+    methods = [m.construct_file_contents() for m in class_.methods]
+    return class_.construct_file_contents('\n' + '\n\n'.join(methods))
+
+
+def time_call(func, *args):
+    """Return (result, seconds taken) of func(*args)."""
+    start = time.time()
+    result = func(*args)
+    return (result, time.time() - start)
+
+
+def main(argv):
+    """Time old and new code wrapping on synthetic specs for every
+    language and check they give the same output.
+
+    Takes --operations, --params and --words (summary length); run from
+    the top of the source tree.
+
+    """
+    args = {'operations': '200', 'params': '20', 'words': '400'}
+    for a in argv[1:]:
+        pieces = a.split("=", 1)
+        args[pieces[0].strip('-')] = pieces[-1]
+    spec = make_spec(int(args['operations']), int(args['params']),
+                     int(args['words']))
+
+    failed = False
+    for lang in LANGUAGES:
+        lang_tools = __import__(lang)
+        width, indent_char = WIDTHS[lang]
+        code = render(spec, lang)
+        old, old_time = time_call(old_wrap, code, lang_tools, width,
+                                  indent_char)
+        new, new_time = time_call(lang_tools.wrap, code)
+        same = old == new
+        failed = failed or not same
+        print "%-10s %8d chars  old %7.3fs  new %7.3fs  x%.1f  %s" % (
+            lang, len(code), old_time, new_time,
+            old_time / max(new_time, 1e-9),
+            'same output' if same else 'OUTPUT DIFFERS')
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv) or 0)
@@ -0,0 +1,701 @@
+#!/usr/bin/env python
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+
+import sys
+import os
+import re
+import glob
+import json
+import time
+import uuid
+import base64
+import random
+import socket
+import struct
+import hashlib
+import threading
+import urlparse
+import BaseHTTPServer
+import SocketServer
+
+
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+
+class FakeAsteriskError(Exception):
+    """An HTTP error answered by the fake Asterisk."""
+    def __init__(self, status, message):
+        """Initiate new FakeAsteriskError instance."""
+        Exception.__init__(self, message)
+        self.status = status
+        self.message = message
+
+
+class Route:
+    """One operation of a Swagger resource file."""
+    def __init__(self, base_path, api_path, operation):
+        """Initiate new Route instance.
+
+        The path is matched with or without its /api prefix, which
+        Asterisk versions disagree on.
+
+        """
+        self.http_method = operation['httpMethod']
+        self.nickname = operation['nickname']
+        self.response_class = operation.get('responseClass', 'void')
+        self.parameters = operation.get('parameters') or []
+        # Literal parts at even indexes, parameter names at odd ones.
+        parts = re.split('{(\\w+)}', re.sub('^/api/', '/', api_path))
+        path = ''.join([re.escape(part) if i % 2 == 0
+                        else '(?P<%s>[^/]+)' % (part)
+                        for i, part in enumerate(parts)])
+        self.regex = re.compile('^%s(?:/api)?%s$'
+                                % (re.escape(base_path), path))
+
+    def get_arguments(self, path_args, query):
+        """Return the arguments of a call as a dict, from the path and the
+        parsed query string. Raise FakeAsteriskError for a missing
+        required parameter.
+
+        """
+        args = dict(path_args)
+        for param in self.parameters:
+            name = param['name']
+            if param['paramType'] != 'query':
+                continue
+            if name not in query:
+                if param.get('required'):
+                    raise FakeAsteriskError(
+                        400, "Missing required parameter %s" % (name))
+                continue
+            if param.get('allowMultiple'):
+                args[name] = query[name]
+            else:
+                args[name] = query[name][-1]
+        return args
+
+
+def load_routes(resource_dir, base_path='/stasis'):
+    """Return the Routes of every operation in the Swagger resource files
+    of resource_dir, and a dict of the files' contents by file name.
+
+    """
+    routes = []
+    documents = {}
+    for filename in sorted(glob.glob(os.path.join(resource_dir, '*.json'))):
+        resource = json.loads(open(filename).read())
+        documents[os.path.basename(filename)] = resource
+        for api in resource.get('apis', []):
+            for operation in api.get('operations', []):
+                routes.append(Route(base_path, api['path'], operation))
+    return routes, documents
+
+
+def make_operation_name(nickname):
+    """Turn a Swagger nickname like getChannels into get_channels."""
+    return re.sub('([A-Z])', r'_\1', nickname).lower()
+
+
+def make_timestamp():
+    """Return the current time in the format of Stasis events."""
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime())
+
+
+class FakeAsterisk:
+    """In-memory Asterisk state behind the fake REST API.
+
+    Each Swagger operation is implemented by the method named after its
+    nickname (getChannels is get_channels), which takes the call's
+    arguments and returns the decoded response body, or None for void.
+    Objects are dicts which are replaced, never changed, so listings are
+    serialized without holding the lock.
+
+    """
+    def __init__(self, endpoints=10, channels=0):
+        """Initiate new FakeAsterisk instance with endpoints endpoints
+        and channels channels already up.
+
+        """
+        self.lock = threading.Lock()
+        self.channels = {}
+        self.bridges = {}
+        self.recordings = {}
+        self.endpoints = {}
+        self.started_at = make_timestamp()
+        self.event_sockets = []
+        for i in range(endpoints):
+            resource = str(100 + i)
+            self.endpoints[resource] = {
+                'technology': 'SIP',
+                'resource': resource,
+                'state': 'online',
+                'channel_ids': [],
+            }
+        for i in range(channels):
+            channel = self.make_channel({'endpoint': 'SIP/100'})
+            channel['state'] = 'Up'
+            self.channels[channel['id']] = channel
+
+    def make_channel(self, args):
+        """Return a new channel dict."""
+        channel_id = str(uuid.uuid4())
+        endpoint = args.get('endpoint') or 'SIP/100'
+        return {
+            'id': channel_id,
+            'name': '%s-%s' % (endpoint, channel_id[:8]),
+            'state': 'Ring',
+            'caller': {'name': '', 'number': endpoint.split('/')[-1]},
+            'connected': {'name': '', 'number': ''},
+            'accountcode': '',
+            'dialplan': {
+                'context': args.get('context') or 'default',
+                'exten': args.get('extension') or 's',
+                'priority': 1,
+            },
+            'creationtime': make_timestamp(),
+            'muted': False,
+        }
+
+    def emit(self, event_type, **objects):
+        """Send a Stasis event about objects to every connected app."""
+        for event_socket in list(self.event_sockets):
+            event = {'type': event_type, 'application': event_socket.app,
+                     'timestamp': make_timestamp()}
+            event.update(objects)
+            event_socket.send(event)
+
+    def _get(self, collection, object_id, kind):
+        """Return an object by id or raise a 404 FakeAsteriskError."""
+        try:
+            return collection[object_id]
+        except KeyError:
+            raise FakeAsteriskError(404, "%s not found" % (kind))
+
+    def _update(self, collection, object_id, kind, **changes):
+        """Replace an object by a copy with changes; return the copy."""
+        with self.lock:
+            obj = dict(self._get(collection, object_id, kind), **changes)
+            collection[object_id] = obj
+        return obj
+
+    def get_asterisk_info(self, args):
+        """Return Asterisk system information."""
+        info = {
+            'build': {'os': 'Linux', 'kernel': os.uname()[2],
+                      'machine': os.uname()[4], 'user': 'fake'},
+            'system': {'version': '12.0.0-fake', 'entity_id': 'fake'},
+            'config': {'name': 'fake_asterisk',
+                       'default_language': 'en'},
+            'status': {'startup_time': self.started_at,
+                       'channels': len(self.channels),
+                       'bridges': len(self.bridges)},
+        }
+        only = args.get('only')
+        if only:
+            info = dict((key, info[key]) for key in only if key in info)
+        return info
+
+    def get_channels(self, args):
+        """Return every channel."""
+        return self.channels.values()
+
+    def get_channel(self, args):
+        """Return one channel."""
+        return self._get(self.channels, args['channelId'], 'Channel')
+
+    def originate(self, args):
+        """Create a channel and put it into the Stasis application."""
+        channel = self.make_channel(args)
+        with self.lock:
+            self.channels[channel['id']] = channel
+        self.emit('StasisStart', channel=channel)
+        return channel
+
+    def dial(self, args):
+        """Originate a channel and bridge it to an existing one."""
+        caller = self.get_channel(args)
+        channel = self.originate(args)
+        bridge = self.new_bridge({})
+        for each in (caller, channel):
+            self.add_channel_to_bridge({'bridgeId': bridge['id'],
+                                        'channel': [each['id']]})
+        return {'caller': caller['id'], 'peer': channel['id'],
+                'bridge': bridge['id']}
+
+    def delete_channel(self, args):
+        """Hang up a channel."""
+        with self.lock:
+            channel = self._get(self.channels, args['channelId'], 'Channel')
+            del self.channels[channel['id']]
+            bridges = [bridge for bridge in self.bridges.values()
+                       if channel['id'] in bridge['channels']]
+        for bridge in bridges:
+            self.remove_channel_from_bridge({'bridgeId': bridge['id'],
+                                             'channel': [channel['id']]})
+        self.emit('ChannelDestroyed', channel=channel, cause=16,
+                  cause_txt='Normal Clearing')
+
+    def continue_in_dialplan(self, args):
+        """Take a channel out of the Stasis application."""
+        channel = self.get_channel(args)
+        self.emit('StasisEnd', channel=channel)
+
+    def reject_channel(self, args):
+        """Reject a ringing channel."""
+        self.delete_channel(args)
+
+    def answer_channel(self, args):
+        """Answer a channel."""
+        channel = self._update(self.channels, args['channelId'], 'Channel',
+                               state='Up')
+        self.emit('ChannelStateChange', channel=channel)
+
+    def mute_channel(self, args):
+        """Mute a channel."""
+        channel = self._update(self.channels, args['channelId'], 'Channel',
+                               muted=True)
+        self.emit('ChannelVarset', channel=channel, variable='MUTED',
+                  value='1')
+
+    def unmute_channel(self, args):
+        """Unmute a channel."""
+        channel = self._update(self.channels, args['channelId'], 'Channel',
+                               muted=False)
+        self.emit('ChannelVarset', channel=channel, variable='MUTED',
+                  value='0')
+
+    def record_channel(self, args):
+        """Start recording a channel."""
+        self.get_channel(args)
+        self._start_recording(args, 'channel:%s' % (args['channelId']))
+
+    def get_bridges(self, args):
+        """Return every bridge."""
+        return self.bridges.values()
+
+    def get_bridge(self, args):
+        """Return one bridge."""
+        return self._get(self.bridges, args['bridgeId'], 'Bridge')
+
+    def new_bridge(self, args):
+        """Create a bridge."""
+        bridge = {
+            'id': str(uuid.uuid4()),
+            'technology': 'simple_bridge',
+            'bridge_type': 'mixing',
+            'bridge_class': 'stasis',
+            'channels': [],
+        }
+        with self.lock:
+            self.bridges[bridge['id']] = bridge
+        self.emit('BridgeCreated', bridge=bridge)
+        return bridge
+
+    def delete_bridge(self, args):
+        """Destroy a bridge."""
+        with self.lock:
+            bridge = self._get(self.bridges, args['bridgeId'], 'Bridge')
+            del self.bridges[bridge['id']]
+        self.emit('BridgeDestroyed', bridge=bridge)
+
+    def add_channel_to_bridge(self, args):
+        """Add channels to a bridge."""
+        for channel_id in args['channel']:
+            with self.lock:
+                channel = self._get(self.channels, channel_id, 'Channel')
+                bridge = self._get(self.bridges, args['bridgeId'], 'Bridge')
+                if channel_id in bridge['channels']:
+                    continue
+                bridge = dict(bridge,
+                              channels=bridge['channels'] + [channel_id])
+                self.bridges[bridge['id']] = bridge
+            self.emit('ChannelEnteredBridge', bridge=bridge, channel=channel)
+
+    def remove_channel_from_bridge(self, args):
+        """Remove channels from a bridge."""
+        for channel_id in args['channel']:
+            with self.lock:
+                bridge = self._get(self.bridges, args['bridgeId'], 'Bridge')
+                if channel_id not in bridge['channels']:
+                    raise FakeAsteriskError(
+                        422, "Channel not in this bridge")
+                bridge = dict(bridge, channels=[
+                    each for each in bridge['channels']
+                    if each != channel_id])
+                self.bridges[bridge['id']] = bridge
+                channel = self.channels.get(channel_id, {'id': channel_id})
+            self.emit('ChannelLeftBridge', bridge=bridge, channel=channel)
+
+    def record_bridge(self, args):
+        """Start recording a bridge."""
+        self.get_bridge(args)
+        self._start_recording(args, 'bridge:%s' % (args['bridgeId']))
+
+    def _start_recording(self, args, target_uri):
+        """Create a recording of target_uri."""
+        recording = {
+            'name': args['name'],
+            'format': 'wav',
+            'state': 'recording',
+            'target_uri': target_uri,
+            'muted': False,
+        }
+        with self.lock:
+            if args['name'] in self.recordings \
+                    and args.get('append') != 'true':
+                raise FakeAsteriskError(409, "Recording already exists")
+            self.recordings[args['name']] = recording
+        self.emit('RecordingStarted', recording=recording)
+
+    def get_recordings(self, args):
+        """Return every recording."""
+        return self.recordings.values()
+
+    def get_recording(self, args):
+        """Return one recording."""
+        return self._get(self.recordings, args['recordingId'], 'Recording')
+
+    def delete_recording(self, args):
+        """Delete a recording."""
+        with self.lock:
+            self._get(self.recordings, args['recordingId'], 'Recording')
+            del self.recordings[args['recordingId']]
+
+    def stop_recording(self, args):
+        """Stop a recording."""
+        recording = self._update(self.recordings, args['recordingId'],
+                                 'Recording', state='done')
+        self.emit('RecordingFinished', recording=recording)
+
+    def pause_recording(self, args):
+        """Pause a recording."""
+        self._update(self.recordings, args['recordingId'], 'Recording',
+                     state='paused')
+
+    def unpause_recording(self, args):
+        """Resume a paused recording."""
+        self._update(self.recordings, args['recordingId'], 'Recording',
+                     state='recording')
+
+    def mute_recording(self, args):
+        """Mute a recording."""
+        self._update(self.recordings, args['recordingId'], 'Recording',
+                     muted=True)
+
+    def unmute_recording(self, args):
+        """Unmute a recording."""
+        self._update(self.recordings, args['recordingId'], 'Recording',
+                     muted=False)
+
+    def get_endpoints(self, args):
+        """Return every endpoint, or those of the technologies given."""
+        endpoints = self.endpoints.values()
+        if args.get('withType'):
+            endpoints = [endpoint for endpoint in endpoints
+                         if endpoint['technology'] in args['withType']]
+        return endpoints
+
+    def get_endpoint(self, args):
+        """Return one endpoint."""
+        return self._get(self.endpoints, args['endpointId'], 'Endpoint')
+
+
+class EventSocket:
+    """Server side of a Stasis events WebSocket."""
+    def __init__(self, connection, app):
+        """Initiate new EventSocket instance."""
+        self.connection = connection
+        self.app = app
+        self.lock = threading.Lock()
+
+    def send(self, event):
+        """Send an event as a text frame; errors are left to the reader."""
+        payload = json.dumps(event)
+        length = len(payload)
+        if length < 126:
+            header = struct.pack('!BB', 0x81, length)
+        elif length < 65536:
+            header = struct.pack('!BBH', 0x81, 126, length)
+        else:
+            header = struct.pack('!BBQ', 0x81, 127, length)
+        with self.lock:
+            try:
+                self.connection.sendall(header + payload)
+            except socket.error:
+                pass
+
+    def read_until_closed(self, rfile):
+        """Read client frames, answering pings, until the client closes
+        the connection.
+
+        """
+        while True:
+            header = rfile.read(2)
+            if len(header) < 2:
+                return
+            opcode = ord(header[0]) & 0x0f
+            length = ord(header[1]) & 0x7f
+            if length == 126:
+                length = struct.unpack('!H', rfile.read(2))[0]
+            elif length == 127:
+                length = struct.unpack('!Q', rfile.read(8))[0]
+            mask = rfile.read(4) if ord(header[1]) & 0x80 else None
+            payload = rfile.read(length)
+            if mask:
+                payload = ''.join(chr(ord(c) ^ ord(mask[i % 4]))
+                                  for i, c in enumerate(payload))
+            if opcode == 0x8:
+                with self.lock:
+                    self.connection.sendall('\x88\x00')
+                return
+            if opcode == 0x9:
+                with self.lock:
+                    self.connection.sendall(
+                        struct.pack('!BB', 0x8a, len(payload)) + payload)
+
+
+class FakeAsteriskHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Answer REST calls and event WebSocket upgrades."""
+    protocol_version = 'HTTP/1.1'
+    # Buffer each response and send it at once, flushed after every
+    # request, so that keep-alive clients do not wait on delayed ACKs.
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        """Handle a GET request."""
+        url = urlparse.urlparse(self.path)
+        server = self.server
+        if url.path == server.base_path + '/events' \
+                and self.headers.get('Upgrade', '').lower() == 'websocket':
+            self.open_event_socket(urlparse.parse_qs(url.query))
+            return
+        document = server.documents.get(
+            url.path[len(server.base_path) + 1:])
+        if document is not None:
+            self.respond(200, document)
+            return
+        self.handle_call()
+
+    def do_POST(self):
+        """Handle a POST request."""
+        self.handle_call()
+
+    def do_PUT(self):
+        """Handle a PUT request."""
+        self.handle_call()
+
+    def do_DELETE(self):
+        """Handle a DELETE request."""
+        self.handle_call()
+
+    def handle_call(self):
+        """Answer a REST call, with the injected latency and errors."""
+        server = self.server
+        url = urlparse.urlparse(self.path)
+        query = urlparse.parse_qs(url.query)
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+
+        server.inject_latency()
+        if server.error_rate and random.random() < server.error_rate:
+            self.respond(server.error_status,
+                         {'message': 'Injected error'})
+            return
+
+        for route in server.routes:
+            if route.http_method != self.command:
+                continue
+            match = route.regex.match(url.path)
+            if match is None:
+                continue
+            try:
+                args = route.get_arguments(match.groupdict(), query)
+                operation = getattr(server.asterisk,
+                                    make_operation_name(route.nickname),
+                                    None)
+                if operation is None:
+                    raise FakeAsteriskError(501, "Not implemented")
+                body = operation(args)
+            except FakeAsteriskError, err:
+                self.respond(err.status, {'message': err.message})
+                return
+            if route.response_class == 'void':
+                self.respond(204)
+            else:
+                self.respond(200, body)
+            return
+
+        self.respond(404, {'message': 'Resource not found'})
+
+    def respond(self, status, body=None):
+        """Send a response with an optional JSON body."""
+        payload = '' if body is None else json.dumps(body)
+        self.send_response(status)
+        if payload:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def open_event_socket(self, query):
+        """Complete a WebSocket handshake and stream events to it until
+        the client goes away.
+
+        """
+        key = self.headers.get('Sec-WebSocket-Key', '')
+        accept = base64.b64encode(hashlib.sha1(key + WEBSOCKET_GUID)
+                                  .digest())
+        event_socket = EventSocket(self.connection,
+                                   query.get('app', [''])[0])
+        sockets = self.server.asterisk.event_sockets
+        # Registered before the client sees the handshake, so that it gets
+        # every event emitted once it is connected; events wait for the
+        # handshake to be sent.
+        with event_socket.lock:
+            sockets.append(event_socket)
+            self.send_response(101, 'Switching Protocols')
+            self.send_header('Upgrade', 'websocket')
+            self.send_header('Connection', 'Upgrade')
+            self.send_header('Sec-WebSocket-Accept', accept)
+            self.end_headers()
+            self.wfile.flush()
+        try:
+            event_socket.read_until_closed(self.rfile)
+        except (socket.error, struct.error):
+            pass
+        finally:
+            sockets.remove(event_socket)
+            self.close_connection = 1
+
+    def log_message(self, format, *args):
+        """Log requests only when the server is verbose."""
+        if self.server.verbose:
+            BaseHTTPServer.BaseHTTPRequestHandler.log_message(
+                self, format, *args)
+
+
+class FakeAsteriskServer(SocketServer.ThreadingMixIn,
+                         BaseHTTPServer.HTTPServer):
+    """Stand-in for the Asterisk REST API, for tests and benchmarks.
+
+    Serves every operation of the Swagger resource files in resource_dir
+    under base_path, with state kept by a FakeAsterisk, and Stasis events
+    on the WebSocket at base_path/events?app=name.
+
+    Each call first waits latency seconds, plus up to jitter more. With
+    probability slow_rate it waits slow_latency seconds instead, and with
+    probability error_rate it fails with HTTP status error_status.
+
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=('127.0.0.1', 8088),
+                 resource_dir='test_resources', base_path='/stasis',
+                 asterisk=None, latency=0.0, jitter=0.0, slow_rate=0.0,
+                 slow_latency=1.0, error_rate=0.0, error_status=500,
+                 verbose=False):
+        """Initiate new FakeAsteriskServer instance."""
+        BaseHTTPServer.HTTPServer.__init__(self, address,
+                                           FakeAsteriskHandler)
+        self.base_path = base_path
+        self.routes, self.documents = load_routes(resource_dir, base_path)
+        self.asterisk = asterisk or FakeAsterisk()
+        self.latency = latency
+        self.jitter = jitter
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.verbose = verbose
+
+    def get_uri(self):
+        """Return the base URI to give AsteriskPy."""
+        host, port = self.server_address[:2]
+        return 'http://%s:%s%s' % (host, port, self.base_path)
+
+    def inject_latency(self):
+        """Sleep as configured before answering a call."""
+        if self.slow_rate and random.random() < self.slow_rate:
+            time.sleep(self.slow_latency)
+            return
+        delay = self.latency
+        if self.jitter:
+            delay += random.random() * self.jitter
+        if delay:
+            time.sleep(delay)
+
+    def start(self):
+        """Serve on a daemon thread and return it."""
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return thread
+
+
+def main(argv):
+    """Run a fake Asterisk until interrupted.
+
+    Options (--name=value): host, port, resources, endpoints, channels,
+    latency, jitter, slow_rate, slow_latency, error_rate, error_status and
+    verbose.
+
+    """
+    args = {
+        'host': '127.0.0.1',
+        'port': '8088',
+        'resources': os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                  'test_resources'),
+        'endpoints': '10',
+        'channels': '0',
+        'latency': '0',
+        'jitter': '0',
+        'slow_rate': '0',
+        'slow_latency': '1',
+        'error_rate': '0',
+        'error_status': '500',
+        'verbose': False,
+    }
+    for a in argv[1:]:
+        pieces = a.split("=", 1)
+        try:
+            args[pieces[0].strip('-')] = pieces[1]
+        except IndexError:
+            args[pieces[0].strip('-')] = True
+
+    asterisk = FakeAsterisk(endpoints=int(args['endpoints']),
+                            channels=int(args['channels']))
+    server = FakeAsteriskServer(
+        (args['host'], int(args['port'])), resource_dir=args['resources'],
+        asterisk=asterisk, latency=float(args['latency']),
+        jitter=float(args['jitter']), slow_rate=float(args['slow_rate']),
+        slow_latency=float(args['slow_latency']),
+        error_rate=float(args['error_rate']),
+        error_status=int(args['error_status']), verbose=args['verbose'])
+    print "Fake Asterisk serving %d operations at %s" \
+        % (len(server.routes), server.get_uri())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv) or 0)
@@ -17,11 +17,22 @@ channels for your use.
 
 import sys
 sys.path.append("lib")
+import os
+import glob
 import json
 import re
 import requests
+from multiprocessing.pool import ThreadPool
 from api import APIClass
-from utils import parse_args, write_file, get_file_content
+from template import get_template
+from utils import parse_args, write_file, get_file_content, get_hash, \
+    get_files_hash, load_cache, save_cache
+
+
+# Files of the generator itself; a change to any of them regenerates all.
+GENERATOR_FILES = ['generate_library.py', 'lib/api.py', 'lib/template.py',
+                   'lib/utils.py']
+CACHE_FILE = '%s/.generate_cache.json'
 
 
 class Generator():
@@ -32,6 +43,11 @@ class Generator():
         """Initiate Generator object"""
         self.classes = []
         self.lang_tools = None
+        self.cache = {}
+        self.new_cache = {}
+        self.inputs_hash = None
+        self.skipped = []
+        self.routes = False
 
     def run(self, argv):
         """Make API self.classes
@@ -53,7 +69,8 @@ class Generator():
             print "Usage: ./generate_library --lang=language ", \
                   "[--dir=/path/to/resources/ | ", \
                   "--resource=", \
-                  "http://localhost:8088/stasis/api-docs/resources.json] "
+                  "http://localhost:8088/stasis/api-docs/resources.json] ", \
+                  "[--async] [--routes] [--concurrency=8] [--force]"
             return 1
 
         self.lang_tools = __import__(args['lang'])
@@ -72,14 +89,14 @@ class Generator():
                 asterisk_class = class_
             class_.methods[:] = [m for m in class_.methods if remove_moved(m)]
 
-        template_copyright = get_file_content(
-            '%s/templates/copyright.proto' % (args['lang'])
-        ) + '\n'
+        template_copyright = get_template(args['lang'], 'copyright').text \
+            + '\n'
 
         if args['dir']:
             self.get_resources_from_dir(args['dir'], args['lang'])
         elif args['resource']:
-            self.get_resources_from_url(args['resource'], args['lang'])
+            self.get_resources_from_url(args['resource'], args['lang'],
+                                        int(args['concurrency']))
 
         if len(self.classes) == 0:
             print "No resources found. Are you using Asterisk 12 or later?"
@@ -87,55 +104,148 @@ class Generator():
 
         self.classes = sorted(self.classes, cmp=sort_asterisk_first)
 
+        is_async = args['async'] \
+            and hasattr(self.lang_tools, 'make_async_class_name')
+        if args['async'] and not is_async:
+            print "--async is not supported for %s; ignoring." % (args['lang'])
+        self.routes = args['routes'] \
+            and hasattr(self.lang_tools, 'make_route_table')
+        if args['routes'] and not self.routes:
+            print "--routes is not supported for %s; ignoring." \
+                % (args['lang'])
+
+        # Each file is regenerated only if its resource, the language's
+        # templates and module, or the generator changed since the last run.
+        self.cache = {} if args['force'] \
+            else load_cache(CACHE_FILE % (args['lang']))
+        self.inputs_hash = get_hash(get_files_hash(
+            GENERATOR_FILES + ['lib/%s.py' % (args['lang'])]
+            + glob.glob('%s/templates/*' % (args['lang']))),
+            'routes' if self.routes else '')
+
         for class_ in self.classes:
-            method_texts = []
-            print "Generating class %s" % (class_.class_name)
-            class_def = class_.construct_file_contents()
-
-            for method in class_.methods:
-                if method.method_name in methods_to_move:
-                    if class_.class_name != 'Asterisk':
-                        continue
-                    else:
-                        # Rename from get/gets to get_channel, get_channels
-                        method.method_name = re.sub('(s*)$', r'_%s\1'
-                                                    % (method.file_name),
-                                                    method.method_name)
-                        method.file_name = 'asterisk'
-
-                print "  method %s.%s" \
-                    % (class_.class_name, method.method_name)
-                filebit = method.construct_file_contents()
-                method_texts.append(filebit)
-
-            methods_blob = '\n\n'.join(method_texts)
-            if methods_blob != '':
-                # Handle different number of newlines if we have no methods
-                # to add.
-                methods_blob = '\n' + methods_blob
-
-            class_def = re.sub('\{CLASS_METHODS\}', methods_blob, class_def)
-            file_contents = '\n\n'.join([template_copyright, class_def])
-            file_contents = self.lang_tools.wrap(file_contents)
-            write_file('%s/lib/%s.%s' % (args['lang'], class_.file_name,
-                       self.lang_tools.FILE_EXTENSION), file_contents)
+            self.write_class(class_, template_copyright, args['lang'],
+                             methods_to_move)
+            if is_async:
+                self.write_class(class_, template_copyright, args['lang'],
+                                 methods_to_move, is_async=True)
 
         license_content = get_file_content('LICENSE')
         write_file('%s/lib/LICENSE' % args['lang'], license_content)
+        save_cache(CACHE_FILE % (args['lang']), self.new_cache)
+
+        if self.skipped:
+            print "Skipped %d unchanged of %d files: %s" \
+                % (len(self.skipped), len(self.new_cache),
+                   ', '.join(self.skipped))
+
+    def write_class(self, class_, template_copyright, lang, methods_to_move,
+                    is_async=False):
+        """Render one APIClass with its methods and write it to
+        lang/lib. When is_async is True, write the asynchronous variant
+        of the class; its methods use the same templates, and return what
+        the asynchronous API client's invoke returns.
+
+        In --routes mode, methods are stubs (method_def_routes) calling
+        through a table of routes made by the language's make_route_table.
+
+        """
+        method_texts = []
+        methods = []
+        class_name, file_name = class_.get_names(is_async)
+        file_path = '%s/lib/%s.%s' % (lang, file_name,
+                                      self.lang_tools.FILE_EXTENSION)
+        key = self.get_cache_key(class_)
+        self.new_cache[file_path] = key
+        if self.cache.get(file_path) == key and os.path.exists(file_path):
+            self.skipped.append(file_path)
+            return
 
-    def get_resources_from_url(self, resource, lang):
+        if self.routes:
+            method_template = 'method_def_routes'
+        else:
+            method_template = 'method_def'
+        print "Generating class %s" % (class_name)
+
+        for method in class_.methods:
+            if method.method_name in methods_to_move:
+                if class_.class_name != 'Asterisk':
+                    continue
+                else:
+                    # Rename from get/gets to get_channel, get_channels
+                    method.method_name = re.sub('(s*)$', r'_%s\1'
+                                                % (method.file_name),
+                                                method.method_name)
+                    method.file_name = 'asterisk'
+
+            print "  method %s.%s" % (class_name, method.method_name)
+            filebit = method.construct_file_contents(method_template)
+            method_texts.append(filebit)
+            methods.append(method)
+
+        methods_blob = '\n\n'.join(method_texts)
+        if methods_blob != '':
+            # Handle different number of newlines if we have no methods
+            # to add.
+            methods_blob = '\n' + methods_blob
+
+        if self.routes:
+            class_def = class_.construct_file_contents(
+                methods_blob, is_async, template='class_def_routes',
+                route_table=self.lang_tools.make_route_table(
+                    methods, class_.file_name, is_async))
+        else:
+            class_def = class_.construct_file_contents(methods_blob,
+                                                       is_async)
+        file_contents = '\n\n'.join([template_copyright, class_def])
+        file_contents = self.lang_tools.wrap(file_contents)
+        write_file(file_path, file_contents)
+
+    def get_cache_key(self, class_):
+        """Return the hash of everything the files of an APIClass are
+        generated from. The Asterisk class also takes methods from the
+        other resources, so its key covers all of them.
+
+        """
+        if class_.class_name == 'Asterisk':
+            return get_hash(self.inputs_hash,
+                            *[c.source_hash for c in self.classes])
+        return get_hash(self.inputs_hash, class_.source_hash)
+
+    def get_resources_from_url(self, resource, lang, concurrency=8):
         """Get JSON Swagger resources from Asterisk and
         appends APIClass created from them to self.classes
 
+        The API declarations are fetched in parallel, at most concurrency
+        at a time, over one keep-alive session; classes are appended in
+        the order of resources.json whatever order they arrive in.
+
         """
-        response = requests.get(resource)
+        session = requests.Session()
+        session.mount('http://', requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=concurrency))
+        session.mount('https://', requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=concurrency))
+
+        response = session.get(resource)
         if response.status_code != 200:
             return
 
         resources = json.loads(response.text)
+        urls = []
         for each_res in resources['apis']:
             each_res['path'] = re.sub('\{format\}', 'json', each_res['path'])
-            response = requests.get(resources['basePath'] + each_res['path'])
+            urls.append(resources['basePath'] + each_res['path'])
+
+        workers = ThreadPool(max(1, min(concurrency, len(urls))))
+        try:
+            responses = workers.map(session.get, urls)
+        finally:
+            workers.close()
+            workers.join()
+            session.close()
+
+        for response in responses:
             if response.status_code != 200:
                 continue
 
@@ -144,7 +254,9 @@ class Generator():
 
             if res is not None:
                 res['lang'] = lang
-                self.classes.append(APIClass(res))
+                class_ = APIClass(res)
+                class_.source_hash = get_hash(response.content)
+                self.classes.append(class_)
 
     def get_resources_from_dir(self, path, lang):
         """Get JSON Swagger resources from files and
@@ -162,7 +274,9 @@ class Generator():
 
             if res is not None:
                 res['lang'] = lang
-                self.classes.append(APIClass(res))
+                class_ = APIClass(res)
+                class_.source_hash = get_hash(json_string)
+                self.classes.append(class_)
 
 
 def sort_asterisk_first(x, y):
@@ -14,7 +14,7 @@
 
 """
 import re
-from utils import get_file_content
+from template import get_template
 
 
 class APIClassMethod():
@@ -31,20 +31,25 @@ class APIClassMethod():
         self.lang = param_obj['lang']
         self.lang_tools = param_obj['lang_tools']
         self.method_params = []
+        # (argument name, wire name, default) of each parameter, for
+        # languages which can generate route tables
+        self.route_params = []
         self.required_id = False
         self.param_obj = None
         self.api_summary = ''
         self.method_summary = ''
         self.method_name = ''
+        self.response_class = param_obj.get('response_class', 'void')
+        self.param_string = None
+        self.call_param_string = None
 
         obj_id_re = re.compile('\{\w+\}')
         if obj_id_re.search(self.path):
             self.required_id = True
             self.path = re.sub(obj_id_re, '%s', self.path)
 
-        self.param_lines = [get_file_content(
-                            '%s/templates/method_params_def.proto'
-                            % self.lang)]
+        self.param_lines = [get_template(self.lang,
+                                         'method_params_def').text]
 
     def set_method_summary(self, summary):
         """Set the method summary"""
@@ -58,24 +63,32 @@ class APIClassMethod():
         """Set the parameters dict."""
         self.param_obj = param_obj
 
-    def construct_file_contents(self):
-        """Construct and return the contents of the method definition"""
-        t_method = get_file_content('%s/templates/method_def.proto'
-                                    % self.lang)
-        t_method = re.sub('\{API_METHOD_NAME\}', self.method_name, t_method)
+    def construct_file_contents(self, template='method_def'):
+        """Construct and return the contents of the method definition
 
-        string = self.lang_tools.make_param_string(self)
-        t_method = re.sub('\{PARAMS\}', string, t_method)
+        template names the .proto file in the language's templates
+        directory. Parameters are only built once, so the same method can
+        be rendered with several templates.
 
-        call_param_string = self.lang_tools.make_api_call_params(self)
-        t_method = re.sub('\{API_CALL_PARAMS\}', call_param_string, t_method)
+        """
+        if self.param_string is None:
+            self.param_string = self.lang_tools.make_param_string(self)
+            self.call_param_string = \
+                self.lang_tools.make_api_call_params(self)
         method_comment = self.lang_tools.make_method_comment(
             self.api_summary, self.method_summary)
-        t_method = re.sub('\{METHOD_COMMENTS\}', method_comment, t_method)
-        t_method = re.sub('\{BUILD_API_CALL_PARAMS\}',
-                          '\n'.join(self.param_lines), t_method)
+        route_args = ''
+        if hasattr(self.lang_tools, 'make_route_args'):
+            route_args = self.lang_tools.make_route_args(self)
 
-        return t_method
+        return get_template(self.lang, template).render(
+            API_METHOD_NAME=self.method_name,
+            PARAMS=self.param_string,
+            RESPONSE_CLASS=self.response_class,
+            API_CALL_PARAMS=self.call_param_string,
+            METHOD_COMMENTS=method_comment,
+            BUILD_API_CALL_PARAMS='\n'.join(self.param_lines),
+            ROUTE_ARGS=route_args)
 
 
 class APIClass():
@@ -87,6 +100,8 @@ class APIClass():
         """Initiate new APIClass object"""
         self.methods = []
         self.lang = param_obj['lang']
+        # Hash of the resource's Swagger text, for the generation cache
+        self.source_hash = None
 
         try:
             resource = param_obj['resourcePath']
@@ -106,6 +121,7 @@ class APIClass():
             raise AttributeError("No file name.")
 
         lang_tools = __import__(self.lang)
+        self.lang_tools = lang_tools
         self.class_name = lang_tools.make_class_name(self.file_name)
         self.file_name = lang_tools.make_filename(self.file_name)
 
@@ -120,6 +136,7 @@ class APIClass():
                     'path': api['path'],
                     'lang': self.lang,
                     'lang_tools': lang_tools,
+                    'response_class': op.get('responseClass', 'void'),
                 })
                 if 'parameters' in op:
                     method.set_parameters(op['parameters'])
@@ -133,13 +150,28 @@ class APIClass():
 
                 self.methods.append(method)
 
-    def construct_file_contents(self):
-        """Construct and return the class definition for the file
+    def get_names(self, is_async=False):
+        """Return the (class name, file name) pair for this class, or for
+        its asynchronous variant if is_async is True.
+
+        """
+        if is_async:
+            return (self.lang_tools.make_async_class_name(self.class_name),
+                    self.lang_tools.make_async_filename(self.file_name))
+        return (self.class_name, self.file_name)
+
+    def construct_file_contents(self, methods_blob, is_async=False,
+                                template='class_def', route_table=''):
+        """Construct and return the class definition for the file, with
+        the method definitions in methods_blob.
         We can't construct methods here, because we need to move some
         methods to the Asterisk class.
 
+        template names the .proto file to use; route_table is the text of
+        the route table, for the class_def_routes template.
+
         """
-        template = get_file_content('%s/templates/class_def.proto' % self.lang)
-        template = re.sub('\{CLASS_NAME\}', self.class_name, template)
-        template = re.sub('\{FILE_NAME\}', self.file_name, template)
-        return template
+        class_name, file_name = self.get_names(is_async)
+        return get_template(self.lang, template).render(
+            CLASS_NAME=class_name, FILE_NAME=file_name,
+            CLASS_METHODS=methods_blob, ROUTE_TABLE=route_table)
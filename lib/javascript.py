@@ -15,7 +15,8 @@ detailed in the the LICENSE file at the top of the source tree.
 
 """
 import re
-from utils import get_file_content, wrap_line
+from utils import compile_wrap_markers, wrap_code
+from template import get_template
 
 
 LANGUAGE = 'javascript'
@@ -31,6 +32,7 @@ CODE_WRAP_MARKERS = [
     ('\/\*', '/*', ' * ', 0),
     ('this.\w+ = function', '', '', 2)
 ]
+WRAP_PATTERNS = compile_wrap_markers(CODE_WRAP_MARKERS)
 
 
 def make_filename(name):
@@ -75,8 +77,7 @@ def make_param_string(method):
     in a class
 
     """
-    t_attr = get_file_content('%s/templates/method_params_attr.proto'
-                              % method.lang)
+    t_attr = get_template(method.lang, 'method_params_attr')
     if method.param_obj is None:
         return ''
 
@@ -90,9 +91,8 @@ def make_param_string(method):
         if 'allowMultiple' in p and p['allowMultiple']:
             param_name = param_name + "Array"
 
-        attr = re.sub('\{ATTR_NAME\}', param_name, t_attr)
-        attr = re.sub('\{ATTR_ORIG_NAME\}', p['name'], attr)
-        method.param_lines.append(attr)
+        method.param_lines.append(t_attr.render(ATTR_NAME=param_name,
+                                                ATTR_ORIG_NAME=p['name']))
 
         method.method_params.append(param_name)
 
@@ -140,25 +140,4 @@ def wrap(codestring):
     visible line length.
 
     """
-    width = 70
-    code_lines = codestring.split('\n')
-    wrapped_code_lines = []
-    for line in code_lines:
-        if len(line) < width:
-            wrapped_code_lines.append(line)
-            continue
-
-        matched = None
-        for each in CODE_WRAP_MARKERS:
-            match = re.search('^\s+(%s)' % (each[0]), line)
-            if match is not None:
-                matched = True
-                new_line = wrap_line(line, width, each[1], indent_char='\t',
-                                     indent_suffix=each[2],
-                                     indent_offset=each[3])
-                wrapped_code_lines.append(new_line)
-
-        if matched is None:
-            wrapped_code_lines.append(line)
-
-    return '\n'.join(wrapped_code_lines)
+    return wrap_code(codestring, 70, WRAP_PATTERNS, indent_char='\t')
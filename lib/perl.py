@@ -15,7 +15,7 @@ detailed in the the LICENSE file at the top of the source tree.
 
 """
 import re
-from utils import get_file_content, wrap_line
+from utils import compile_wrap_markers, wrap_code
 
 
 LANGUAGE = 'perl'
@@ -30,6 +30,7 @@ CODE_WRAP_MARKERS = [
     #     index before content
     ('# ', '# ', '# ', 0)
 ]
+WRAP_PATTERNS = compile_wrap_markers(CODE_WRAP_MARKERS)
 
 
 def make_filename(name):
@@ -124,25 +125,4 @@ def wrap(codestring):
     visible line length.
 
     """
-    width = 70
-    code_lines = codestring.split('\n')
-    wrapped_code_lines = []
-    for line in code_lines:
-        if len(line) < width:
-            wrapped_code_lines.append(line)
-            continue
-
-        matched = None
-        for each in CODE_WRAP_MARKERS:
-            match = re.search('^\s+(%s)' % (each[0]), line)
-            if match is not None:
-                matched = True
-                new_line = wrap_line(line, width, each[1], indent_char='\t',
-                                     indent_suffix=each[2],
-                                     indent_offset=each[3])
-                wrapped_code_lines.append(new_line)
-
-        if matched is None:
-            wrapped_code_lines.append(line)
-
-    return '\n'.join(wrapped_code_lines)
+    return wrap_code(codestring, 70, WRAP_PATTERNS, indent_char='\t')
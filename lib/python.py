@@ -15,7 +15,8 @@ detailed in the the LICENSE file at the top of the source tree.
 
 """
 import re
-from utils import get_file_content, wrap_line
+from utils import compile_wrap_markers, wrap_code
+from template import get_template
 
 
 LANGUAGE = 'python'
@@ -30,8 +31,12 @@ CODE_WRAP_MARKERS = [
     #     index before content
     ('def', '(', '', 1),
     ('self._api.call', '(', '', 1),
+    ('return self._api.call', '(', '', 1),
+    ('return self._api.invoke', '(', '', 1),
+    ('return call_route', '(', '', 1),
     ('"""', '"""', '', 1),
 ]
+WRAP_PATTERNS = compile_wrap_markers(CODE_WRAP_MARKERS)
 
 
 def make_filename(name):
@@ -59,6 +64,22 @@ def make_class_name(name):
     return name
 
 
+def make_async_class_name(class_name):
+    """Form the class name of the asynchronous variant of a class, whose
+    methods return pending results from AsyncAsteriskRestAPI.
+
+    """
+    return 'Async' + class_name
+
+
+def make_async_filename(name):
+    """Form the module name, without file extension, of the asynchronous
+    variant of a class.
+
+    """
+    return 'async_' + name
+
+
 def make_method_name(name, class_name):
     """Manipulate a string to form the name without file extension for each
     module in the package.
@@ -78,8 +99,7 @@ def make_param_string(method):
     in a class
 
     """
-    t_attr = get_file_content('%s/templates/method_params_attr.proto'
-                              % method.lang)
+    t_attr = get_template(method.lang, 'method_params_attr')
     if method.param_obj is None:
         return 'self'
 
@@ -96,9 +116,8 @@ def make_param_string(method):
 
         param_name = re.sub('([A-Z]{1,1})', r'_\1', param_name)
         param_name = param_name.lower()
-        attr = re.sub('\{ATTR_NAME\}', param_name, t_attr)
-        attr = re.sub('\{ATTR_ORIG_NAME\}', p['name'], attr)
-        method.param_lines.append(attr)
+        method.param_lines.append(t_attr.render(ATTR_NAME=param_name,
+                                                ATTR_ORIG_NAME=p['name']))
 
         if 'defaultValue' in p:
             p['defaultValue'] = "'%s'" % (p['defaultValue'])
@@ -108,6 +127,8 @@ def make_param_string(method):
         param = "%s=%s" % (param_name, p['defaultValue'])
 
         method.method_params.append(param)
+        method.route_params.append((param_name, p['name'],
+                                    p['defaultValue']))
 
     return ', '.join(method.method_params)
 
@@ -138,6 +159,55 @@ def make_api_call_params(method):
     return ', '.join(params)
 
 
+def make_route_args(method):
+    """Format the tuple of a method's arguments passed to call_route by
+    the stubs of the --routes mode.
+
+    """
+    names = [name for name, wire_name, default in method.route_params]
+    if len(names) == 1:
+        return '(%s,)' % (names[0])
+    return '(%s)' % (', '.join(names))
+
+
+def make_route_table(methods, file_name, is_async):
+    """Make the imports and ROUTES table of a class for the --routes mode:
+    a Route (see python/lib/routes.py) for each method, keyed by method
+    name. The asynchronous variant imports the table of the class from
+    file_name instead. Both are empty for a class without methods.
+
+    The result starts with a newline: the template puts it at the end
+    of the model import line.
+
+    """
+    if not methods:
+        return ''
+    if is_async:
+        return '\nfrom routes import call_route\nfrom %s import ROUTES' \
+            % (file_name)
+
+    lines = ['', 'from routes import Route, call_route', '', '',
+             'ROUTES = {']
+    for method in methods:
+        lines.append("    '%s': Route(" % (method.method_name))
+        fields = "'%s', '%s', '%s', %s, %s," % (
+            method.response_class, method.path, method.http_method,
+            bool(method.method_params
+                 or method.http_method in ['POST', 'DELETE']),
+            method.required_id)
+        if not method.route_params:
+            lines.append('        %s ()),' % (fields))
+            continue
+        lines.append('        %s' % (fields))
+        params = ["('%s', '%s', %s)" % (name, wire_name, default)
+                  for name, wire_name, default in method.route_params]
+        lines.append('        (%s)),' % (',\n         '.join(params)
+                                         + (',' if len(params) == 1
+                                            else '')))
+    lines.append('}')
+    return '\n'.join(lines)
+
+
 def wrap(codestring):
     """Wrap code created by AsteriskPy to a certain width.
 
@@ -152,25 +222,4 @@ def wrap(codestring):
     has multi-line comments, and we will use spaces.
 
     """
-    width = 79
-    code_lines = codestring.split('\n')
-    wrapped_code_lines = []
-    for line in code_lines:
-        if len(line) < width:
-            wrapped_code_lines.append(line)
-            continue
-
-        matched = None
-        for each in CODE_WRAP_MARKERS:
-            match = re.search('^\s+(%s)' % (each[0]), line)
-            if match is not None:
-                matched = True
-                new_line = wrap_line(line, width, each[1],
-                                     indent_suffix=each[2],
-                                     indent_offset=each[3])
-                wrapped_code_lines.append(new_line)
-
-        if matched is None:
-            wrapped_code_lines.append(line)
-
-    return '\n'.join(wrapped_code_lines)
+    return wrap_code(codestring, 79, WRAP_PATTERNS)
@@ -0,0 +1,61 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+import re
+from utils import get_file_content
+
+
+PLACEHOLDER_RE = re.compile('\\{([A-Z_]+)\\}')
+
+_templates = {}
+
+
+class Template():
+    """A .proto template, compiled once into its literal text and the
+    {PLACEHOLDER} names between them.
+
+    """
+    def __init__(self, text):
+        """Initiate new Template object"""
+        self.text = text
+        # Even items are literal text, odd items placeholder names.
+        self.parts = PLACEHOLDER_RE.split(text)
+
+    def render(self, **values):
+        """Return the text with every placeholder replaced by its value, in
+        a single pass; values are inserted as they are. Placeholders
+        without a value are left in place.
+
+        """
+        parts = self.parts[:]
+        for i in range(1, len(parts), 2):
+            if parts[i] in values:
+                parts[i] = values[parts[i]]
+            else:
+                parts[i] = '{%s}' % (parts[i])
+        return ''.join(parts)
+
+
+def get_template(lang, name):
+    """Return the Template for lang/templates/name.proto, reading and
+    compiling the file on first use only.
+
+    """
+    key = (lang, name)
+    template = _templates.get(key)
+    if template is None:
+        template = _templates[key] = Template(get_file_content(
+            '%s/templates/%s.proto' % (lang, name)))
+    return template
@@ -14,6 +14,10 @@ channels for your use.
  detailed in the the LICENSE file at the top of the source tree.
 
 """
+import os
+import re
+import json
+import hashlib
 
 
 def get_file_content(filepath):
@@ -28,11 +32,52 @@ def get_file_content(filepath):
 
 def write_file(filepath, contents):
     """Strip all newlines from beginning and end of contents. Add one newline
-    to contents. Open a file and overwrite it with contents."""
-    contents = contents.strip('\n')
+    to contents. Open a file and overwrite it with contents, unless it
+    already holds them; return False in that case."""
+    contents = contents.strip('\n') + '\n'
+    if os.path.exists(filepath):
+        f = open(filepath, 'r')
+        unchanged = f.read() == contents
+        f.close()
+        if unchanged:
+            return False
     f = open(filepath, 'w')
-    f.write(contents + '\n')
+    f.write(contents)
     f.close()
+    return True
+
+
+def get_hash(*strings):
+    """Return the hex SHA-1 digest of strings, taken together."""
+    digest = hashlib.sha1()
+    for string in strings:
+        digest.update(string)
+        digest.update('\0')
+    return digest.hexdigest()
+
+
+def get_files_hash(filepaths):
+    """Return the hash of the names and contents of files."""
+    strings = []
+    for filepath in sorted(filepaths):
+        f = open(filepath, 'rb')
+        strings.extend([filepath, f.read()])
+        f.close()
+    return get_hash(*strings)
+
+
+def load_cache(filepath):
+    """Return the dict saved in a JSON cache file, or an empty one if the
+    file is missing or unreadable."""
+    try:
+        return json.loads(get_file_content(filepath))
+    except (IOError, ValueError):
+        return {}
+
+
+def save_cache(filepath, cache):
+    """Save a dict to a JSON cache file."""
+    write_file(filepath, json.dumps(cache, indent=1, sort_keys=True))
 
 
 def parse_args(argv):
@@ -42,6 +87,10 @@ def parse_args(argv):
         'dir': None,
         'resource': None,
         'lang': 'python',
+        'async': False,
+        'routes': False,
+        'concurrency': 8,
+        'force': False,
     }
     for a in argv:
         pieces = a.split("=", 1)
@@ -53,6 +102,41 @@ def parse_args(argv):
     return args
 
 
+def compile_wrap_markers(markers):
+    """Compile the regex of each entry of a CODE_WRAP_MARKERS list.
+    Return a list of (pattern, indent_marker, indent_suffix, indent_offset).
+
+    """
+    return [(re.compile('^\\s+(%s)' % (each[0])), each[1], each[2], each[3])
+            for each in markers]
+
+
+def wrap_code(codestring, width, patterns, indent_char=' '):
+    """Wrap the lines of codestring which are width characters or longer
+    and match one of patterns, as returned by compile_wrap_markers. A line
+    matching several patterns is wrapped once for each.
+
+    """
+    wrapped_code_lines = []
+    for line in codestring.split('\n'):
+        if len(line) < width:
+            wrapped_code_lines.append(line)
+            continue
+
+        matched = False
+        for pattern, indent_marker, indent_suffix, indent_offset in patterns:
+            if pattern.match(line) is not None:
+                matched = True
+                wrapped_code_lines.append(wrap_line(
+                    line, width, indent_marker, indent_offset=indent_offset,
+                    indent_char=indent_char, indent_suffix=indent_suffix))
+
+        if not matched:
+            wrapped_code_lines.append(line)
+
+    return '\n'.join(wrapped_code_lines)
+
+
 def wrap_line(text, width, indent_marker, indent_offset=0, indent_char=' ',
               indent_suffix=''):
     """
@@ -60,28 +144,37 @@ def wrap_line(text, width, indent_marker, indent_offset=0, indent_char=' ',
     and most spaces in the text. Expects that existing line
     breaks are posix newlines (\n).
 
-    Loop through iterable created by splitting the text by a space.
-    Construct lines with words and spaces until $width is reached.
-    Start a new line with a newline when $width is reached.
+    Loop through the words created by splitting the text by a space.
+    Add each word to the current line after a space, or start a new
+    line first if the word would reach $width. The length of the current
+    line is kept as we go, so the time taken is linear in the length
+    of the text.
 
     """
     paren_index = text.find(indent_marker)
     if paren_index == 0:
         paren_index = 1
     indent = indent_char * (paren_index + indent_offset)
-
-    def make_delimiter(line, word, width):
-        """Determine whether we will add this word to the current line
-        or begin a new line.
-
-        """
-        isbreak = len(line)-line.rfind('\n')-1 + \
-            len(word.split('\n', 1)[0]) >= width
-        if isbreak:
-            return '\n%s%s' % (indent, indent_suffix)
+    line_break = '\n%s%s' % (indent, indent_suffix)
+    # Length of the new line's indentation, after the newline
+    break_length = len(line_break) - 1
+
+    words = text.split(' ')
+    pieces = [words[0]]
+    column = len(words[0]) - words[0].rfind('\n') - 1
+    for word in words[1:]:
+        newline_index = word.find('\n')
+        first_length = len(word) if newline_index == -1 else newline_index
+        if column + first_length >= width:
+            pieces.append(line_break)
+            column = break_length
+        else:
+            pieces.append(' ')
+            column += 1
+        pieces.append(word)
+        if newline_index == -1:
+            column += len(word)
         else:
-            return ' '
+            column = len(word) - word.rfind('\n') - 1
 
-    return reduce(lambda line, word, width=width: '%s%s%s' %
-                  (line, make_delimiter(line, word, width),
-                  word), text.split(' '))
+    return ''.join(pieces)
@@ -14,10 +14,19 @@
 
 """
 from asteriskpy import AsteriskPy
+from async_asteriskpy import AsyncAsteriskPy
 from asterisk import Asterisk
 from endpoint import Endpoint
 from bridge import Bridge
 from channel import Channel
 from recording import Recording
+from retry_policy import RetryPolicy
+from circuit_breaker import CircuitBreaker
+from rate_limiter import RateLimiter
+from response_cache import ResponseCache
+from state_mirror import StateMirror
+from model_list import ModelList
 
-__all__ = ['AsteriskPy', 'Endpoint', 'Bridge', 'Channel', 'Recording']
+__all__ = ['AsteriskPy', 'AsyncAsteriskPy', 'Endpoint', 'Bridge', 'Channel',
+           'Recording', 'RetryPolicy', 'CircuitBreaker', 'RateLimiter',
+           'ResponseCache', 'StateMirror', 'ModelList']
@@ -13,40 +13,177 @@
  detailed in the the LICENSE file at the top of the source tree.
 
 """
+import time
+import threading
 import requests
 import json
-from errors import AsteriskPyAccessException
+from errors import AsteriskPyAccessException, AsteriskPyTimeoutException, \
+    AsteriskPyCircuitOpenException, AsteriskPyRateLimitException
+from connection_pool import PooledHTTPAdapter
+from health import get_health_state
+from metrics import Metrics
+from retry_policy import RetryPolicy
+from circuit_breaker import CircuitBreaker
+from rate_limiter import classify_call
+from single_flight import SingleFlight, make_call_key
+from event_dispatcher import EventDispatcher
+from event_stream import EventStream, make_events_uri
+from batch import run_batch
+from identity_map import IdentityMap
+from responses import decode_result
+
+
+def get_error_message(resp):
+    """Return ': message' for an error response with a JSON message, as
+    Asterisk sends, or an empty string.
+
+    """
+    try:
+        return ": %s" % (json.loads(resp.text)['message'])
+    except (ValueError, KeyError, TypeError):
+        return ''
 
 
 class AsteriskRestAPI:
     """Handle HTTP requests to Asterisk."""
-    def __init__(self, uri='localhost'):
+    def __init__(self, uri='localhost', pool_size=10, idle_timeout=60,
+                 max_age=300, pool_block=True, health_ttl=30,
+                 probe_in_background=False, metrics=None, timeout=10,
+                 retry_policy=None, circuit_breaker=None,
+                 rate_limiter=None, coalesce_gets=True,
+                 response_cache=None, app=None, event_dispatcher=None):
         """Initiate new AsteriskRestAPI instance.
 
         Takes REST API URI. Default http://localhost:8088/stasis/api
         from AsteriskPy._stasis_base
 
+        Requests are sent over a shared keep-alive session, which is safe
+        to use from several threads. pool_size is the number of connections
+        kept open per host; idle_timeout and max_age (seconds) control when
+        a pooled connection is closed and replaced.
+
+        Asterisk is not contacted here. Reachability is probed on demand
+        (check_health, wait_until_ready), or at once on a background thread
+        if probe_in_background is True, and cached for health_ttl seconds
+        for every client of the same URI.
+
+        Every call is recorded in metrics, a Metrics instance which may be
+        shared between clients.
+
+        timeout is the default deadline of a call in seconds, retries
+        included. retry_policy (a RetryPolicy) decides which failed calls
+        are retried; circuit_breaker (a CircuitBreaker) refuses calls while
+        this host keeps failing. Both have sensible defaults.
+
+        rate_limiter is an optional RateLimiter applied to every call; it
+        may be shared between clients. Time spent waiting on it is
+        recorded in the metrics.
+
+        With coalesce_gets, identical GET calls made while one is in
+        flight wait for it and share its result instead of sending their
+        own request.
+
+        response_cache is an optional ResponseCache for GET results. Writes
+        made through this client drop the entries they make stale.
+
+        app is the name of the Stasis application whose events are
+        delivered to the handlers added with add_event_handler, through
+        event_dispatcher (an EventDispatcher, which may be shared). Its
+        workers, queue size and overflow policy keep slow handlers from
+        holding up the events connection.
+
         """
         self._base_uri = uri
+        self._adapter = PooledHTTPAdapter(pool_size=pool_size,
+                                          idle_timeout=idle_timeout,
+                                          max_age=max_age,
+                                          pool_block=pool_block)
+        self._session = requests.Session()
+        self._session.mount('http://', self._adapter)
+        self._session.mount('https://', self._adapter)
+        self._health = get_health_state(self._base_uri, health_ttl)
+        self.metrics = metrics or Metrics()
+        self._timeout = timeout
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._circuit_breaker = circuit_breaker or CircuitBreaker()
+        self._rate_limiter = rate_limiter
+        self._single_flight = SingleFlight() if coalesce_gets else None
+        self._cache = response_cache
+        self._app = app
+        self._events = event_dispatcher or EventDispatcher()
+        self.objects = IdentityMap()
+        self._events.add_listener(self._load_event_objects)
+        self._event_stream = None
+        self._event_stream_lock = threading.Lock()
 
-        try:
-            requests.get("%s/asterisk.json" % (self._base_uri))
-        except requests.exceptions.ConnectionError:
-            raise AsteriskPyAccessException(
-                "Cannot access URI %s" % (self._base_uri)
-            )
+        if probe_in_background:
+            probe = threading.Thread(target=self.check_health)
+            probe.daemon = True
+            probe.start()
+
+    def check_health(self, force=False, timeout=2):
+        """Return True if Asterisk is reachable.
+
+        Uses the cached state unless it is older than health_ttl or force
+        is True, in which case asterisk.json is requested. Only one probe
+        per URI runs at a time; concurrent callers share its outcome.
+
+        """
+        if not force and self._health.is_fresh():
+            return self._health.reachable
+
+        with self._health.probe_lock:
+            if not force and self._health.is_fresh():
+                return self._health.reachable
+            try:
+                self._session.get("%s/asterisk.json" % (self._base_uri),
+                                  timeout=timeout)
+                self._health.record(True)
+            except requests.exceptions.RequestException, err:
+                self._health.record(False, str(err))
+        return self._health.reachable
+
+    def wait_until_ready(self, timeout=10, interval=0.5):
+        """Block until Asterisk is reachable.
+
+        Throws AsteriskPyAccessException if it is still unreachable after
+        timeout seconds.
+
+        """
+        deadline = time.time() + timeout
+        force = False
+        while not self.check_health(force=force,
+                                    timeout=max(deadline - time.time(), 0.1)):
+            if time.time() + interval > deadline:
+                raise AsteriskPyAccessException(
+                    "Cannot access URI %s" % (self._base_uri)
+                )
+            time.sleep(interval)
+            force = True
+
+    def get_health(self):
+        """Return a dict of the cached reachability of Asterisk."""
+        return self._health.snapshot()
 
     def call(self, path, http_method='GET', parameters=None,
-             object_id=None):
+             object_id=None, timeout=None, use_cache=True):
         """Call an Asterisk API method, return result dictionary
 
-        Throws AsteriskPyAccessException if the server is unreachable.
+        Throws AsteriskPyAccessException if the server is unreachable or
+        the request fails at the HTTP level, AsteriskPyTimeoutException
+        if the call does not finish within timeout seconds (default set in
+        the constructor, retries included) and
+        AsteriskPyCircuitOpenException if the circuit breaker refuses the
+        call. If a rate limiter is set, AsteriskPyRateLimitException is
+        thrown when it refuses the call. All are subclasses of
+        AsteriskPyAccessException.
         Returns a dict of the following structure:
 
         {
             'success' : True, # or False
             'response' : jsonObject, # or None
             'error' : None, # or string
+            'status' : 200, # HTTP status code, or None
         }
 
         success indicates the success or failure of the Asterisk API call.
@@ -57,40 +194,150 @@ class AsteriskRestAPI:
         will be "Invalid JSON." and response will be the unchanged content
         of the response.
 
+        Coalesced and cached GET calls return the same dict; do not
+        modify it. With use_cache False, a GET call is always made to
+        Asterisk, neither answered from the response cache nor coalesced;
+        its result still replaces the cached one.
+
         """
-        result = {'success': False, 'response': None, 'error': None}
-        if object_id:
-            path = path % (object_id)
+        if http_method != 'GET':
+            try:
+                return self._call(path, http_method, parameters, object_id,
+                                  timeout)
+            finally:
+                if self._cache is not None:
+                    self._cache.invalidate(path, object_id)
 
-        request_uri = self._base_uri + path
+        key = make_call_key(path, parameters, object_id)
+        if self._cache is not None and use_cache:
+            result = self._cache.get(key)
+            if result is not None:
+                return result
+
+        if self._single_flight is not None and use_cache:
+            result, shared = self._single_flight.do(
+                key, self._call, path, http_method, parameters, object_id,
+                timeout)
+            if shared:
+                self.metrics.increment('coalesced_total',
+                                       (('operation', path),
+                                        ('method', http_method)))
+        else:
+            result = self._call(path, http_method, parameters, object_id,
+                                timeout)
+
+        if self._cache is not None and result['success']:
+            self._cache.put(key, result)
+        return result
+
+    def invoke(self, response_class, path, http_method='GET',
+               parameters=None, object_id=None, timeout=None):
+        """Make a call and return its decoded response: an instance of a
+        generated class, a list of them, None or decoded JSON, according
+        to response_class, the operation's Swagger responseClass. See
+        responses.decode_result.
+
+        Objects are loaded through this client's identity map, objects.
+        Throws the exceptions of call, and an AsteriskPyCallException
+        subclass matching the HTTP status if the call failed.
+
+        """
+        result = self.call(path, http_method=http_method,
+                           parameters=parameters, object_id=object_id,
+                           timeout=timeout)
+        return decode_result(self, self.objects, response_class, result)
+
+    def _call(self, path, http_method, parameters, object_id, timeout):
+        """Make the call described in call(), without coalescing."""
+        result = {'success': False, 'response': None, 'error': None,
+                  'status': None}
+        operation = path
         if object_id is not None:
-            request_uri = request_uri + "/%s" % (object_id)
+            if '%s' in path:
+                path = path % (object_id)
+            else:
+                path = "%s/%s" % (path, object_id)
 
-        print "uri is %s" % (request_uri)
-        try:
-            if http_method == 'GET':
-                resp = requests.get(request_uri, params=parameters)
-            elif http_method == 'POST':
-                resp = requests.post(request_uri, params=parameters)
-            elif http_method == 'DELETE':
-                resp = requests.delete(request_uri, params=parameters)
-            elif http_method == 'PUT':
-                resp = requests.put(request_uri, params=parameters)
-        except requests.exceptions.ConnectionError:
+        request_uri = self._base_uri + path
+
+        start = time.time()
+        deadline = start + (self._timeout if timeout is None else timeout)
+        if self._rate_limiter is not None:
+            self._wait_for_rate_limiter(operation, http_method, deadline)
+
+        attempt = 0
+        while True:
+            try:
+                self._circuit_breaker.before_call()
+            except AsteriskPyCircuitOpenException:
+                self.metrics.record_call(operation, http_method,
+                                         time.time() - start,
+                                         status='circuit_open')
+                raise
+
+            try:
+                resp, failure = self._send(http_method, request_uri,
+                                           parameters, deadline)
+            except requests.exceptions.RequestException, err:
+                # e.g. a bad URL or a broken response: still a failure
+                # for the breaker, which may be waiting on this probe.
+                self._circuit_breaker.record_failure()
+                self.metrics.record_call(operation, http_method,
+                                         time.time() - start,
+                                         status='request_error')
+                raise AsteriskPyAccessException(
+                    "Cannot call URI %s: %s" % (request_uri, err)
+                )
+            if failure is None:
+                self._circuit_breaker.record_success()
+                break
+
+            self._circuit_breaker.record_failure()
+            delay = self._retry_policy.get_delay(attempt)
+            if not self._retry_policy.should_retry(http_method, attempt,
+                                                   failure) \
+                    or time.time() + delay >= deadline:
+                break
+
+            self.metrics.increment('retries_total',
+                                   (('operation', operation),
+                                    ('method', http_method)))
+            time.sleep(delay)
+            attempt += 1
+
+        if failure in ('timeout', 'connection_error'):
+            self._health.record(False, failure)
+            self.metrics.record_call(operation, http_method,
+                                     time.time() - start, status=failure)
+            if failure == 'timeout':
+                raise AsteriskPyTimeoutException(
+                    "Timed out calling URI %s" % (request_uri)
+                )
             raise AsteriskPyAccessException(
                 "Cannot access URI %s" % (request_uri)
             )
+        self._health.record(True)
 
         if resp is None:
             # No response or exception? This will probably never happen.
             result['error'] = "No response."
             return result
 
-        print "response is %s" % (resp.status_code)
-        if resp.status_code in [418, 200]:
+        result['status'] = resp.status_code
+        if resp.status_code == 418 or 200 <= resp.status_code < 300:
             result['success'] = True
+            self.metrics.record_call(operation, http_method,
+                                     time.time() - start)
         else:
-            result['error'] = "HTTP error occurred: %s" % (resp.status_code)
+            result['error'] = "HTTP error occurred: %s%s" \
+                % (resp.status_code, get_error_message(resp))
+            self.metrics.record_call(operation, http_method,
+                                     time.time() - start,
+                                     status=resp.status_code)
+            return result
+
+        if not resp.content:
+            # e.g. 204 No Content, for operations returning void
             return result
 
         try:
@@ -101,14 +348,212 @@ class AsteriskRestAPI:
 
         return result
 
-    def add_event_handler(self, event_name, handler):
+    def _wait_for_rate_limiter(self, operation, http_method, deadline):
+        """Take a rate limiter token for the call, waiting no later than
+        deadline, and record the wait in the metrics.
+
+        """
+        labels = (('class', classify_call(operation, http_method)),)
+        try:
+            waited = self._rate_limiter.acquire(
+                labels[0][1], max_wait=deadline - time.time())
+        except AsteriskPyRateLimitException:
+            self.metrics.increment('rate_limited_total', labels)
+            raise
+        self.metrics.observe('rate_limit_wait_seconds', waited, labels)
+
+    def _send(self, http_method, request_uri, parameters, deadline):
+        """Make one HTTP request which must finish by deadline.
+
+        Return (response, failure). failure is None on success, 'timeout',
+        'connection_error' or the HTTP status code of a server error.
+        The deadline bounds connecting and each read from the socket.
+
+        """
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return (None, 'timeout')
+
+        resp = None
+        try:
+            if http_method == 'GET':
+                resp = self._session.get(request_uri, params=parameters,
+                                         timeout=remaining)
+            elif http_method == 'POST':
+                resp = self._session.post(request_uri, params=parameters,
+                                          timeout=remaining)
+            elif http_method == 'DELETE':
+                resp = self._session.delete(request_uri, params=parameters,
+                                            timeout=remaining)
+            elif http_method == 'PUT':
+                resp = self._session.put(request_uri, params=parameters,
+                                         timeout=remaining)
+        except requests.exceptions.Timeout:
+            return (None, 'timeout')
+        except requests.exceptions.ConnectionError:
+            return (None, 'connection_error')
+
+        if resp is not None and resp.status_code >= 500:
+            return (resp, resp.status_code)
+        return (resp, None)
+
+    def call_many(self, calls, max_concurrency=10):
+        """Make several Asterisk API calls in parallel and return a
+        BatchResult holding one result dictionary per call, in input order.
+
+        calls is a list of dicts of call() keyword arguments, e.g.
+        {'path': '/channels/%s', 'http_method': 'DELETE', 'object_id': id}.
+        At most max_concurrency calls are in flight at once; keep it at or
+        below pool_size to avoid waiting on the connection pool.
+
+        A call that cannot reach Asterisk does not stop the batch; its
+        result has success False and the exception message as error.
+
+        """
+        return run_batch(self.call, calls, max_concurrency)
+
+    def get_pool_stats(self):
+        """Return a dict of connection pool statistics: hits (reused
+        connections), new_connections, waits (callers blocked on a full
+        pool) and expired (connections replaced after idle_timeout or
+        max_age).
+
+        """
+        return self._adapter.stats.snapshot()
+
+    def get_metrics(self):
+        """Return a dict keyed by (path template, HTTP method) of call
+        counts, error counts, throughput and latency estimates.
+
+        """
+        return self.metrics.get_summary()
+
+    def export_metrics(self):
+        """Return call metrics and connection pool statistics in the
+        Prometheus text format.
+
+        """
+        counters = dict(('pool_%s_total' % (name), value)
+                        for name, value in self.get_pool_stats().items())
+        if self._cache is not None:
+            counters.update(('cache_%s_total' % (name), value)
+                            for name, value in self.get_cache_stats().items()
+                            if name != 'entries')
+        if self._event_stream is not None:
+            events = self._events.get_stats()
+            counters['events_dispatched_total'] = events['events_dispatched']
+            counters['events_dropped_total'] = events['events_dropped']
+        return self.metrics.to_prometheus(counters=counters)
+
+    def get_cache_stats(self):
+        """Return the response cache statistics, or None without a cache."""
+        if self._cache is None:
+            return None
+        return self._cache.get_stats()
+
+    def get_circuit_state(self):
+        """Return a dict describing this host's circuit breaker."""
+        return self._circuit_breaker.get_state()
+
+    def close(self):
+        """Stop the event stream and its handler workers, and close all
+        pooled connections.
+
+        """
+        self.stop_events()
+        self._events.close()
+        self._session.close()
+
+    def add_event_handler(self, event_name, handler, object_id=None,
+                          **batch_options):
         """Add a general event handler for Stasis events.
         For object-specific events, use the object's add_event_handler instead.
+
+        handler(event) is called with the decoded JSON of each event of
+        type event_name ('*' for every type), only those about the object
+        object_id if it is given. The objects an event is about (channel,
+        bridge, ...) are the live instances of the identity map, updated
+        with the event's data. If an app was given to the constructor,
+        the event stream is started.
+
+        batch_options (batch_size, batch_latency, coalesce) have handler
+        called with batches of events; see EventDispatcher.add_handler.
         """
-        pass
+        self._events.add_handler(event_name, handler, object_id,
+                                 **batch_options)
+        if self._app is not None:
+            self.start_events()
 
-    def remove_event_handler(self, event_name, handler):
-        """Add a general event handler for Stasis events.
+    def remove_event_handler(self, event_name, handler, object_id=None):
+        """Remove a general event handler for Stasis events.
         For object-specific events, use the object's add_event_handler instead.
         """
-        pass
+        return self._events.remove_handler(event_name, handler, object_id)
+
+    def add_event_listener(self, listener, first=False):
+        """Call listener(event) for every Stasis event before any handler,
+        on the thread receiving the events; see EventDispatcher.add_listener.
+        The event stream is not started.
+        """
+        self._events.add_listener(listener, first)
+
+    def remove_event_listener(self, listener):
+        """Remove an event listener; return False if it was not added."""
+        return self._events.remove_listener(listener)
+
+    def _load_event_objects(self, event):
+        """Update the live instances of the objects an event is about, and
+        put them in the event in place of their JSON.
+
+        """
+        self.objects.load_event(self, event)
+
+    def get_app(self):
+        """Return the name of the Stasis application, or None."""
+        return self._app
+
+    def start_events(self):
+        """Connect to the Stasis event WebSocket of the app, if not yet
+        connected.
+
+        """
+        if self._app is None:
+            raise ValueError("No Stasis app given; cannot receive events")
+        with self._event_stream_lock:
+            if self._event_stream is None:
+                self._event_stream = EventStream(
+                    make_events_uri(self._base_uri, self._app),
+                    self._events)
+                self._event_stream.start()
+
+    def stop_events(self):
+        """Disconnect from the Stasis event WebSocket."""
+        with self._event_stream_lock:
+            if self._event_stream is not None:
+                self._event_stream.stop()
+                self._event_stream = None
+
+    def dispatch_event(self, event):
+        """Deliver an event, e.g. a synthetic one, to the event handlers
+        as if it had been received from Asterisk.
+
+        """
+        return self._events.dispatch(event)
+
+    def get_event_stream_state(self):
+        """Return a (connected, reconnects) tuple for the event stream;
+        (False, 0) if it is not started. Events may have been lost when
+        it changes.
+
+        """
+        stream = self._event_stream
+        if stream is None:
+            return (False, 0)
+        return (stream.connected.is_set(), stream.reconnects)
+
+    def get_event_stats(self):
+        """Return a dict of event dispatcher and stream statistics."""
+        stats = self._events.get_stats()
+        if self._event_stream is not None:
+            stats.update(self._event_stream.get_stats())
+        return stats
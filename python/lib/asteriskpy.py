@@ -16,124 +16,158 @@
 import sys
 sys.path.append('python/lib')
 from asterisk_rest_api import AsteriskRestAPI
+from cluster import ClusterRestAPI
 from asterisk import Asterisk
-from endpoint import Endpoint
 from channel import Channel
 from bridge import Bridge
-from recording import Recording
+from errors import AsteriskPyNotFoundException
+from model_list import ModelList
 
 
 class AsteriskPy:
     """
     Python library for the Asterisk REST API.
     """
-    def __init__(self, api_url='http://localhost:8088/stasis'):
+    def __init__(self, api_url='http://localhost:8088/stasis', **kwargs):
         """Initiate new AsteriskPy instance.
 
         Takes optional string api_url which points to the REST API base URL.
-        Raise requests.exceptions
+        api_url may also be a list of base URLs (or of (url, weight)
+        tuples) to spread calls over several Asterisk servers; see
+        ClusterRestAPI for its extra options (strategy, health_interval).
+        Other keyword arguments (pool_size, timeout, retry_policy,
+        circuit_breaker, rate_limiter, response_cache, app, ...) are passed
+        on to AsteriskRestAPI.
+        state_mirror is an optional StateMirror answering get_channels,
+        get_bridges, get_channel and get_bridge locally; it is kept current
+        by the events of the Stasis application given as app.
+        Asterisk is not contacted until the first call; use
+        wait_until_ready to check it is reachable up front.
+
+        Failed calls raise a subclass of AsteriskPyCallException matching
+        the HTTP status, e.g. AsteriskPyNotFoundException for an unknown
+        object id. Listings are ModelLists, with bulk operations such as
+        get_channels().delete_all(state='Ring').
 
         """
         self._api_url = api_url
-        self._api = AsteriskRestAPI(uri=self._api_url)
+        self._mirror = kwargs.pop('state_mirror', None)
+        if isinstance(api_url, (list, tuple)):
+            self._api = ClusterRestAPI(api_url, **kwargs)
+        else:
+            self._api = AsteriskRestAPI(uri=self._api_url, **kwargs)
         self._asterisk = Asterisk(self._api)
+        self._objects = self._api.objects
+        if self._mirror is not None:
+            self._mirror.attach(self._api)
+
+    def wait_until_ready(self, timeout=10):
+        """Block until Asterisk is reachable or raise
+        AsteriskPyAccessException after timeout seconds.
+
+        """
+        self._api.wait_until_ready(timeout=timeout)
 
     def get_info(self):
         """Return dict of Asterisk system information"""
         return self._asterisk.get_info()
 
     def get_endpoints(self):
-        """Return a list of all Endpoints from Asterisk."""
-        result = self._api.call('endpoints', http_method='GET')
-        # Temporary until method is implemented
-        result_list = [Endpoint(self._api), Endpoint(self._api)]
-        #endpoints = [Endpoint(x) for x in result]
-        return result_list
-
-    def get_channels(self):
-        """Return a list of all Channels from Asterisk."""
-        result = self._api.call('channels', http_method='GET')
-        # Temporary until method is implemented
-        result_list = [Channel(self._api), Channel(self._api)]
-        #channels = [Channel(x) for x in result]
-        return result_list
-
-    def get_bridges(self):
-        """Return a list of all Bridges from Asterisk"""
-        result = self._api.call('bridges', http_method='GET')
-        # Temporary until method is implemented
-        result_list = [Bridge(self._api), Bridge(self._api)]
-        #bridges = [Bridge(x) for x in result]
-        return result_list
+        """Return a ModelList of all Endpoints from Asterisk."""
+        return self._api.invoke('Endpoints', '/endpoints')
+
+    def get_channels(self, refresh=False):
+        """Return a ModelList of all Channels from Asterisk.
+        With a state mirror, refresh forces it to fetch them again.
+
+        """
+        if self._mirror is not None:
+            return ModelList([self._objects.load(Channel, self._api, data)
+                              for data in
+                              self._mirror.get_channels(refresh=refresh)])
+        return self._api.invoke('Channels', '/channels')
+
+    def get_bridges(self, refresh=False):
+        """Return a ModelList of all Bridges from Asterisk.
+        With a state mirror, refresh forces it to fetch them again.
+
+        """
+        if self._mirror is not None:
+            return ModelList([self._objects.load(Bridge, self._api, data)
+                              for data in
+                              self._mirror.get_bridges(refresh=refresh)])
+        return self._api.invoke('Bridges', '/bridges')
 
     def get_recordings(self):
-        """Return a list of all Recordings from Asterisk."""
-        result = self._api.call('recordings', http_method='GET')
-        # Temporary until method is implemented
-        result_list = [Recording(self._api), Recording(self._api)]
-        #recordings = [Recording(x) for x in result]
-        return result_list
+        """Return a ModelList of all Recordings from Asterisk."""
+        return self._api.invoke('Recordings', '/recordings')
 
     def get_endpoint(self, object_id):
         """Return Endpoint specified by object_id."""
-        result = self._api.call('endpoints', http_method='GET',
+        return self._api.invoke('Endpoint', '/endpoints',
                                 object_id=object_id)
-        # Temporary until method is implemented
-        result = Endpoint(self._api)
-        #endpoint = Endpoint(result)
-        return result
-
-    def get_channel(self, object_id):
-        """Return Channel specified by object_id."""
-        result = self._api.call('channels', http_method='GET',
-                                object_id=object_id)
-        # Temporary until method is implemented
-        result = Channel(self._api)
-        #channel = Channel(result)
-        return result
-
-    def get_bridge(self, object_id):
-        """Return Bridge specified by object_id."""
-        result = self._api.call('bridges', http_method='GET',
-                                object_id=object_id)
-        # Temporary until method is implemented
-        result = Bridge(self._api)
-        #bridge = Bridge(result)
-        return result
+
+    def get_channel(self, object_id, refresh=False):
+        """Return Channel specified by object_id.
+        With a state mirror, refresh forces it to fetch channels again.
+
+        """
+        if self._mirror is not None:
+            return self._load_mirrored(
+                Channel, self._mirror.get_channel(object_id, refresh=refresh),
+                object_id)
+        return self._api.invoke('Channel', '/channels', object_id=object_id)
+
+    def get_bridge(self, object_id, refresh=False):
+        """Return Bridge specified by object_id.
+        With a state mirror, refresh forces it to fetch bridges again.
+
+        """
+        if self._mirror is not None:
+            return self._load_mirrored(
+                Bridge, self._mirror.get_bridge(object_id, refresh=refresh),
+                object_id)
+        return self._api.invoke('Bridge', '/bridges', object_id=object_id)
 
     def get_recording(self, object_id):
         """Return Recording specified by object_id."""
-        result = self._api.call('recordings', http_method='GET',
+        return self._api.invoke('Recording', '/recordings',
                                 object_id=object_id)
-        # Temporary until method is implemented
-        result = Recording(self._api)
-        #recording = Recording(result)
-        return result
 
     def create_channel(self, params):
         """In Asterisk, originate a channel. Return the Channel."""
-        result = self._api.call('channels', http_method='POST',
+        return self._api.invoke('Channel', '/channels', http_method='POST',
                                 parameters=params)
-        # Temporary until method is implemented
-        result = Channel(self._api)
-        return result
 
     def create_bridge(self, params):
         """In Asterisk, bridge two or more channels. Return the Bridge."""
-        result = self._api.call('bridges', http_method='POST',
+        return self._api.invoke('Bridge', '/bridges', http_method='POST',
                                 parameters=params)
-        # Temporary until method is implemented
-        result = Bridge(self._api)
-        return result
 
-    def add_event_handler(self, event_name, handler):
+    def _load_mirrored(self, model_class, data, object_id):
+        """Return the instance for an object of the state mirror, raising
+        AsteriskPyNotFoundException if the mirror does not have it.
+
+        """
+        if data is None:
+            raise AsteriskPyNotFoundException(
+                "%s %s not found" % (model_class.__name__, object_id), 404)
+        return self._objects.load(model_class, self._api, data)
+
+    def add_event_handler(self, event_name, handler, **batch_options):
         """Add a general event handler for Stasis events.
         For object-specific events, use the object's add_event_handler instead.
+
+        Events are received for the Stasis application named by the app
+        keyword argument of the constructor. batch_options are described
+        in AsteriskRestAPI.add_event_handler.
         """
-        pass
+        self._api.add_event_handler(event_name, handler,
+                                    **batch_options)
 
     def remove_event_handler(self, event_name, handler):
-        """Add a general event handler for Stasis events.
-        For object-specific events, use the object's add_event_handler instead.
+        """Remove a general event handler for Stasis events.
+        For object-specific events, use the object's remove_event_handler
+        instead.
         """
-        pass
+        return self._api.remove_event_handler(event_name, handler)
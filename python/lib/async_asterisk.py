@@ -0,0 +1,60 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+
+
+from model import Model
+
+
+class AsyncAsterisk(Model):
+    """Definition of AsyncAsterisk object."""
+    __slots__ = ()
+
+    def __init__(self, api, data=None):
+        """Initialize the AsyncAsterisk object from the decoded JSON data
+        Asterisk returned for it, if any.
+        """
+        Model.__init__(self, api, data)
+
+    def get_id(self):
+        """Return the AsyncAsterisk object's id."""
+        return self.object_id
+
+    def add_event_handler(self, event_name, handler, **batch_options):
+        """Add an event handler for Stasis events on this object.
+        For general events, use Asterisk.add_event_handler instead.
+        batch_options (batch_size, batch_latency, coalesce) have handler
+        called with batches of events.
+        """
+        self._api.add_event_handler(event_name, handler,
+                                    object_id=self.object_id,
+                                    **batch_options)
+
+    def remove_event_handler(self, event_name, handler):
+        """Remove an event handler for Stasis events on this object.
+        For general events, use Asterisk.remove_event_handler instead.
+        """
+        return self._api.remove_event_handler(event_name, handler,
+                                              object_id=self.object_id)
+
+    def get_info(self, only_string_list=None):
+        """Asterisk system information (similar to core show settings); Gets
+         Asterisk system information"""
+        params = {}
+        if only_string_list:
+            params['only'] = only_string_list
+
+        return self._api.invoke('AsteriskInfo', '/asterisk/info',
+                                http_method='GET', parameters=params)
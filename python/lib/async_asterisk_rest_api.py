@@ -0,0 +1,157 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+import threading
+from multiprocessing.pool import ThreadPool
+from asterisk_rest_api import AsteriskRestAPI
+from single_flight import make_call_key
+from identity_map import IdentityMap
+from responses import decode_result
+
+
+class AsyncAsteriskRestAPI:
+    """Handle HTTP requests to Asterisk without blocking the caller.
+
+    Calls are run by a pool of worker threads over the pooled keep-alive
+    session of an AsteriskRestAPI. Each call returns at once with a pending
+    result (multiprocessing.pool.AsyncResult); use its get(timeout) method
+    to wait for the result dictionary.
+
+    """
+    def __init__(self, uri='localhost', max_workers=10, api=None, **kwargs):
+        """Initiate new AsyncAsteriskRestAPI instance.
+
+        Takes REST API URI and the number of worker threads. Other keyword
+        arguments are passed to AsteriskRestAPI. Pass api to share the
+        connection pool of an existing AsteriskRestAPI instead; its Stasis
+        events then carry instances of the Async classes.
+
+        """
+        self._api = api or AsteriskRestAPI(uri=uri, **kwargs)
+        self._workers = ThreadPool(max_workers)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.objects = IdentityMap()
+        self._api.add_event_listener(self._load_event_objects, first=True)
+
+    def call(self, path, http_method='GET', parameters=None,
+             object_id=None):
+        """Start an Asterisk API call and return a pending result.
+
+        The pending result resolves to the dict described in
+        AsteriskRestAPI.call, or raises its exception from get().
+
+        Identical GET calls started while one is pending get that same
+        pending result, without using another worker.
+
+        """
+        if http_method != 'GET':
+            return self.submit(self._api.call, path,
+                               http_method=http_method,
+                               parameters=parameters, object_id=object_id)
+
+        key = make_call_key(path, parameters, object_id)
+        with self._lock:
+            pending = self._in_flight.get(key)
+            if pending is None:
+                pending = self._in_flight[key] = self.submit(
+                    self._call_in_flight, key, path, parameters, object_id)
+                return pending
+
+        self._api.metrics.increment('coalesced_total',
+                                    (('operation', path), ('method', 'GET')))
+        return pending
+
+    def _call_in_flight(self, key, path, parameters, object_id):
+        """Make a GET call and forget it as in flight once done."""
+        try:
+            return self._api.call(path, http_method='GET',
+                                  parameters=parameters, object_id=object_id)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def invoke(self, response_class, path, http_method='GET',
+               parameters=None, object_id=None):
+        """Start an Asterisk API call and return a pending result, which
+        resolves to the decoded response described in
+        AsteriskRestAPI.invoke, with instances of the Async classes.
+
+        """
+        return self.submit(self._invoke, response_class, path, http_method,
+                           parameters, object_id)
+
+    def _invoke(self, response_class, path, http_method, parameters,
+                object_id):
+        """Make a call and decode its response, on a worker thread."""
+        result = self._api.call(path, http_method=http_method,
+                                parameters=parameters, object_id=object_id)
+        return decode_result(self, self.objects, response_class, result,
+                             class_prefix='Async')
+
+    def call_many(self, calls, max_concurrency=10):
+        """Start a batch of calls and return a pending BatchResult.
+        See AsteriskRestAPI.call_many.
+
+        """
+        return self.submit(self._api.call_many, calls,
+                           max_concurrency=max_concurrency)
+
+    def submit(self, func, *args, **kwargs):
+        """Run func(*args, **kwargs) on a worker thread and return a
+        pending result.
+
+        """
+        return self._workers.apply_async(func, args, kwargs)
+
+    def get_pool_stats(self):
+        """Return the connection pool statistics of the shared session."""
+        return self._api.get_pool_stats()
+
+    def get_metrics(self):
+        """Return the call metrics summary of the shared client."""
+        return self._api.get_metrics()
+
+    def export_metrics(self):
+        """Return the shared client's metrics in Prometheus text format."""
+        return self._api.export_metrics()
+
+    def close(self):
+        """Wait for pending calls to finish and close the connections."""
+        self._workers.close()
+        self._workers.join()
+        self._api.close()
+
+    def add_event_handler(self, event_name, handler, object_id=None,
+                          **batch_options):
+        """Add a general event handler for Stasis events.
+        For object-specific events, use the object's add_event_handler instead.
+        See AsteriskRestAPI.add_event_handler for batch_options.
+        """
+        return self._api.add_event_handler(event_name, handler, object_id,
+                                           **batch_options)
+
+    def _load_event_objects(self, event):
+        """Put the live Async instances of its objects in an event; see
+        AsteriskRestAPI._load_event_objects.
+
+        """
+        self.objects.load_event(self, event, class_prefix='Async')
+
+    def remove_event_handler(self, event_name, handler, object_id=None):
+        """Remove a general event handler for Stasis events.
+        For object-specific events, use the object's add_event_handler instead.
+        """
+        return self._api.remove_event_handler(event_name, handler, object_id)
@@ -0,0 +1,162 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+from asteriskpy import AsteriskPy
+from async_asterisk_rest_api import AsyncAsteriskRestAPI
+from async_asterisk import AsyncAsterisk
+from async_channel import AsyncChannel
+from async_bridge import AsyncBridge
+from model_list import ModelList
+from errors import AsteriskPyNotFoundException
+
+
+class AsyncAsteriskPy:
+    """
+    Non-blocking Python library for the Asterisk REST API.
+
+    Every method returns at once with a pending result
+    (multiprocessing.pool.AsyncResult). Call get(timeout) on it to wait
+    for the value the matching AsteriskPy method would have returned,
+    with instances of the Async classes (AsyncChannel, ...), whose
+    methods return pending results too.
+    """
+    def __init__(self, api_url='http://localhost:8088/stasis', max_workers=10,
+                 **kwargs):
+        """Initiate new AsyncAsteriskPy instance.
+
+        Takes optional string api_url which points to the REST API base URL
+        and the number of worker threads used to run calls. Other keyword
+        arguments are passed on to AsteriskRestAPI.
+
+        """
+        self._sync = AsteriskPy(api_url=api_url, **kwargs)
+        self._api = AsyncAsteriskRestAPI(max_workers=max_workers,
+                                         api=self._sync._api)
+        self._asterisk = AsyncAsterisk(self._api)
+        self._mirror = kwargs.get('state_mirror')
+
+    def close(self):
+        """Wait for pending calls to finish and close the connections."""
+        self._api.close()
+
+    def get_info(self):
+        """Return pending dict of Asterisk system information"""
+        return self._asterisk.get_info()
+
+    def get_endpoints(self):
+        """Return pending ModelList of all AsyncEndpoints from Asterisk."""
+        return self._api.invoke('Endpoints', '/endpoints')
+
+    def get_channels(self, refresh=False):
+        """Return pending ModelList of all AsyncChannels from Asterisk.
+        With a state mirror, refresh forces it to fetch them again.
+
+        """
+        if self._mirror is not None:
+            return self._api.submit(self._list_mirrored, AsyncChannel,
+                                    self._mirror.get_channels, refresh)
+        return self._api.invoke('Channels', '/channels')
+
+    def get_bridges(self, refresh=False):
+        """Return pending ModelList of all AsyncBridges from Asterisk.
+        With a state mirror, refresh forces it to fetch them again.
+
+        """
+        if self._mirror is not None:
+            return self._api.submit(self._list_mirrored, AsyncBridge,
+                                    self._mirror.get_bridges, refresh)
+        return self._api.invoke('Bridges', '/bridges')
+
+    def get_recordings(self):
+        """Return pending ModelList of all AsyncRecordings from Asterisk."""
+        return self._api.invoke('Recordings', '/recordings')
+
+    def get_endpoint(self, object_id):
+        """Return pending AsyncEndpoint specified by object_id."""
+        return self._api.invoke('Endpoint', '/endpoints',
+                                object_id=object_id)
+
+    def get_channel(self, object_id, refresh=False):
+        """Return pending AsyncChannel specified by object_id.
+        With a state mirror, refresh forces it to fetch channels again.
+
+        """
+        if self._mirror is not None:
+            return self._api.submit(self._get_mirrored, AsyncChannel,
+                                    self._mirror.get_channel, object_id,
+                                    refresh)
+        return self._api.invoke('Channel', '/channels', object_id=object_id)
+
+    def get_bridge(self, object_id, refresh=False):
+        """Return pending AsyncBridge specified by object_id.
+        With a state mirror, refresh forces it to fetch bridges again.
+
+        """
+        if self._mirror is not None:
+            return self._api.submit(self._get_mirrored, AsyncBridge,
+                                    self._mirror.get_bridge, object_id,
+                                    refresh)
+        return self._api.invoke('Bridge', '/bridges', object_id=object_id)
+
+    def get_recording(self, object_id):
+        """Return pending AsyncRecording specified by object_id."""
+        return self._api.invoke('Recording', '/recordings',
+                                object_id=object_id)
+
+    def create_channel(self, params):
+        """In Asterisk, originate a channel. Return pending AsyncChannel."""
+        return self._api.invoke('Channel', '/channels', http_method='POST',
+                                parameters=params)
+
+    def create_bridge(self, params):
+        """In Asterisk, bridge two or more channels. Return pending
+        AsyncBridge.
+
+        """
+        return self._api.invoke('Bridge', '/bridges', http_method='POST',
+                                parameters=params)
+
+    def _list_mirrored(self, model_class, get_objects, refresh):
+        """Return a ModelList of the objects read from the state mirror
+        with get_objects, on a worker thread.
+
+        """
+        return ModelList([self._api.objects.load(model_class, self._api,
+                                                 data)
+                          for data in get_objects(refresh=refresh)])
+
+    def _get_mirrored(self, model_class, get_object, object_id, refresh):
+        """Return the instance for an object of the state mirror, raising
+        AsteriskPyNotFoundException if the mirror does not have it.
+
+        """
+        data = get_object(object_id, refresh=refresh)
+        if data is None:
+            raise AsteriskPyNotFoundException(
+                "%s %s not found" % (model_class.__name__, object_id), 404)
+        return self._api.objects.load(model_class, self._api, data)
+
+    def add_event_handler(self, event_name, handler, **batch_options):
+        """Add a general event handler for Stasis events.
+        For object-specific events, use the object's add_event_handler instead.
+        """
+        return self._sync.add_event_handler(event_name, handler,
+                                            **batch_options)
+
+    def remove_event_handler(self, event_name, handler):
+        """Remove a general event handler for Stasis events.
+        For object-specific events, use the object's add_event_handler instead.
+        """
+        return self._sync.remove_event_handler(event_name, handler)
@@ -0,0 +1,97 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+
+
+from model import Model
+
+
+class AsyncRecording(Model):
+    """Definition of AsyncRecording object."""
+    __slots__ = ()
+
+    def __init__(self, api, data=None):
+        """Initialize the AsyncRecording object from the decoded JSON data
+        Asterisk returned for it, if any.
+        """
+        Model.__init__(self, api, data)
+
+    def get_id(self):
+        """Return the AsyncRecording object's id."""
+        return self.object_id
+
+    def add_event_handler(self, event_name, handler, **batch_options):
+        """Add an event handler for Stasis events on this object.
+        For general events, use Asterisk.add_event_handler instead.
+        batch_options (batch_size, batch_latency, coalesce) have handler
+        called with batches of events.
+        """
+        self._api.add_event_handler(event_name, handler,
+                                    object_id=self.object_id,
+                                    **batch_options)
+
+    def remove_event_handler(self, event_name, handler):
+        """Remove an event handler for Stasis events on this object.
+        For general events, use Asterisk.remove_event_handler instead.
+        """
+        return self._api.remove_event_handler(event_name, handler,
+                                              object_id=self.object_id)
+
+    def delete(self):
+        """Individual recording; Delete recording"""
+        params = {}
+
+        return self._api.invoke('void', '/recordings/%s', http_method='DELETE',
+                                parameters=params, object_id=self.object_id)
+
+    def stop(self):
+        """Stop recording"""
+        params = {}
+
+        return self._api.invoke('void', '/recordings/%s/stop',
+                                http_method='POST', parameters=params,
+                                object_id=self.object_id)
+
+    def pause(self):
+        """Pause recording"""
+        params = {}
+
+        return self._api.invoke('void', '/recordings/%s/pause',
+                                http_method='POST', parameters=params,
+                                object_id=self.object_id)
+
+    def unpause(self):
+        """Unpause recording"""
+        params = {}
+
+        return self._api.invoke('void', '/recordings/%s/unpause',
+                                http_method='POST', parameters=params,
+                                object_id=self.object_id)
+
+    def mute(self):
+        """Mute recording"""
+        params = {}
+
+        return self._api.invoke('void', '/recordings/%s/mute',
+                                http_method='POST', parameters=params,
+                                object_id=self.object_id)
+
+    def unmute(self):
+        """Unmute recording"""
+        params = {}
+
+        return self._api.invoke('void', '/recordings/%s/unmute',
+                                http_method='POST', parameters=params,
+                                object_id=self.object_id)
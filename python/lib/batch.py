@@ -0,0 +1,81 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+import time
+from multiprocessing.pool import ThreadPool
+from errors import AsteriskPyAccessException
+
+
+class BatchResult(list):
+    """Result dicts of AsteriskRestAPI.call_many, or ModelList.call_all,
+    in the order of the calls.
+
+    Also carries the timing of the batch: elapsed is the wall clock time
+    of the whole batch and call_times the time taken by each call, both in
+    seconds.
+
+    """
+    def __init__(self, results, call_times, elapsed, max_concurrency):
+        """Initiate new BatchResult instance."""
+        list.__init__(self, results)
+        self.call_times = call_times
+        self.elapsed = elapsed
+        self.max_concurrency = max_concurrency
+
+    def get_failures(self):
+        """Return a list of (index, result) for the calls that failed."""
+        return [(i, r) for i, r in enumerate(self) if not r['success']]
+
+    def get_timing(self):
+        """Return a dict summarizing the timing of the batch."""
+        count = len(self.call_times)
+        return {
+            'calls': count,
+            'failures': len(self.get_failures()),
+            'max_concurrency': self.max_concurrency,
+            'elapsed': self.elapsed,
+            'mean_call_time': sum(self.call_times) / count if count else 0.0,
+            'max_call_time': max(self.call_times) if count else 0.0,
+            'calls_per_second': count / self.elapsed if self.elapsed else 0.0,
+        }
+
+
+def run_batch(call, calls, max_concurrency):
+    """Run call(**kwargs) for each dict in calls on at most max_concurrency
+    threads and return a BatchResult. Used by AsteriskRestAPI.call_many,
+    ClusterRestAPI.call_many and ModelList.call_all.
+
+    """
+    def timed_call(call_kwargs):
+        """Run one call of a batch; return (result, seconds taken)."""
+        call_start = time.time()
+        try:
+            result = call(**call_kwargs)
+        except AsteriskPyAccessException, err:
+            result = {'success': False, 'response': None, 'error': str(err),
+                      'status': None}
+        return (result, time.time() - call_start)
+
+    start = time.time()
+    workers = ThreadPool(max(1, min(max_concurrency, len(calls))))
+    try:
+        timed_results = workers.map(timed_call, calls)
+    finally:
+        workers.close()
+        workers.join()
+
+    return BatchResult([r for r, _ in timed_results],
+                       [t for _, t in timed_results],
+                       time.time() - start, max_concurrency)
@@ -15,45 +15,53 @@
 """
 
 
-class Bridge:
+from model import Model
+
+
+class Bridge(Model):
     """Definition of Bridge object."""
-    def __init__(self, api):
-        """Initialize the Bridge object."""
-        self.object_id = 1
-        self._api = api
+    __slots__ = ()
+
+    def __init__(self, api, data=None):
+        """Initialize the Bridge object from the decoded JSON data
+        Asterisk returned for it, if any.
+        """
+        Model.__init__(self, api, data)
 
     def get_id(self):
         """Return the Bridge object's id."""
         return self.object_id
 
-    def add_event_handler(self, event_name, handler):
+    def add_event_handler(self, event_name, handler, **batch_options):
         """Add an event handler for Stasis events on this object.
         For general events, use Asterisk.add_event_handler instead.
+        batch_options (batch_size, batch_latency, coalesce) have handler
+        called with batches of events.
         """
-        pass
+        self._api.add_event_handler(event_name, handler,
+                                    object_id=self.object_id,
+                                    **batch_options)
 
     def remove_event_handler(self, event_name, handler):
         """Remove an event handler for Stasis events on this object.
         For general events, use Asterisk.remove_event_handler instead.
         """
-        pass
+        return self._api.remove_event_handler(event_name, handler,
+                                              object_id=self.object_id)
 
     def new(self):
         """Active bridges; Create a new bridge"""
         params = {}
 
-        self._api.call('/bridges', http_method='POST', parameters=params)
-        is_success = True
-        return is_success
+        return self._api.invoke('Bridge', '/bridges', http_method='POST',
+                                parameters=params)
 
     def delete(self):
         """Individual bridge; Delete bridge"""
         params = {}
 
-        self._api.call('/bridges/%s', http_method='DELETE', parameters=params,
-                       object_id=self.object_id)
-        is_success = True
-        return is_success
+        return self._api.invoke('void', '/bridges/%s', http_method='DELETE',
+                                parameters=params, object_id=self.object_id)
 
     def add_channel_to(self, channel_string_list=None):
         """Add a channel to a bridge"""
@@ -61,10 +69,9 @@ class Bridge:
         if channel_string_list:
             params['channel'] = channel_string_list
 
-        self._api.call('/bridges/%s/addChannel', http_method='POST',
-                       parameters=params, object_id=self.object_id)
-        is_success = True
-        return is_success
+        return self._api.invoke('void', '/bridges/%s/addChannel',
+                                http_method='POST', parameters=params,
+                                object_id=self.object_id)
 
     def remove_channel_from(self, channel_string_list=None):
         """Remove a channel from a bridge"""
@@ -72,10 +79,9 @@ class Bridge:
         if channel_string_list:
             params['channel'] = channel_string_list
 
-        self._api.call('/bridges/%s/removeChannel', http_method='POST',
-                       parameters=params, object_id=self.object_id)
-        is_success = True
-        return is_success
+        return self._api.invoke('void', '/bridges/%s/removeChannel',
+                                http_method='POST', parameters=params,
+                                object_id=self.object_id)
 
     def record(self, name_string=None, max_duration_seconds_int='0',
                max_silence_seconds_int='0', append_boolean='False',
@@ -95,7 +101,6 @@ class Bridge:
         if terminate_on_string:
             params['terminateOn'] = terminate_on_string
 
-        self._api.call('/bridges/%s/record', http_method='POST',
-                       parameters=params, object_id=self.object_id)
-        is_success = True
-        return is_success
+        return self._api.invoke('void', '/bridges/%s/record',
+                                http_method='POST', parameters=params,
+                                object_id=self.object_id)
@@ -15,28 +15,39 @@
 """
 
 
-class Channel:
+from model import Model
+
+
+class Channel(Model):
     """Definition of Channel object."""
-    def __init__(self, api):
-        """Initialize the Channel object."""
-        self.object_id = 1
-        self._api = api
+    __slots__ = ()
+
+    def __init__(self, api, data=None):
+        """Initialize the Channel object from the decoded JSON data
+        Asterisk returned for it, if any.
+        """
+        Model.__init__(self, api, data)
 
     def get_id(self):
         """Return the Channel object's id."""
         return self.object_id
 
-    def add_event_handler(self, event_name, handler):
+    def add_event_handler(self, event_name, handler, **batch_options):
         """Add an event handler for Stasis events on this object.
         For general events, use Asterisk.add_event_handler instead.
+        batch_options (batch_size, batch_latency, coalesce) have handler
+        called with batches of events.
         """
-        pass
+        self._api.add_event_handler(event_name, handler,
+                                    object_id=self.object_id,
+                                    **batch_options)
 
     def remove_event_handler(self, event_name, handler):
         """Remove an event handler for Stasis events on this object.
         For general events, use Asterisk.remove_event_handler instead.
         """
-        pass
+        return self._api.remove_event_handler(event_name, handler,
+                                              object_id=self.object_id)
 
     def originate(self, endpoint_string=None, extension_string=None,
                   context_string=None):
@@ -49,18 +60,15 @@ class Channel:
         if context_string:
             params['context'] = context_string
 
-        self._api.call('/channels', http_method='POST', parameters=params)
-        is_success = True
-        return is_success
+        return self._api.invoke('Originated', '/channels', http_method='POST',
+                                parameters=params)
 
     def delete(self):
         """Active channel; Delete (i.e. hangup) a channel"""
         params = {}
 
-        self._api.call('/channels/%s', http_method='DELETE', parameters=params,
-                       object_id=self.object_id)
-        is_success = True
-        return is_success
+        return self._api.invoke('void', '/channels/%s', http_method='DELETE',
+                                parameters=params, object_id=self.object_id)
 
     def dial(self, endpoint_string=None, extension_string=None,
              context_string=None):
@@ -73,37 +81,33 @@ class Channel:
         if context_string:
             params['context'] = context_string
 
-        self._api.call('/channels/%s/dial', http_method='POST',
-                       parameters=params, object_id=self.object_id)
-        is_success = True
-        return is_success
+        return self._api.invoke('Dialed', '/channels/%s/dial',
+                                http_method='POST', parameters=params,
+                                object_id=self.object_id)
 
     def continue_in_dialplan(self):
         """Exit application; continue execution in the dialplan"""
         params = {}
 
-        self._api.call('/channels/%s/continue', http_method='POST',
-                       parameters=params, object_id=self.object_id)
-        is_success = True
-        return is_success
+        return self._api.invoke('void', '/channels/%s/continue',
+                                http_method='POST', parameters=params,
+                                object_id=self.object_id)
 
     def reject(self):
         """Reject a channel"""
         params = {}
 
-        self._api.call('/channels/%s/reject', http_method='POST',
-                       parameters=params, object_id=self.object_id)
-        is_success = True
-        return is_success
+        return self._api.invoke('void', '/channels/%s/reject',
+                                http_method='POST', parameters=params,
+                                object_id=self.object_id)
 
     def answer(self):
         """Answer a channel"""
         params = {}
 
-        self._api.call('/channels/%s/answer', http_method='POST',
-                       parameters=params, object_id=self.object_id)
-        is_success = True
-        return is_success
+        return self._api.invoke('void', '/channels/%s/answer',
+                                http_method='POST', parameters=params,
+                                object_id=self.object_id)
 
     def mute(self, direction_string='both'):
         """Mute a channel"""
@@ -111,10 +115,9 @@ class Channel:
         if direction_string:
             params['direction'] = direction_string
 
-        self._api.call('/channels/%s/mute', http_method='POST',
-                       parameters=params, object_id=self.object_id)
-        is_success = True
-        return is_success
+        return self._api.invoke('void', '/channels/%s/mute',
+                                http_method='POST', parameters=params,
+                                object_id=self.object_id)
 
     def unmute(self, direction_string='both'):
         """Unmute a channel"""
@@ -122,10 +125,9 @@ class Channel:
         if direction_string:
             params['direction'] = direction_string
 
-        self._api.call('/channels/%s/unmute', http_method='POST',
-                       parameters=params, object_id=self.object_id)
-        is_success = True
-        return is_success
+        return self._api.invoke('void', '/channels/%s/unmute',
+                                http_method='POST', parameters=params,
+                                object_id=self.object_id)
 
     def record(self, name_string=None, max_duration_seconds_int='0',
                max_silence_seconds_int='0', append_boolean='False',
@@ -145,7 +147,6 @@ class Channel:
         if terminate_on_string:
             params['terminateOn'] = terminate_on_string
 
-        self._api.call('/channels/%s/record', http_method='POST',
-                       parameters=params, object_id=self.object_id)
-        is_success = True
-        return is_success
+        return self._api.invoke('void', '/channels/%s/record',
+                                http_method='POST', parameters=params,
+                                object_id=self.object_id)
@@ -0,0 +1,101 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+import time
+import threading
+from errors import AsteriskPyCircuitOpenException
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Fail fast while an Asterisk host keeps failing.
+
+    After failure_threshold consecutive failures the breaker opens and
+    every call is refused for recovery_timeout seconds. It then lets up
+    to half_open_probes calls through: one success closes the breaker,
+    one failure opens it again.
+
+    """
+    def __init__(self, failure_threshold=5, recovery_timeout=10,
+                 half_open_probes=1, clock=time.time):
+        """Initiate new CircuitBreaker instance.
+        clock returns the current time in seconds; tests may pass a fake.
+
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_probes = half_open_probes
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def copy(self):
+        """Return a new, closed CircuitBreaker with the same settings."""
+        return CircuitBreaker(self.failure_threshold, self.recovery_timeout,
+                              self.half_open_probes, self.clock)
+
+    def before_call(self):
+        """Throw AsteriskPyCircuitOpenException if the call must not be
+        made now. Every call allowed through must be followed by
+        record_success or record_failure.
+
+        """
+        with self._lock:
+            if self.state == OPEN:
+                if self.clock() - self.opened_at < self.recovery_timeout:
+                    raise AsteriskPyCircuitOpenException(
+                        "Circuit open; Asterisk failed %s times in a row"
+                        % (self.failures))
+                self.state = HALF_OPEN
+                self._probes = 0
+
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    raise AsteriskPyCircuitOpenException(
+                        "Circuit half-open; waiting for probe result")
+                self._probes += 1
+
+    def record_success(self):
+        """Record a successful call."""
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probes = 0
+
+    def record_failure(self):
+        """Record a failed call."""
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN \
+                    or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = self.clock()
+                self._probes = 0
+
+    def get_state(self):
+        """Return a dict describing the breaker."""
+        with self._lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'opened_at': self.opened_at,
+            }
@@ -0,0 +1,411 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+import re
+import threading
+from collections import OrderedDict
+from asterisk_rest_api import AsteriskRestAPI
+from batch import run_batch
+from errors import AsteriskPyAccessException
+from metrics import Metrics
+from event_dispatcher import EventDispatcher, DESTROY_EVENTS, \
+    get_event_object_ids
+from identity_map import IdentityMap
+from responses import decode_result
+from response_cache import get_resource
+
+
+LEAST_IN_FLIGHT = 'least_in_flight'
+WEIGHTED_ROUND_ROBIN = 'weighted_round_robin'
+
+RESOURCE_PATH_RE = re.compile('^(/?(?:api/)?\\w+)/?$')
+OBJECT_PATH_RE = re.compile('^/?(?:api/)?\\w+(/%s)?/?$')
+OBJECT_BASE_RE = re.compile('^(/?(?:api/)?\\w+)')
+
+# Key of the object id in the JSON of each resource's objects; others
+# use 'id'.
+RESOURCE_ID_KEYS = {
+    'recordings': 'name',
+    'endpoints': 'resource',
+}
+
+
+class ClusterNode:
+    """One Asterisk server of a cluster."""
+    def __init__(self, uri, weight, api):
+        """Initiate new ClusterNode instance."""
+        self.uri = uri
+        self.weight = weight
+        self.api = api
+        self.in_flight = 0
+        self.current_weight = 0
+
+    def is_healthy(self):
+        """Return True if the node is reachable and its circuit closed."""
+        return self.api.get_circuit_state()['state'] != 'open' \
+            and self.api.check_health()
+
+
+class ClusterRestAPI:
+    """Spread Asterisk API calls over several Asterisk servers.
+
+    Takes a list of base URIs, or of (uri, weight) tuples. Calls which
+    create objects go to a healthy node chosen by strategy:
+    LEAST_IN_FLIGHT picks the node with the fewest calls in progress,
+    WEIGHTED_ROUND_ROBIN shares calls out in proportion to weight.
+
+    Calls on an object (with object_id) always go to the node owning the
+    object. Owners are learned from the ids in responses; an unknown id
+    is looked up on every healthy node, with the call itself if it is a
+    GET of the object. At most max_owners owners are remembered, the least
+    recently used are forgotten first. Listings (e.g. GET /channels) are
+    fetched from every healthy node and concatenated.
+
+    Has the same call interface as AsteriskRestAPI, so it can be used by
+    AsteriskPy and the generated classes.
+
+    """
+    def __init__(self, uris, strategy=LEAST_IN_FLIGHT, health_interval=None,
+                 max_owners=10000, **kwargs):
+        """Initiate new ClusterRestAPI instance.
+
+        Other keyword arguments are passed to the AsteriskRestAPI of each
+        node; all nodes share one Metrics instance and deliver their
+        Stasis events through one EventDispatcher. A circuit_breaker or
+        response_cache given is copied for each node, so that each node
+        has its own breaker state and cached results. If health_interval
+        is given, every node is probed that often on a background thread.
+
+        """
+        if strategy not in (LEAST_IN_FLIGHT, WEIGHTED_ROUND_ROBIN):
+            raise ValueError("Unknown strategy %s" % (strategy))
+        self.strategy = strategy
+        self.max_owners = max_owners
+        self.metrics = kwargs.pop('metrics', None) or Metrics()
+        self._events = kwargs.pop('event_dispatcher', None) \
+            or EventDispatcher()
+        circuit_breaker = kwargs.pop('circuit_breaker', None)
+        response_cache = kwargs.pop('response_cache', None)
+        # Before the nodes' own, so events carry the cluster's instances.
+        self.objects = IdentityMap()
+        self._events.add_listener(self._load_event_objects)
+        self.nodes = []
+        for each in uris:
+            uri, weight = each if isinstance(each, tuple) else (each, 1)
+            api = AsteriskRestAPI(
+                uri=uri, metrics=self.metrics, event_dispatcher=self._events,
+                circuit_breaker=circuit_breaker and circuit_breaker.copy(),
+                response_cache=response_cache and response_cache.copy(),
+                **kwargs)
+            self.nodes.append(ClusterNode(uri, weight, api))
+
+        # Object id -> (owning node, resource), least recently used first
+        self._owners = OrderedDict()
+        self._lock = threading.Lock()
+        for event_type in DESTROY_EVENTS:
+            self._events.add_handler(event_type, self._forget_event_objects)
+        self._stopped = threading.Event()
+        if health_interval:
+            checker = threading.Thread(target=self._check_health_loop,
+                                       args=(health_interval,))
+            checker.daemon = True
+            checker.start()
+
+    def call(self, path, http_method='GET', parameters=None,
+             object_id=None, timeout=None, use_cache=True):
+        """Call an Asterisk API method on the right node, return result
+        dictionary as described in AsteriskRestAPI.call.
+
+        Throws AsteriskPyAccessException if no node can take the call.
+
+        """
+        kwargs = {'http_method': http_method, 'parameters': parameters,
+                  'object_id': object_id, 'timeout': timeout,
+                  'use_cache': use_cache}
+        if object_id is not None:
+            node, result = self._get_owner(path, object_id, kwargs)
+            if result is None:
+                result = self._call_node(node, path, kwargs)
+            if http_method == 'DELETE' and result['success'] \
+                    and OBJECT_PATH_RE.match(path):
+                with self._lock:
+                    self._owners.pop(object_id, None)
+            return result
+
+        if http_method == 'GET' and RESOURCE_PATH_RE.match(path):
+            return self._call_all(path, kwargs)
+
+        return self._call_node(self._choose_node(), path, kwargs)
+
+    def call_many(self, calls, max_concurrency=10):
+        """Make several calls in parallel and return a BatchResult.
+        See AsteriskRestAPI.call_many.
+
+        """
+        return run_batch(self.call, calls, max_concurrency)
+
+    def invoke(self, response_class, path, http_method='GET',
+               parameters=None, object_id=None, timeout=None):
+        """Make a call on the right node and return its decoded response.
+        See AsteriskRestAPI.invoke; objects from every node share the
+        cluster's identity map.
+
+        """
+        result = self.call(path, http_method=http_method,
+                           parameters=parameters, object_id=object_id,
+                           timeout=timeout)
+        return decode_result(self, self.objects, response_class, result)
+
+    def get_owner_uri(self, object_id):
+        """Return the base URI of the node known to own object_id, or
+        None.
+
+        """
+        owner = self._owners.get(object_id)
+        return owner[0].uri if owner else None
+
+    def _call_node(self, node, path, kwargs):
+        """Make a call on one node and learn owners from its response."""
+        with self._lock:
+            node.in_flight += 1
+        try:
+            result = node.api.call(path, **kwargs)
+        finally:
+            with self._lock:
+                node.in_flight -= 1
+        if result['success']:
+            self._learn_owners(node, path, result['response'])
+        return result
+
+    def _call_all(self, path, kwargs):
+        """Make a listing call on every healthy node and merge the lists."""
+        nodes = self._get_healthy_nodes()
+        if not nodes:
+            raise AsteriskPyAccessException("No healthy Asterisk node")
+
+        merged = {'success': True, 'response': [], 'error': None,
+                  'status': None}
+        for node in nodes:
+            result = self._call_node(node, path, kwargs)
+            if not result['success']:
+                return result
+            if not isinstance(result['response'], list):
+                # Not a listing after all; one node's answer will do.
+                return result
+            merged['response'].extend(result['response'])
+            merged['status'] = result['status']
+        self._forget_unlisted(path, merged['response'])
+        return merged
+
+    def _learn_owners(self, node, path, response):
+        """Remember node as the owner of every object in response, the
+        response to a call on path.
+
+        """
+        resource = get_resource(path)
+        id_key = RESOURCE_ID_KEYS.get(resource, 'id')
+        items = response if isinstance(response, list) else [response]
+        with self._lock:
+            for item in items:
+                if isinstance(item, dict) and id_key in item:
+                    self._set_owner(item[id_key], node, resource)
+
+    def _set_owner(self, object_id, node, resource):
+        """Remember node as the owner of an object, as the most recently
+        used, and forget the least recently used beyond max_owners; the
+        lock must be held.
+
+        """
+        self._owners.pop(object_id, None)
+        self._owners[object_id] = (node, resource)
+        while len(self._owners) > self.max_owners:
+            self._owners.popitem(last=False)
+
+    def _forget_unlisted(self, path, listing):
+        """Forget the owners of the objects of a resource which are not
+        in a complete listing of it.
+
+        """
+        resource = get_resource(path)
+        id_key = RESOURCE_ID_KEYS.get(resource, 'id')
+        listed = set([item.get(id_key) for item in listing
+                      if isinstance(item, dict)])
+        with self._lock:
+            for object_id, owner in self._owners.items():
+                if owner[1] == resource and object_id not in listed:
+                    del self._owners[object_id]
+
+    def _forget_event_objects(self, event):
+        """Forget the owners of the objects a destroy event is about."""
+        with self._lock:
+            for object_id in get_event_object_ids(event):
+                self._owners.pop(object_id, None)
+
+    def _get_owner(self, path, object_id, kwargs):
+        """Return the node owning object_id, looking it up if unknown, and
+        the result of the call on path with kwargs if the lookup was that
+        call, a GET of the object itself; else None.
+
+        """
+        with self._lock:
+            owner = self._owners.pop(object_id, None)
+            if owner is not None:
+                self._owners[object_id] = owner
+                return (owner[0], None)
+
+        is_lookup = kwargs['http_method'] == 'GET' \
+            and not kwargs['parameters'] and OBJECT_PATH_RE.match(path)
+        lookup_path = OBJECT_BASE_RE.match(path).group(1) + '/%s'
+        for node in self._get_healthy_nodes():
+            if is_lookup:
+                result = self._call_node(node, path, kwargs)
+            else:
+                result = node.api.call(lookup_path, object_id=object_id,
+                                       timeout=kwargs['timeout'])
+            if result['success']:
+                with self._lock:
+                    self._set_owner(object_id, node, get_resource(path))
+                return (node, result if is_lookup else None)
+        raise AsteriskPyAccessException(
+            "No Asterisk node owns object %s" % (object_id))
+
+    def _get_healthy_nodes(self):
+        """Return the nodes currently considered healthy."""
+        return [node for node in self.nodes if node.is_healthy()]
+
+    def _choose_node(self):
+        """Choose the node for a call which is not tied to an object."""
+        nodes = self._get_healthy_nodes()
+        if not nodes:
+            raise AsteriskPyAccessException("No healthy Asterisk node")
+
+        with self._lock:
+            if self.strategy == LEAST_IN_FLIGHT:
+                return min(nodes, key=lambda node: node.in_flight)
+
+            # Smooth weighted round robin: each node gains its weight,
+            # the richest is chosen and pays back the total.
+            total = 0
+            for node in nodes:
+                node.current_weight += node.weight
+                total += node.weight
+            chosen = max(nodes, key=lambda node: node.current_weight)
+            chosen.current_weight -= total
+            return chosen
+
+    def _check_health_loop(self, interval):
+        """Probe every node each interval seconds until closed."""
+        while not self._stopped.wait(interval):
+            for node in self.nodes:
+                node.api.check_health(force=True)
+
+    def check_health(self, force=False):
+        """Return True if at least one node is reachable."""
+        return any([node.api.check_health(force=force)
+                    for node in self.nodes])
+
+    def wait_until_ready(self, timeout=10):
+        """Block until at least one node is reachable or raise
+        AsteriskPyAccessException.
+
+        """
+        errors = []
+        for node in self.nodes:
+            try:
+                node.api.wait_until_ready(
+                    timeout=float(timeout) / len(self.nodes))
+                return
+            except AsteriskPyAccessException, err:
+                errors.append(str(err))
+        raise AsteriskPyAccessException('; '.join(errors))
+
+    def get_nodes(self):
+        """Return a list of dicts describing each node."""
+        return [{'uri': node.uri, 'weight': node.weight,
+                 'in_flight': node.in_flight, 'healthy': node.is_healthy()}
+                for node in self.nodes]
+
+    def get_metrics(self):
+        """Return the call metrics summary shared by all nodes."""
+        return self.metrics.get_summary()
+
+    def export_metrics(self):
+        """Return the shared call metrics in Prometheus text format."""
+        return self.metrics.to_prometheus()
+
+    def close(self):
+        """Stop health checks and close every node's connections."""
+        self._stopped.set()
+        for node in self.nodes:
+            node.api.close()
+
+    def add_event_handler(self, event_name, handler, object_id=None,
+                          **batch_options):
+        """Add a general event handler for Stasis events from any node.
+        For object-specific events, use the object's add_event_handler instead.
+        See AsteriskRestAPI.add_event_handler for batch_options.
+        """
+        self._events.add_handler(event_name, handler, object_id,
+                                 **batch_options)
+        if self.get_app() is not None:
+            self.start_events()
+
+    def remove_event_handler(self, event_name, handler, object_id=None):
+        """Remove a general event handler for Stasis events.
+        For object-specific events, use the object's add_event_handler instead.
+        """
+        return self._events.remove_handler(event_name, handler, object_id)
+
+    def add_event_listener(self, listener, first=False):
+        """Call listener(event) for every Stasis event from any node; see
+        AsteriskRestAPI.add_event_listener.
+        """
+        self._events.add_listener(listener, first)
+
+    def remove_event_listener(self, listener):
+        """Remove an event listener; return False if it was not added."""
+        return self._events.remove_listener(listener)
+
+    def _load_event_objects(self, event):
+        """Put the cluster's live instances in an event; see
+        AsteriskRestAPI._load_event_objects.
+
+        """
+        self.objects.load_event(self, event)
+
+    def get_app(self):
+        """Return the name of the Stasis application, or None."""
+        return self.nodes[0].api.get_app() if self.nodes else None
+
+    def start_events(self):
+        """Connect every node to its Stasis event WebSocket, if not yet
+        connected.
+
+        """
+        for node in self.nodes:
+            node.api.start_events()
+
+    def dispatch_event(self, event):
+        """Deliver an event to the event handlers of every node."""
+        return self._events.dispatch(event)
+
+    def get_event_stream_state(self):
+        """Return a (connected, reconnects) tuple for the event streams of
+        all nodes: connected if all are, and their total reconnects.
+
+        """
+        states = [node.api.get_event_stream_state() for node in self.nodes]
+        return (all([connected for connected, reconnects in states]),
+                sum([reconnects for connected, reconnects in states]))
@@ -0,0 +1,139 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+import time
+import threading
+from functools import partial
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.connectionpool import HTTPConnectionPool, \
+    HTTPSConnectionPool
+
+
+class PoolStats:
+    """Thread-safe counters describing connection pool usage."""
+    def __init__(self):
+        """Initiate new PoolStats instance."""
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.new_connections = 0
+        self.waits = 0
+        self.expired = 0
+
+    def record(self, counter):
+        """Increment the named counter by one."""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self):
+        """Return a dict copy of the current counters."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'new_connections': self.new_connections,
+                'waits': self.waits,
+                'expired': self.expired,
+            }
+
+
+class _TrackedPoolMixin(object):
+    """Keep-alive bookkeeping shared by the HTTP and HTTPS pools.
+
+    Connections remember when they were opened and when they were last
+    returned to the pool. A connection idle for longer than idle_timeout
+    or older than max_age is closed and replaced instead of reused.
+
+    """
+    def __init__(self, *args, **kwargs):
+        self.pool_stats = kwargs.pop('pool_stats')
+        self.idle_timeout = kwargs.pop('idle_timeout')
+        self.max_age = kwargs.pop('max_age')
+        super(_TrackedPoolMixin, self).__init__(*args, **kwargs)
+
+    def _new_conn(self):
+        conn = super(_TrackedPoolMixin, self)._new_conn()
+        conn.pool_created_at = time.time()
+        conn.pool_released_at = None
+        self.pool_stats.record('new_connections')
+        return conn
+
+    def _get_conn(self, timeout=None):
+        if self.block and self.pool is not None and self.pool.empty():
+            self.pool_stats.record('waits')
+
+        conn = super(_TrackedPoolMixin, self)._get_conn(timeout=timeout)
+        released_at = getattr(conn, 'pool_released_at', None)
+        if released_at is None:
+            # Freshly opened by _new_conn; already counted.
+            return conn
+
+        now = time.time()
+        if (self.idle_timeout is not None
+                and now - released_at > self.idle_timeout) \
+                or (self.max_age is not None
+                    and now - conn.pool_created_at > self.max_age):
+            conn.close()
+            self.pool_stats.record('expired')
+            return self._new_conn()
+
+        conn.pool_released_at = None
+        self.pool_stats.record('hits')
+        return conn
+
+    def _put_conn(self, conn):
+        if conn is not None:
+            conn.pool_released_at = time.time()
+        super(_TrackedPoolMixin, self)._put_conn(conn)
+
+
+class _TrackedHTTPConnectionPool(_TrackedPoolMixin, HTTPConnectionPool):
+    """HTTPConnectionPool with idle timeout, max age and statistics."""
+    pass
+
+
+class _TrackedHTTPSConnectionPool(_TrackedPoolMixin, HTTPSConnectionPool):
+    """HTTPSConnectionPool with idle timeout, max age and statistics."""
+    pass
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """requests transport adapter keeping keep-alive connections per host.
+
+    pool_size is the number of connections kept open to each host. When
+    pool_block is True, callers wait for a free connection rather than
+    opening more than pool_size connections; each such wait is counted.
+    idle_timeout and max_age are in seconds; None disables the check.
+
+    """
+    def __init__(self, pool_size=10, idle_timeout=60, max_age=300,
+                 pool_block=True, stats=None):
+        """Initiate new PooledHTTPAdapter instance."""
+        self.idle_timeout = idle_timeout
+        self.max_age = max_age
+        self.stats = stats or PoolStats()
+        HTTPAdapter.__init__(self, pool_maxsize=pool_size,
+                             pool_block=pool_block)
+
+    def init_poolmanager(self, *args, **kwargs):
+        """Create the PoolManager and install the tracking pool classes."""
+        HTTPAdapter.init_poolmanager(self, *args, **kwargs)
+        options = {
+            'pool_stats': self.stats,
+            'idle_timeout': self.idle_timeout,
+            'max_age': self.max_age,
+        }
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': partial(_TrackedHTTPConnectionPool, **options),
+            'https': partial(_TrackedHTTPSConnectionPool, **options),
+        }
@@ -15,25 +15,36 @@
 """
 
 
-class Endpoint:
+from model import Model
+
+
+class Endpoint(Model):
     """Definition of Endpoint object."""
-    def __init__(self, api):
-        """Initialize the Endpoint object."""
-        self.object_id = 1
-        self._api = api
+    __slots__ = ()
+
+    def __init__(self, api, data=None):
+        """Initialize the Endpoint object from the decoded JSON data
+        Asterisk returned for it, if any.
+        """
+        Model.__init__(self, api, data)
 
     def get_id(self):
         """Return the Endpoint object's id."""
         return self.object_id
 
-    def add_event_handler(self, event_name, handler):
+    def add_event_handler(self, event_name, handler, **batch_options):
         """Add an event handler for Stasis events on this object.
         For general events, use Asterisk.add_event_handler instead.
+        batch_options (batch_size, batch_latency, coalesce) have handler
+        called with batches of events.
         """
-        pass
+        self._api.add_event_handler(event_name, handler,
+                                    object_id=self.object_id,
+                                    **batch_options)
 
     def remove_event_handler(self, event_name, handler):
         """Remove an event handler for Stasis events on this object.
         For general events, use Asterisk.remove_event_handler instead.
         """
-        pass
+        return self._api.remove_event_handler(event_name, handler,
+                                              object_id=self.object_id)
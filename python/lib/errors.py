@@ -22,3 +22,56 @@ class AsteriskPyAccessException(Exception):
 
     def __str__(self):
         return self.message
+
+
+class AsteriskPyTimeoutException(AsteriskPyAccessException):
+    """Indicate an Asterisk API call did not finish before its deadline."""
+    pass
+
+
+class AsteriskPyCircuitOpenException(AsteriskPyAccessException):
+    """Indicate a call was refused because Asterisk is considered down."""
+    pass
+
+
+class AsteriskPyRateLimitException(AsteriskPyAccessException):
+    """Indicate a call was refused by the client-side rate limiter.
+    retry_after is the estimated number of seconds until it would be allowed.
+    """
+    def __init__(self, message, retry_after=0.0):
+        AsteriskPyAccessException.__init__(self, message)
+        self.retry_after = retry_after
+
+
+class AsteriskPyCallException(Exception):
+    """Indicate Asterisk answered an API call with an error.
+    status is the HTTP status code, if any.
+    """
+    def __init__(self, message, status=None):
+        self.message = message
+        self.status = status
+
+    def __str__(self):
+        return self.message
+
+
+class AsteriskPyBadRequestException(AsteriskPyCallException):
+    """Indicate Asterisk rejected the parameters of a call (400)."""
+    pass
+
+
+class AsteriskPyNotFoundException(AsteriskPyCallException):
+    """Indicate the object or resource of a call does not exist (404)."""
+    pass
+
+
+class AsteriskPyConflictException(AsteriskPyCallException):
+    """Indicate a call conflicts with the state of its object, e.g. a
+    channel which is not in the bridge (409, 412, 422).
+    """
+    pass
+
+
+class AsteriskPyServerException(AsteriskPyCallException):
+    """Indicate Asterisk failed to process a call (5xx)."""
+    pass
@@ -0,0 +1,150 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+import time
+import heapq
+import threading
+from collections import OrderedDict
+
+
+class EventBatcher:
+    """Event handler collecting events into batches for another handler.
+
+    handler is called with a list of events once max_size events are
+    waiting, or max_latency seconds after the first of them arrived,
+    whichever comes first. Full batches are delivered on the thread adding
+    the last event, late ones by a BatchTimer, so handler may be called
+    from several threads.
+
+    With coalesce_key, a function of an event, a waiting event is replaced
+    by a later one with the same key (e.g. the same type and channel), so
+    only the latest state is delivered. Events with a None key are never
+    replaced.
+
+    """
+    def __init__(self, handler, run_handler, timer, max_size=100,
+                 max_latency=0.05, coalesce_key=None):
+        """Initiate new EventBatcher instance.
+
+        run_handler(handler, events) is used to call handler, so that its
+        errors are handled like those of other handlers.
+
+        """
+        self.handler = handler
+        self.max_size = max_size
+        self.max_latency = max_latency
+        self.coalesce_key = coalesce_key
+        self.coalesced = 0
+        self._run_handler = run_handler
+        self._timer = timer
+        self._pending = OrderedDict()
+        self._sequence = 0
+        self._deadline = None
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        """Add an event to the current batch."""
+        with self._lock:
+            key = self.coalesce_key(event) if self.coalesce_key else None
+            if key is None:
+                self._sequence += 1
+                key = ('', self._sequence)
+            elif key in self._pending:
+                del self._pending[key]
+                self.coalesced += 1
+            self._pending[key] = event
+
+            if len(self._pending) >= self.max_size:
+                batch = self._take()
+            else:
+                batch = None
+                if self._deadline is None:
+                    self._deadline = time.time() + self.max_latency
+                    self._timer.schedule(self._deadline, self)
+        if batch:
+            self._run_handler(self.handler, batch)
+
+    def _take(self):
+        """Return the waiting events and start a new batch, lock held."""
+        batch = self._pending.values()
+        self._pending = OrderedDict()
+        self._deadline = None
+        return batch
+
+    def flush(self, deadline=None):
+        """Deliver the waiting events now. If deadline is given, only do
+        so if the current batch is the one due at deadline.
+
+        """
+        with self._lock:
+            if deadline is not None and deadline != self._deadline:
+                return
+            batch = self._take()
+        if batch:
+            self._run_handler(self.handler, batch)
+
+
+class BatchTimer:
+    """Deliver late batches of EventBatchers from a daemon thread.
+
+    Deadlines are kept in a heap, so the thread wakes up once per due
+    batch whatever the number of batchers.
+
+    """
+    def __init__(self):
+        """Initiate new BatchTimer instance."""
+        self._heap = []
+        self._thread = None
+        self._condition = threading.Condition()
+
+    def schedule(self, deadline, batcher):
+        """Have batcher.flush(deadline) called at time deadline."""
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run)
+                self._thread.daemon = True
+                self._thread.start()
+            heapq.heappush(self._heap, (deadline, id(batcher), batcher))
+            if self._heap[0][2] is batcher:
+                self._condition.notify()
+
+    def _run(self):
+        """Flush batches as they fall due until closed."""
+        current = threading.current_thread()
+        while True:
+            with self._condition:
+                while self._thread is current:
+                    now = time.time()
+                    if self._heap and self._heap[0][0] <= now:
+                        break
+                    if self._heap:
+                        self._condition.wait(self._heap[0][0] - now)
+                    else:
+                        self._condition.wait()
+                if self._thread is not current:
+                    return
+                deadline, ident, batcher = heapq.heappop(self._heap)
+            batcher.flush(deadline)
+
+    def close(self, timeout=5):
+        """Deliver every scheduled batch and stop the thread."""
+        with self._condition:
+            thread, self._thread = self._thread, None
+            pending, self._heap = self._heap, []
+            self._condition.notify()
+        if thread is not None:
+            thread.join(timeout)
+        for deadline, ident, batcher in sorted(pending):
+            batcher.flush(deadline)
@@ -0,0 +1,355 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+import logging
+import threading
+from event_queue import EventQueue, BLOCK
+from event_batcher import EventBatcher, BatchTimer
+from metrics import LatencyHistogram
+from model import Model
+
+
+LOGGER = logging.getLogger(__name__)
+
+# Event attributes holding the objects an event is about, and the key of
+# each object's id.
+OBJECT_KEYS = (
+    ('channel', 'id'),
+    ('bridge', 'id'),
+    ('recording', 'name'),
+    ('playback', 'id'),
+    ('endpoint', 'resource'),
+)
+
+ANY_EVENT = '*'
+
+# Events after which their objects are gone, with the handlers for them.
+DESTROY_EVENTS = ('ChannelDestroyed', 'BridgeDestroyed')
+
+
+def get_event_object_ids(event):
+    """Return the ids of the objects a Stasis event is about."""
+    object_ids = []
+    for key, id_key in OBJECT_KEYS:
+        obj = event.get(key)
+        if isinstance(obj, Model):
+            object_ids.append(obj.object_id)
+        elif isinstance(obj, dict) and id_key in obj:
+            object_ids.append(obj[id_key])
+    return object_ids
+
+
+def get_event_data(event, key):
+    """Return the decoded JSON of the object event[key], e.g. its channel,
+    also once replaced by its live instance (see IdentityMap.load_event),
+    or None.
+
+    """
+    obj = event.get(key)
+    if isinstance(obj, Model):
+        return obj.to_dict()
+    return obj if isinstance(obj, dict) else None
+
+
+def get_coalesce_key(event):
+    """Return the key under which a later event supersedes an earlier one:
+    its type and the objects it is about. None if it is about no object.
+
+    """
+    object_ids = get_event_object_ids(event)
+    if not object_ids:
+        return None
+    return (event.get('type'),) + tuple(object_ids)
+
+
+class EventDispatcher:
+    """Deliver Stasis events to handlers through an index.
+
+    Handlers are indexed by (event type, object id); general handlers use
+    None as object id, and ANY_EVENT as event type matches every type. An
+    event is delivered with a few dict lookups, whatever the number of
+    handlers registered for other types or objects.
+
+    The index holds tuples which are replaced, never changed, so dispatch
+    reads it without locking.
+
+    Handlers run on a pool of worker threads, each fed by its own
+    EventQueue of queue_size events (see EventQueue for the overflow
+    policies). The events about one object always go to the same worker,
+    so they are handled in order, and a slow handler only delays the
+    events queued behind it. With workers=0, handlers run on the thread
+    calling dispatch, i.e. the one reading the events connection.
+
+    """
+    def __init__(self, workers=4, queue_size=1000, overflow=BLOCK,
+                 droppable_types=()):
+        """Initiate new EventDispatcher instance."""
+        self.workers = workers
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.droppable_types = droppable_types
+        self.events_dispatched = 0
+        self.handler_errors = 0
+        self._index = {}
+        self._listeners = ()
+        self._lock = threading.Lock()
+        self._count_lock = threading.Lock()
+        self._queues = None
+        self._threads = []
+        # Queues being closed, and the statistics of those closed, kept
+        # so that counters never go back.
+        self._closing_queues = []
+        self._closed_queue_stats = {'depth': 0, 'max_depth': 0,
+                                    'producer_waits': 0, 'dropped': {},
+                                    'lag': LatencyHistogram()}
+        self._batch_timer = BatchTimer()
+
+    def add_handler(self, event_name, handler, object_id=None,
+                    batch_size=None, batch_latency=0.05, coalesce=False):
+        """Call handler(event) for events of type event_name, only those
+        about object_id if it is given.
+
+        If batch_size is given, handler is instead called with lists of
+        at most batch_size events, at most batch_latency seconds after the
+        first of them arrived. With coalesce, an event waiting in a batch
+        is replaced by a later one of the same type about the same objects.
+        See EventBatcher.
+
+        """
+        if batch_size is not None:
+            handler = EventBatcher(
+                handler, self.run_handler, self._batch_timer,
+                max_size=batch_size, max_latency=batch_latency,
+                coalesce_key=get_coalesce_key if coalesce else None)
+        key = (event_name, object_id)
+        with self._lock:
+            self._index[key] = self._index.get(key, ()) + (handler,)
+
+    def remove_handler(self, event_name, handler, object_id=None):
+        """Remove a handler; return False if it was not registered.
+        A batched handler first gets the events waiting for it.
+
+        """
+        key = (event_name, object_id)
+        with self._lock:
+            handlers = self._index.get(key, ())
+            removed = [h for h in handlers if is_handler(h, handler)]
+            if not removed:
+                return False
+            handlers = tuple(h for h in handlers if h not in removed)
+            if handlers:
+                self._index[key] = handlers
+            else:
+                del self._index[key]
+        flush_batches(removed)
+        return True
+
+    def remove_object(self, object_id):
+        """Remove every handler registered for object_id."""
+        removed = []
+        with self._lock:
+            for key in [k for k in self._index if k[1] == object_id]:
+                removed.extend(self._index.pop(key))
+        flush_batches(removed)
+
+    def add_listener(self, listener, first=False):
+        """Call listener(event) for every event, before it is queued, on
+        the thread calling dispatch; listeners run in the order they were
+        added, or before the others if first. Meant for state which must
+        follow the events in the order they arrive, whatever happens to
+        them in the queues; a listener must be quick.
+
+        """
+        with self._lock:
+            if first:
+                self._listeners = (listener,) + self._listeners
+            else:
+                self._listeners = self._listeners + (listener,)
+
+    def remove_listener(self, listener):
+        """Remove a listener; return False if it was not added."""
+        with self._lock:
+            if listener not in self._listeners:
+                return False
+            self._listeners = tuple(each for each in self._listeners
+                                    if each != listener)
+        return True
+
+    def get_handlers(self, event):
+        """Return the handlers an event must be delivered to."""
+        index = self._index
+        event_type = event.get('type')
+        handlers = index.get((event_type, None), ()) \
+            + index.get((ANY_EVENT, None), ())
+        for object_id in get_event_object_ids(event):
+            handlers += index.get((event_type, object_id), ()) \
+                + index.get((ANY_EVENT, object_id), ())
+        return handlers
+
+    def dispatch(self, event):
+        """Queue an event for delivery to its handlers, or deliver it at
+        once if there are no workers. Return False if it was dropped.
+        The listeners get it first in any case.
+
+        """
+        for listener in self._listeners:
+            self.run_handler(listener, event)
+        if not self.workers:
+            self.deliver(event)
+            return True
+
+        queues = self._queues or self._start_workers()
+        object_ids = get_event_object_ids(event)
+        if object_ids:
+            queue = queues[hash(object_ids[0]) % len(queues)]
+        else:
+            queue = queues[0]
+        return queue.put(event)
+
+    def deliver(self, event):
+        """Call the handlers of an event and return how many were called.
+        A failing handler is logged and does not stop the others. After
+        a destroy event, the handlers of its objects are removed.
+
+        """
+        handlers = self.get_handlers(event)
+        for handler in handlers:
+            self.run_handler(handler, event)
+        if event.get('type') in DESTROY_EVENTS:
+            for object_id in get_event_object_ids(event):
+                self.remove_object(object_id)
+        with self._count_lock:
+            self.events_dispatched += 1
+        return len(handlers)
+
+    def run_handler(self, handler, event):
+        """Call one handler with an event, or a batch of events, logging
+        and counting its exceptions.
+
+        """
+        try:
+            handler(event)
+        except Exception:
+            with self._count_lock:
+                self.handler_errors += 1
+            if isinstance(event, list):
+                LOGGER.exception("Stasis event handler failed on a batch "
+                                 "of %d events", len(event))
+            else:
+                LOGGER.exception("Stasis event handler failed on %s",
+                                 event.get('type'))
+
+    def _start_workers(self):
+        """Create the queues and start the worker threads, once."""
+        with self._lock:
+            if self._queues is None:
+                queues = [EventQueue(self.queue_size, self.overflow,
+                                     self.droppable_types)
+                          for i in range(self.workers)]
+                self._threads = []
+                for queue in queues:
+                    worker = threading.Thread(target=self._work,
+                                              args=(queue,))
+                    worker.daemon = True
+                    worker.start()
+                    self._threads.append(worker)
+                self._queues = queues
+            return self._queues
+
+    def _work(self, queue):
+        """Deliver the events of one queue until it is closed."""
+        while True:
+            event = queue.get()
+            if event is None:
+                return
+            self.deliver(event)
+
+    def close(self, timeout=5):
+        """Deliver the events already queued or batched and stop the
+        workers. They are started again by the next dispatch.
+
+        """
+        with self._lock:
+            queues, threads = self._queues or [], self._threads
+            self._queues = None
+            self._threads = []
+            self._closing_queues.extend(queues)
+        for queue in queues:
+            queue.close()
+        for worker in threads:
+            worker.join(timeout)
+        with self._lock:
+            for queue in queues:
+                add_queue_stats(self._closed_queue_stats, queue.get_stats())
+                self._closing_queues.remove(queue)
+        self._batch_timer.close(timeout)
+
+    def get_stats(self):
+        """Return a dict of dispatcher statistics. Counters include the
+        queues of workers stopped by close.
+
+        """
+        total = {'depth': 0, 'max_depth': 0, 'producer_waits': 0,
+                 'dropped': {}, 'lag': LatencyHistogram()}
+        with self._lock:
+            registered = sum(len(h) for h in self._index.values())
+            coalesced = sum(h.coalesced for hs in self._index.values()
+                            for h in hs if isinstance(h, EventBatcher))
+            add_queue_stats(total, self._closed_queue_stats)
+            for queue in (self._queues or []) + self._closing_queues:
+                add_queue_stats(total, queue.get_stats())
+        lag = total['lag']
+        return {
+            'handlers': registered,
+            'events_dispatched': self.events_dispatched,
+            'handler_errors': self.handler_errors,
+            'events_coalesced': coalesced,
+            'queue_depth': total['depth'],
+            'queue_max_depth': total['max_depth'],
+            'producer_waits': total['producer_waits'],
+            'events_dropped': sum(total['dropped'].values()),
+            'dropped_by_type': total['dropped'],
+            'lag_mean': lag.sum / lag.count if lag.count else 0.0,
+            'lag_p50': lag.quantile(0.5),
+            'lag_p99': lag.quantile(0.99),
+        }
+
+
+def add_queue_stats(total, stats):
+    """Add the statistics of an EventQueue (see EventQueue.get_stats) to
+    total, a dict of the same form.
+
+    """
+    total['depth'] += stats['depth']
+    total['max_depth'] = max(total['max_depth'], stats['max_depth'])
+    total['producer_waits'] += stats['producer_waits']
+    for event_type, count in stats['dropped'].items():
+        total['dropped'][event_type] = \
+            total['dropped'].get(event_type, 0) + count
+    total['lag'].merge(stats['lag'])
+
+
+def is_handler(registered, handler):
+    """Return True if registered is handler, or batches events for it."""
+    return registered is handler \
+        or (isinstance(registered, EventBatcher)
+            and registered.handler is handler)
+
+
+def flush_batches(handlers):
+    """Deliver the events waiting in the batched handlers of a list."""
+    for handler in handlers:
+        if isinstance(handler, EventBatcher):
+            handler.flush()
@@ -0,0 +1,135 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+import time
+import threading
+from collections import deque
+from metrics import LatencyHistogram
+
+
+# Overflow policies
+BLOCK = 'block'
+DROP_OLDEST = 'drop_oldest'
+DROP_BY_TYPE = 'drop_by_type'
+
+
+class EventQueue:
+    """Bounded FIFO of Stasis events waiting for their handlers.
+
+    When maxsize events are waiting, overflow decides what happens to a
+    new one: BLOCK makes the producer wait for room, which pushes back on
+    the events connection; DROP_OLDEST discards the oldest waiting event;
+    DROP_BY_TYPE discards the new event if its type is in droppable_types,
+    else the oldest waiting event of such a type, and blocks only if
+    there is none.
+
+    Counts dropped events by type, producer waits, and the lag between
+    queueing an event and taking it out.
+
+    """
+    def __init__(self, maxsize=1000, overflow=BLOCK, droppable_types=()):
+        """Initiate new EventQueue instance."""
+        if overflow not in (BLOCK, DROP_OLDEST, DROP_BY_TYPE):
+            raise ValueError("Unknown overflow policy %s" % (overflow))
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.droppable_types = frozenset(droppable_types)
+        self.max_depth = 0
+        self.producer_waits = 0
+        self.dropped = {}
+        self.lag = LatencyHistogram()
+        self._events = deque()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+
+    def put(self, event):
+        """Queue an event; return False if it was dropped instead."""
+        with self._lock:
+            if len(self._events) >= self.maxsize \
+                    and not self._make_room(event):
+                self._drop(event)
+                return False
+            self._events.append((time.time(), event))
+            self.max_depth = max(self.max_depth, len(self._events))
+            self._not_empty.notify()
+            return True
+
+    def _make_room(self, event):
+        """Free a slot according to the overflow policy, lock held.
+        Return False if event should be dropped instead.
+
+        """
+        if self.overflow == DROP_OLDEST:
+            self._drop(self._events.popleft()[1])
+            return True
+
+        if self.overflow == DROP_BY_TYPE:
+            if event.get('type') in self.droppable_types:
+                return False
+            for i, (queued_at, queued) in enumerate(self._events):
+                if queued.get('type') in self.droppable_types:
+                    del self._events[i]
+                    self._drop(queued)
+                    return True
+
+        self.producer_waits += 1
+        while len(self._events) >= self.maxsize and not self._closed:
+            self._not_full.wait()
+        return not self._closed
+
+    def _drop(self, event):
+        """Count a dropped event, lock held."""
+        event_type = event.get('type')
+        self.dropped[event_type] = self.dropped.get(event_type, 0) + 1
+
+    def get(self):
+        """Return the next event, waiting for one. Return None once the
+        queue is closed and empty.
+
+        """
+        with self._lock:
+            while not self._events:
+                if self._closed:
+                    return None
+                self._not_empty.wait()
+            queued_at, event = self._events.popleft()
+            self.lag.observe(time.time() - queued_at)
+            self._not_full.notify()
+            return event
+
+    def close(self):
+        """Refuse new events; waiting events are still handed out."""
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+    def get_stats(self):
+        """Return a dict of queue statistics; 'lag' is a copy of the lag
+        histogram.
+
+        """
+        with self._lock:
+            lag = LatencyHistogram(self.lag.buckets)
+            lag.merge(self.lag)
+            return {
+                'depth': len(self._events),
+                'max_depth': self.max_depth,
+                'producer_waits': self.producer_waits,
+                'dropped': dict(self.dropped),
+                'lag': lag,
+            }
@@ -0,0 +1,141 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+import re
+import json
+import socket
+import logging
+import threading
+try:
+    import websocket
+except ImportError:
+    websocket = None
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+def make_events_uri(base_uri, app):
+    """Return the Stasis WebSocket URI for application app, e.g.
+    ws://localhost:8088/stasis/events?app=hello for the base URI
+    http://localhost:8088/stasis.
+
+    """
+    return "%s/events?app=%s" % (re.sub('^http', 'ws', base_uri), app)
+
+
+class EventStream:
+    """Receive Stasis events over a WebSocket and hand them to a dispatcher.
+
+    Runs on a daemon thread and reconnects, with a delay doubling up to
+    max_reconnect_delay, whenever the connection drops.
+    Requires the websocket-client package.
+
+    """
+    def __init__(self, uri, dispatcher, reconnect_delay=0.5,
+                 max_reconnect_delay=30, on_connect=None):
+        """Initiate new EventStream instance.
+
+        on_connect, if given, is called with no arguments after each
+        successful (re)connection.
+
+        """
+        if websocket is None:
+            raise ImportError("Stasis events require the websocket-client "
+                              "package")
+        self.uri = uri
+        self.dispatcher = dispatcher
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.on_connect = on_connect
+        self.connected = threading.Event()
+        self.events_received = 0
+        self.reconnects = 0
+        self._stopped = threading.Event()
+        self._socket = None
+        self._thread = None
+
+    def start(self):
+        """Start receiving events, if not already started."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop receiving events and close the connection."""
+        self._stopped.set()
+        ws = self._socket
+        if ws is not None and ws.sock is not None:
+            # Wakes up the receiving thread, which closing would not do.
+            try:
+                ws.sock.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+
+    def _run(self):
+        """Connect, receive until the connection drops, and repeat."""
+        delay = self.reconnect_delay
+        while not self._stopped.is_set():
+            try:
+                self._socket = websocket.create_connection(self.uri)
+            except Exception, err:
+                LOGGER.warning("Cannot connect to %s: %s", self.uri, err)
+                self._stopped.wait(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+
+            delay = self.reconnect_delay
+            self.connected.set()
+            if self.on_connect is not None:
+                self.on_connect()
+            try:
+                self._receive()
+            except Exception, err:
+                if not self._stopped.is_set():
+                    LOGGER.warning("Lost events connection to %s: %s",
+                                   self.uri, err)
+            finally:
+                self.connected.clear()
+                self._socket.shutdown()
+
+            if not self._stopped.is_set():
+                self.reconnects += 1
+
+    def _receive(self):
+        """Dispatch messages until the socket is closed."""
+        while not self._stopped.is_set():
+            message = self._socket.recv()
+            if not message:
+                return
+            try:
+                event = json.loads(message)
+            except ValueError:
+                LOGGER.warning("Ignoring invalid JSON event: %r", message)
+                continue
+            self.events_received += 1
+            self.dispatcher.dispatch(event)
+
+    def get_stats(self):
+        """Return a dict of stream statistics."""
+        return {
+            'connected': self.connected.is_set(),
+            'events_received': self.events_received,
+            'reconnects': self.reconnects,
+        }
@@ -0,0 +1,78 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+import time
+import threading
+
+
+class HealthState:
+    """Cached reachability of one Asterisk REST API base URI.
+
+    One HealthState is shared by every client of the same URI in the
+    process (see get_health_state), so a probe made by one client answers
+    for all of them until ttl seconds have passed.
+
+    """
+    def __init__(self, uri, ttl=30):
+        """Initiate new HealthState instance."""
+        self.uri = uri
+        self.ttl = ttl
+        self.reachable = None
+        self.error = None
+        self.checked_at = None
+        self.probe_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+    def is_fresh(self):
+        """Return True if the cached state is younger than ttl."""
+        with self._lock:
+            return self.checked_at is not None \
+                and time.time() - self.checked_at < self.ttl
+
+    def record(self, reachable, error=None):
+        """Store the outcome of a probe or of a regular API call."""
+        with self._lock:
+            self.reachable = reachable
+            self.error = error
+            self.checked_at = time.time()
+
+    def snapshot(self):
+        """Return a dict copy of the cached state."""
+        with self._lock:
+            return {
+                'uri': self.uri,
+                'reachable': self.reachable,
+                'error': self.error,
+                'checked_at': self.checked_at,
+            }
+
+
+_HEALTH_STATES = {}
+_HEALTH_STATES_LOCK = threading.Lock()
+
+
+def get_health_state(uri, ttl=30):
+    """Return the process-wide HealthState for uri, creating it if needed.
+    The ttl of an existing state is lowered to ttl if ttl is shorter.
+
+    """
+    with _HEALTH_STATES_LOCK:
+        state = _HEALTH_STATES.get(uri)
+        if state is None:
+            state = HealthState(uri, ttl)
+            _HEALTH_STATES[uri] = state
+        elif ttl < state.ttl:
+            state.ttl = ttl
+        return state
@@ -0,0 +1,79 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+import weakref
+import threading
+from model import get_id_key, get_model_class
+
+
+# Event attributes holding an object, and the name of its class.
+EVENT_OBJECT_CLASSES = (
+    ('channel', 'Channel'),
+    ('bridge', 'Bridge'),
+    ('recording', 'Recording'),
+    ('endpoint', 'Endpoint'),
+)
+
+
+class IdentityMap:
+    """Keep a single live instance per Asterisk object.
+
+    Instances are keyed by class and object id and held through weak
+    references, so an object nobody uses any more (e.g. a channel which
+    was hung up) is garbage collected, and built again if seen again.
+
+    """
+    def __init__(self):
+        """Initiate new IdentityMap instance."""
+        self._objects = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def get(self, model_class, object_id):
+        """Return the live instance of model_class for object_id, or None."""
+        return self._objects.get((model_class, object_id))
+
+    def load(self, model_class, api, data):
+        """Return the instance of model_class for the decoded JSON object
+        data: the live one, updated in place with data, or a new one.
+
+        """
+        key = (model_class, data.get(get_id_key(model_class)))
+        with self._lock:
+            obj = self._objects.get(key)
+            if obj is None:
+                obj = model_class(api, data)
+                if obj.object_id is not None:
+                    self._objects[key] = obj
+            else:
+                obj.update(data)
+        return obj
+
+    def load_event(self, api, event, class_prefix=''):
+        """Replace the objects a decoded Stasis event is about by their
+        instances, loaded as in load(); class_prefix is prepended to class
+        names, e.g. 'Async'. Objects already replaced, e.g. through
+        another map, are left alone.
+
+        """
+        for key, class_name in EVENT_OBJECT_CLASSES:
+            data = event.get(key)
+            if not isinstance(data, dict):
+                continue
+            model_class = get_model_class(class_prefix + class_name)
+            if model_class is not None:
+                event[key] = self.load(model_class, api, data)
+
+    def __len__(self):
+        return len(self._objects)
@@ -0,0 +1,207 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+import time
+import threading
+from bisect import bisect_left
+
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    'requests_total': 'Asterisk REST API calls by operation and method.',
+    'request_errors_total': 'Failed Asterisk REST API calls by status.',
+    'request_duration_seconds': 'Latency of Asterisk REST API calls.',
+    'retries_total': 'Retried Asterisk REST API calls.',
+    'coalesced_total': 'GET calls answered by an identical call in flight.',
+    'rate_limited_total': 'Calls refused by the client-side rate limiter.',
+    'rate_limit_wait_seconds': 'Time calls waited on the rate limiter.',
+}
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram with fixed upper bounds, in seconds."""
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """Initiate new LatencyHistogram instance."""
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        """Add one observation."""
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def merge(self, other):
+        """Add the observations of other, which has the same buckets."""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+
+    def quantile(self, q):
+        """Estimate quantile q (0 to 1) as the upper bound of the bucket
+        holding it. Observations above the last bucket report the last
+        bucket's bound.
+
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts[:-1]):
+            seen += bucket_count
+            if seen >= rank:
+                return self.buckets[i]
+        return self.buckets[-1]
+
+
+class Metrics:
+    """Thread-safe counters and latency histograms for the REST client.
+
+    Values are keyed by metric name and a tuple of (label, value) pairs.
+    Recording is a dict lookup and an increment under a lock; nothing is
+    formatted until get_summary() or to_prometheus() is called.
+
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix='asteriskpy'):
+        """Initiate new Metrics instance."""
+        self.buckets = buckets
+        self.prefix = prefix
+        self.started_at = time.time()
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name, labels=(), value=1):
+        """Add value to the counter name{labels}."""
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0) + value
+
+    def observe(self, name, seconds, labels=()):
+        """Add an observation to the histogram name{labels}."""
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = LatencyHistogram(self.buckets)
+            histogram.observe(seconds)
+
+    def record_call(self, operation, http_method, seconds, status=None):
+        """Record one API call.
+
+        operation is the path template, e.g. /channels/%s/answer. status is
+        the HTTP status code of a failed call, or a short reason such as
+        'connection_error'; None for a successful call.
+
+        """
+        labels = (('operation', operation), ('method', http_method))
+        self.increment('requests_total', labels)
+        self.observe('request_duration_seconds', seconds, labels)
+        if status is not None:
+            self.increment('request_errors_total',
+                           labels + (('status', str(status)),))
+
+    def get_summary(self):
+        """Return a dict keyed by (operation, method) of call count, error
+        count, calls per second since creation and latency estimates.
+
+        """
+        elapsed = max(time.time() - self.started_at, 1e-9)
+        summary = {}
+        with self._lock:
+            errors = {}
+            for labels, value in \
+                    self._counters.get('request_errors_total', {}).items():
+                key = (labels[0][1], labels[1][1])
+                errors[key] = errors.get(key, 0) + value
+            for labels, histogram in \
+                    self._histograms.get('request_duration_seconds',
+                                         {}).items():
+                key = (labels[0][1], labels[1][1])
+                summary[key] = {
+                    'count': histogram.count,
+                    'errors': errors.get(key, 0),
+                    'calls_per_second': histogram.count / elapsed,
+                    'mean': histogram.sum / histogram.count,
+                    'p50': histogram.quantile(0.5),
+                    'p95': histogram.quantile(0.95),
+                    'p99': histogram.quantile(0.99),
+                }
+        return summary
+
+    def to_prometheus(self, counters=None):
+        """Return all metrics in the Prometheus text exposition format.
+
+        counters is an optional dict of extra unlabelled counter values
+        (e.g. connection pool statistics) to include.
+
+        """
+        lines = []
+        with self._lock:
+            for name in sorted(self._counters):
+                full_name = '%s_%s' % (self.prefix, name)
+                if name in HELP:
+                    lines.append('# HELP %s %s' % (full_name, HELP[name]))
+                lines.append('# TYPE %s counter' % (full_name))
+                for labels, value in sorted(self._counters[name].items()):
+                    lines.append('%s%s %s' % (full_name,
+                                              format_labels(labels), value))
+
+            for name in sorted(self._histograms):
+                full_name = '%s_%s' % (self.prefix, name)
+                if name in HELP:
+                    lines.append('# HELP %s %s' % (full_name, HELP[name]))
+                lines.append('# TYPE %s histogram' % (full_name))
+                for labels, histogram in \
+                        sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    bounds = [repr(b) for b in histogram.buckets] + ['+Inf']
+                    for bound, bucket_count in zip(bounds, histogram.counts):
+                        cumulative += bucket_count
+                        lines.append('%s_bucket%s %s' % (
+                            full_name,
+                            format_labels(labels + (('le', bound),)),
+                            cumulative))
+                    lines.append('%s_sum%s %r' % (full_name,
+                                                  format_labels(labels),
+                                                  histogram.sum))
+                    lines.append('%s_count%s %s' % (full_name,
+                                                    format_labels(labels),
+                                                    histogram.count))
+
+        for name, value in sorted((counters or {}).items()):
+            full_name = '%s_%s' % (self.prefix, name)
+            lines.append('# TYPE %s counter' % (full_name))
+            lines.append('%s %s' % (full_name, value))
+
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels):
+    """Format a tuple of (label, value) pairs as a Prometheus label set."""
+    if not labels:
+        return ''
+    return '{%s}' % (','.join('%s="%s"' % (key, escape_label_value(value))
+                              for key, value in labels))
+
+
+def escape_label_value(value):
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"') \
+        .replace('\n', '\\n')
@@ -0,0 +1,152 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+import re
+
+
+# Key of the object id in the JSON of each object type, by class name.
+# Others, and the asynchronous variants' names without their Async
+# prefix, fall back to 'id'.
+ID_KEYS = {
+    'Channel': 'id',
+    'Bridge': 'id',
+    'Recording': 'name',
+    'Endpoint': 'resource',
+}
+
+_id_keys_by_class = {}
+_model_classes = {}
+
+
+def get_id_key(cls):
+    """Return the key of the object id in the JSON of instances of cls."""
+    try:
+        return _id_keys_by_class[cls]
+    except KeyError:
+        name = cls.__name__
+        if name.startswith('Async'):
+            name = name[len('Async'):]
+        key = _id_keys_by_class[cls] = ID_KEYS.get(name, 'id')
+        return key
+
+
+def get_model_class(name):
+    """Return the generated class named name (e.g. Channel, AsyncChannel),
+    importing its module if needed, or None if there is no such class.
+
+    """
+    try:
+        return _model_classes[name]
+    except KeyError:
+        pass
+    module_name = re.sub('(?<!^)([A-Z])', r'_\1', name).lower()
+    try:
+        model_class = getattr(__import__(module_name), name, None)
+    except ImportError:
+        model_class = None
+    if not (isinstance(model_class, type) and issubclass(model_class, Model)):
+        model_class = None
+    _model_classes[name] = model_class
+    return model_class
+
+
+def wrap(value):
+    """Return a JSON value as read through a Model or Record: objects are
+    wrapped in a Record, and so are those in lists.
+
+    """
+    if isinstance(value, dict):
+        return Record(value)
+    if isinstance(value, list) and value and isinstance(value[0], dict):
+        return [wrap(item) for item in value]
+    return value
+
+
+def get_field(data, name):
+    """Return field name of a decoded JSON object, wrapped, or raise
+    AttributeError.
+
+    """
+    try:
+        return wrap(data[name])
+    except KeyError:
+        raise AttributeError(name)
+
+
+class Record(object):
+    """Read-only attribute access to a decoded JSON object, e.g. the caller
+    of a channel: channel.caller.number.
+
+    """
+    __slots__ = ('_data',)
+
+    def __init__(self, data):
+        """Initiate new Record instance."""
+        self._data = data
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return get_field(self._data, name)
+
+    def get(self, name, default=None):
+        """Return field name, or default if it is missing."""
+        return wrap(self._data.get(name, default))
+
+    def to_dict(self):
+        """Return the decoded JSON object; do not modify it."""
+        return self._data
+
+    def __repr__(self):
+        return 'Record(%r)' % (self._data)
+
+
+class Model(object):
+    """Base class of the generated Asterisk object classes.
+
+    An instance keeps the JSON object it was built from, as decoded, and
+    reads its fields on attribute access (channel.state); methods take
+    precedence, use get() for a field hidden by one. Nested objects are
+    only wrapped when read, and instances have no __dict__, so a listing
+    of many objects costs little more than its decoded JSON.
+
+    """
+    __slots__ = ('object_id', '_api', '_data', '__weakref__')
+
+    def __init__(self, api, data=None):
+        """Initiate new Model instance."""
+        self._api = api
+        self._data = data if data is not None else {}
+        self.object_id = self._data.get(get_id_key(type(self)))
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return get_field(self._data, name)
+
+    def get(self, name, default=None):
+        """Return field name, or default if it is missing."""
+        return wrap(self._data.get(name, default))
+
+    def update(self, data):
+        """Replace the object's JSON data, in place, by a newer version."""
+        self._data = data
+
+    def to_dict(self):
+        """Return the decoded JSON object; do not modify it."""
+        return self._data
+
+    def __repr__(self):
+        return '<%s %s>' % (type(self).__name__, self.object_id)
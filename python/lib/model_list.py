@@ -0,0 +1,104 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+from multiprocessing.pool import ApplyResult
+from errors import AsteriskPyAccessException, AsteriskPyCallException
+from batch import run_batch
+
+
+class ModelList(list):
+    """Objects returned by a listing call, e.g. AsteriskPy.get_channels,
+    with bulk operations.
+
+    The *_all methods call a method of every object, or of those matching
+    a filter, on at most max_concurrency threads and return a BatchResult
+    with one result dict per object, in order: success, response (what
+    the method returned), error, status, and object. A failing object does
+    not stop the others; see BatchResult.get_failures.
+
+    """
+    def __init__(self, objects=(), max_concurrency=10):
+        """Initiate new ModelList instance."""
+        list.__init__(self, objects)
+        self.max_concurrency = max_concurrency
+
+    def filter(self, predicate=None, **fields):
+        """Return a ModelList of the objects for which predicate(obj) is
+        true and whose fields have the given values, e.g.
+        channels.filter(state='Up').
+
+        """
+        return ModelList([obj for obj in self
+                          if is_match(obj, predicate, fields)],
+                         self.max_concurrency)
+
+    def call_all(self, method_name, *args, **kwargs):
+        """Call method_name(*args, **kwargs) on every object in parallel
+        and return a BatchResult.
+
+        """
+        def call_method(obj):
+            """Call the method on one object; return its result dict."""
+            result = {'success': False, 'response': None, 'error': None,
+                      'status': None, 'object': obj}
+            try:
+                response = getattr(obj, method_name)(*args, **kwargs)
+                if isinstance(response, ApplyResult):
+                    response = response.get()
+            except (AsteriskPyCallException, AsteriskPyAccessException), err:
+                result['error'] = str(err)
+                result['status'] = getattr(err, 'status', None)
+                return result
+            result['success'] = True
+            result['response'] = response
+            return result
+
+        return run_batch(call_method, [{'obj': obj} for obj in self],
+                         self.max_concurrency)
+
+    def delete_all(self, predicate=None, **fields):
+        """Delete every object, or those matching the filter (see filter):
+        hang up channels, destroy bridges, discard recordings.
+
+        """
+        return self.filter(predicate, **fields).call_all('delete')
+
+    def stop_all(self, predicate=None, **fields):
+        """Stop every recording, or those matching the filter."""
+        return self.filter(predicate, **fields).call_all('stop')
+
+    def mute_all(self, predicate=None, **fields):
+        """Mute every channel or recording, or those matching the filter."""
+        return self.filter(predicate, **fields).call_all('mute')
+
+    def unmute_all(self, predicate=None, **fields):
+        """Unmute every channel or recording, or those matching the
+        filter.
+
+        """
+        return self.filter(predicate, **fields).call_all('unmute')
+
+
+def is_match(obj, predicate, fields):
+    """Return True if obj passes predicate, if given, and has the values
+    of the dict fields.
+
+    """
+    if predicate is not None and not predicate(obj):
+        return False
+    for name, value in fields.items():
+        if obj.get(name) != value:
+            return False
+    return True
@@ -0,0 +1,152 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+import re
+import time
+import threading
+from errors import AsteriskPyRateLimitException
+
+
+ORIGINATE = 'originate'
+CONTROL = 'control'
+READ = 'read'
+
+ORIGINATE_PATH_RE = re.compile('(^|/)channels/?$|/dial$')
+
+
+def classify_call(path, http_method):
+    """Return the operation class of a call: ORIGINATE for requests which
+    create channels, READ for other GET requests and CONTROL for the rest.
+    path is the path template passed to AsteriskRestAPI.call.
+
+    """
+    if http_method == 'GET':
+        return READ
+    if http_method == 'POST' and ORIGINATE_PATH_RE.search(path):
+        return ORIGINATE
+    return CONTROL
+
+
+class TokenBucket:
+    """Token bucket refilled at rate tokens per second, holding at most
+    burst tokens. Not thread-safe; RateLimiter holds the lock.
+
+    The token count may go negative: a blocking caller reserves its token
+    at once and then sleeps for the debt, so waiters are served in order.
+
+    """
+    def __init__(self, rate, burst=None, now=None):
+        """Initiate new TokenBucket instance, full at time now."""
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(rate, 1))
+        self.tokens = self.burst
+        self.updated_at = now if now is not None else time.time()
+
+    def refill(self, now):
+        """Add the tokens earned since the last refill."""
+        self.tokens = min(self.burst,
+                          self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def get_wait(self):
+        """Return seconds until one token is available."""
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        """Take one token, possibly going into debt."""
+        self.tokens -= 1
+
+
+class RateLimiter:
+    """Client-side limit on the rate of Asterisk API calls.
+
+    rate and burst bound all calls together; class_limits is a dict of
+    operation class (ORIGINATE, CONTROL, READ) to a (rate, burst) tuple
+    bounding that class. Leave rate None for no global limit.
+
+    In 'block' mode acquire() sleeps until the call is allowed; in 'fail'
+    mode it throws AsteriskPyRateLimitException at once. estimate_wait()
+    tells how long a call would have to wait, without taking a token.
+
+    """
+    def __init__(self, rate=None, burst=None, class_limits=None,
+                 mode='block', clock=time.time, sleep=time.sleep):
+        """Initiate new RateLimiter instance.
+        clock returns the current time in seconds and sleep waits; tests
+        may pass fakes.
+
+        """
+        if mode not in ('block', 'fail'):
+            raise ValueError("mode must be 'block' or 'fail'")
+        self.mode = mode
+        self.clock = clock
+        self.sleep = sleep
+        now = clock()
+        self._global = TokenBucket(rate, burst, now) if rate else None
+        self._classes = {}
+        for operation_class, limit in (class_limits or {}).items():
+            self._classes[operation_class] = TokenBucket(limit[0], limit[1],
+                                                         now)
+        self._lock = threading.Lock()
+
+    def _get_buckets(self, operation_class):
+        """Return the buckets a call of operation_class draws from."""
+        buckets = [self._classes.get(operation_class), self._global]
+        return [b for b in buckets if b is not None]
+
+    def estimate_wait(self, operation_class):
+        """Return the number of seconds a call of operation_class would
+        wait if made now.
+
+        """
+        with self._lock:
+            now = self.clock()
+            wait = 0.0
+            for bucket in self._get_buckets(operation_class):
+                bucket.refill(now)
+                wait = max(wait, bucket.get_wait())
+            return wait
+
+    def acquire(self, operation_class, max_wait=None):
+        """Take a token for a call of operation_class and return the
+        number of seconds waited for it.
+
+        Throws AsteriskPyRateLimitException, without taking a token, in
+        'fail' mode if the call is not allowed now, or in 'block' mode if
+        it would have to wait longer than max_wait seconds.
+
+        """
+        with self._lock:
+            now = self.clock()
+            buckets = self._get_buckets(operation_class)
+            wait = 0.0
+            for bucket in buckets:
+                bucket.refill(now)
+                wait = max(wait, bucket.get_wait())
+
+            if wait > 0 and (self.mode == 'fail'
+                             or (max_wait is not None and wait > max_wait)):
+                raise AsteriskPyRateLimitException(
+                    "Rate limit reached for %s calls" % (operation_class),
+                    retry_after=wait)
+
+            for bucket in buckets:
+                bucket.take()
+
+        if wait > 0:
+            self.sleep(wait)
+        return wait
@@ -0,0 +1,122 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+import time
+import logging
+import threading
+
+
+LOGGER = logging.getLogger(__name__)
+
+DRIFT_KEYS = {
+    'ChannelCreated': 'channels_added',
+    'ChannelDestroyed': 'channels_removed',
+    'ChannelStateChange': 'channels_changed',
+    'BridgeCreated': 'bridges_added',
+    'BridgeDestroyed': 'bridges_removed',
+    'ChannelEnteredBridge': 'bridges_changed',
+    'ChannelLeftBridge': 'bridges_changed',
+}
+
+
+class Reconciler:
+    """Periodically reconcile a StateMirror with Asterisk.
+
+    Every interval seconds, fetches the channels and bridges from
+    Asterisk, never from the client's response cache, has the mirror fix
+    itself where they differ (see StateMirror.reconcile), and
+    dispatches the resulting synthetic events to the event handlers of
+    api, marked with 'synthetic': True. Handlers are found through the
+    dispatcher's index, so the cost of a pass grows with the number of
+    differences, not with the number of handlers.
+
+    Each pass reports how far the mirror had drifted: the differences by
+    kind, objects_updated for other changed fields, and drift, the number
+    of differences relative to the number of objects.
+
+    """
+    def __init__(self, mirror, api, interval=30):
+        """Initiate new Reconciler instance."""
+        self.mirror = mirror
+        self.api = api
+        self.interval = interval
+        self.passes = 0
+        self.errors = 0
+        self.last_drift = None
+        self.totals = dict((key, 0) for key in DRIFT_KEYS.values())
+        self.totals['objects_updated'] = 0
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start reconciling on a daemon thread, if not already started."""
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop reconciling."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+
+    def _run(self):
+        """Reconcile every interval seconds until stopped."""
+        while not self._stopped.wait(self.interval):
+            try:
+                self.reconcile()
+            except Exception, err:
+                self.errors += 1
+                LOGGER.warning("Cannot reconcile with Asterisk: %s", err)
+
+    def reconcile(self):
+        """Make one pass and return its drift report."""
+        start = time.time()
+        events, updated = self.mirror.reconcile()
+        for event in events:
+            self.api.dispatch_event(event)
+
+        drift = dict((key, 0) for key in DRIFT_KEYS.values())
+        for event in events:
+            drift[DRIFT_KEYS[event['type']]] += 1
+        stats = self.mirror.get_stats()
+        objects = max(stats['channels'] + stats['bridges'], 1)
+        drift['objects_updated'] = updated
+        drift['events'] = len(events)
+        drift['drift'] = float(len(events) + updated) / objects
+        drift['seconds'] = time.time() - start
+        if events or updated:
+            LOGGER.warning("Local state had drifted from Asterisk by %d "
+                           "differences", len(events) + updated)
+
+        for key in self.totals:
+            self.totals[key] += drift[key]
+        self.last_drift = drift
+        self.passes += 1
+        return drift
+
+    def get_stats(self):
+        """Return a dict of reconciliation statistics."""
+        stats = dict(self.totals)
+        stats.update({
+            'passes': self.passes,
+            'errors': self.errors,
+            'last_drift': self.last_drift,
+        })
+        return stats
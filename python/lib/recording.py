@@ -15,79 +15,83 @@
 """
 
 
-class Recording:
+from model import Model
+
+
+class Recording(Model):
     """Definition of Recording object."""
-    def __init__(self, api):
-        """Initialize the Recording object."""
-        self.object_id = 1
-        self._api = api
+    __slots__ = ()
+
+    def __init__(self, api, data=None):
+        """Initialize the Recording object from the decoded JSON data
+        Asterisk returned for it, if any.
+        """
+        Model.__init__(self, api, data)
 
     def get_id(self):
         """Return the Recording object's id."""
         return self.object_id
 
-    def add_event_handler(self, event_name, handler):
+    def add_event_handler(self, event_name, handler, **batch_options):
         """Add an event handler for Stasis events on this object.
         For general events, use Asterisk.add_event_handler instead.
+        batch_options (batch_size, batch_latency, coalesce) have handler
+        called with batches of events.
         """
-        pass
+        self._api.add_event_handler(event_name, handler,
+                                    object_id=self.object_id,
+                                    **batch_options)
 
     def remove_event_handler(self, event_name, handler):
         """Remove an event handler for Stasis events on this object.
         For general events, use Asterisk.remove_event_handler instead.
         """
-        pass
+        return self._api.remove_event_handler(event_name, handler,
+                                              object_id=self.object_id)
 
     def delete(self):
         """Individual recording; Delete recording"""
         params = {}
 
-        self._api.call('/recordings/%s', http_method='DELETE',
-                       parameters=params, object_id=self.object_id)
-        is_success = True
-        return is_success
+        return self._api.invoke('void', '/recordings/%s', http_method='DELETE',
+                                parameters=params, object_id=self.object_id)
 
     def stop(self):
         """Stop recording"""
         params = {}
 
-        self._api.call('/recordings/%s/stop', http_method='POST',
-                       parameters=params, object_id=self.object_id)
-        is_success = True
-        return is_success
+        return self._api.invoke('void', '/recordings/%s/stop',
+                                http_method='POST', parameters=params,
+                                object_id=self.object_id)
 
     def pause(self):
         """Pause recording"""
         params = {}
 
-        self._api.call('/recordings/%s/pause', http_method='POST',
-                       parameters=params, object_id=self.object_id)
-        is_success = True
-        return is_success
+        return self._api.invoke('void', '/recordings/%s/pause',
+                                http_method='POST', parameters=params,
+                                object_id=self.object_id)
 
     def unpause(self):
         """Unpause recording"""
         params = {}
 
-        self._api.call('/recordings/%s/unpause', http_method='POST',
-                       parameters=params, object_id=self.object_id)
-        is_success = True
-        return is_success
+        return self._api.invoke('void', '/recordings/%s/unpause',
+                                http_method='POST', parameters=params,
+                                object_id=self.object_id)
 
     def mute(self):
         """Mute recording"""
         params = {}
 
-        self._api.call('/recordings/%s/mute', http_method='POST',
-                       parameters=params, object_id=self.object_id)
-        is_success = True
-        return is_success
+        return self._api.invoke('void', '/recordings/%s/mute',
+                                http_method='POST', parameters=params,
+                                object_id=self.object_id)
 
     def unmute(self):
         """Unmute recording"""
         params = {}
 
-        self._api.call('/recordings/%s/unmute', http_method='POST',
-                       parameters=params, object_id=self.object_id)
-        is_success = True
-        return is_success
+        return self._api.invoke('void', '/recordings/%s/unmute',
+                                http_method='POST', parameters=params,
+                                object_id=self.object_id)
@@ -0,0 +1,142 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+import re
+import time
+import threading
+from collections import OrderedDict
+
+
+RESOURCE_RE = re.compile('^/?(?:api/)?(\\w+)')
+
+
+def get_resource(path):
+    """Return the resource a path template belongs to, e.g. 'channels'
+    for /channels/%s/answer.
+
+    """
+    match = RESOURCE_RE.match(path)
+    return match.group(1) if match else path
+
+
+class ResponseCache:
+    """LRU cache of successful GET results with a TTL per path template.
+
+    ttls maps path templates (as passed to AsteriskRestAPI.call, e.g.
+    '/asterisk/info') to seconds; other paths use default_ttl, and are not
+    cached if it is 0. At most max_entries results are kept.
+
+    Entries are indexed by (resource, object id), so a write to one
+    object drops that object's entries and the resource's listings
+    without scanning the cache.
+
+    """
+    def __init__(self, ttls=None, default_ttl=0, max_entries=1000,
+                 clock=time.time):
+        """Initiate new ResponseCache instance.
+
+        clock returns the current time in seconds; tests may pass a fake.
+
+        """
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._index = {}
+        self._lock = threading.Lock()
+
+    def copy(self):
+        """Return a new, empty ResponseCache with the same settings."""
+        return ResponseCache(dict(self.ttls), self.default_ttl,
+                             self.max_entries, self.clock)
+
+    def get_ttl(self, path):
+        """Return the TTL in seconds for a path template."""
+        return self.ttls.get(path, self.default_ttl)
+
+    def get(self, key):
+        """Return the cached result for a call key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] < self.clock():
+                self._remove(key)
+                self.misses += 1
+                return None
+            # Mark as most recently used.
+            del self._entries[key]
+            self._entries[key] = entry
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, result):
+        """Cache a result for a call key, if its path has a TTL."""
+        ttl = self.get_ttl(key[0])
+        if ttl <= 0:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (self.clock() + ttl, result)
+            self._index.setdefault((get_resource(key[0]), key[1]),
+                                   set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, path, object_id=None):
+        """Drop the entries made stale by a write to path: those of the
+        object, if object_id is given, and the resource's listings.
+
+        """
+        resource = get_resource(path)
+        with self._lock:
+            for index_key in set([(resource, object_id), (resource, None)]):
+                for key in list(self._index.get(index_key, ())):
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._index.clear()
+
+    def _remove(self, key):
+        """Remove one entry; the lock must be held."""
+        del self._entries[key]
+        index_key = (get_resource(key[0]), key[1])
+        keys = self._index[index_key]
+        keys.discard(key)
+        if not keys:
+            del self._index[index_key]
+
+    def get_stats(self):
+        """Return a dict of cache statistics."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries),
+            }
@@ -0,0 +1,78 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+from model import get_model_class
+from model_list import ModelList
+from errors import AsteriskPyCallException, AsteriskPyBadRequestException, \
+    AsteriskPyNotFoundException, AsteriskPyConflictException, \
+    AsteriskPyServerException
+
+
+ERROR_CLASSES = {
+    400: AsteriskPyBadRequestException,
+    404: AsteriskPyNotFoundException,
+    409: AsteriskPyConflictException,
+    412: AsteriskPyConflictException,
+    422: AsteriskPyConflictException,
+}
+
+
+def get_error_class(status):
+    """Return the exception class for a failed call's HTTP status."""
+    if status in ERROR_CLASSES:
+        return ERROR_CLASSES[status]
+    if status is not None and status >= 500:
+        return AsteriskPyServerException
+    return AsteriskPyCallException
+
+
+def raise_for_result(result):
+    """Raise the AsteriskPyCallException matching a failed call result,
+    as returned by AsteriskRestAPI.call. A successful call whose response
+    is not valid JSON is a failure too.
+
+    """
+    if not result['success'] or result['error']:
+        status = result.get('status')
+        raise get_error_class(status)(result['error'], status)
+
+
+def decode_result(api, objects, response_class, result, class_prefix=''):
+    """Return the decoded response of a call, raising the matching
+    AsteriskPyCallException if it failed.
+
+    response_class is the Swagger responseClass of the operation. For the
+    name of a generated class (e.g. Channel), the response is loaded as
+    an instance of it through objects, an IdentityMap, and bound to api;
+    for its plural (Channels), as a ModelList of instances. void gives None,
+    other classes the decoded JSON. class_prefix is prepended to class
+    names, e.g. 'Async' for the asynchronous variants.
+
+    """
+    raise_for_result(result)
+    response = result['response']
+    if response_class == 'void' or response is None:
+        return None
+
+    model_class = get_model_class(class_prefix + response_class)
+    if model_class is not None and isinstance(response, dict):
+        return objects.load(model_class, api, response)
+
+    if response_class.endswith('s') and isinstance(response, list):
+        model_class = get_model_class(class_prefix + response_class[:-1])
+        if model_class is not None:
+            return ModelList([objects.load(model_class, api, data)
+                              for data in response])
+    return response
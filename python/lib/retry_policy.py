@@ -0,0 +1,59 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+import random
+
+
+class RetryPolicy:
+    """Decide whether and when a failed Asterisk API call is retried.
+
+    Only idempotent HTTP methods are retried, and only after a timeout, a
+    connection error or one of retry_statuses. The delay before retry n
+    (counting from 0) is drawn uniformly between 0 and
+    min(backoff_max, backoff_base * 2 ** n) ("full jitter"), so clients
+    retrying at the same moment spread out.
+
+    """
+    def __init__(self, max_retries=2, backoff_base=0.1, backoff_max=2.0,
+                 retry_methods=('GET', 'DELETE'),
+                 retry_statuses=(502, 503, 504), rng=None):
+        """Initiate new RetryPolicy instance.
+        Use max_retries=0 to disable retries. rng, a random.Random, draws
+        the delays; tests may pass a seeded one.
+
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_methods = retry_methods
+        self.retry_statuses = retry_statuses
+        self.rng = rng or random.Random()
+
+    def should_retry(self, http_method, attempt, failure):
+        """Return True if a call which failed with failure ('timeout',
+        'connection_error' or an HTTP status code) on attempt number
+        attempt may be tried again.
+
+        """
+        if attempt >= self.max_retries \
+                or http_method not in self.retry_methods:
+            return False
+        return failure in ('timeout', 'connection_error') \
+            or failure in self.retry_statuses
+
+    def get_delay(self, attempt):
+        """Return the number of seconds to wait before retry attempt."""
+        return self.rng.uniform(0, min(self.backoff_max,
+                                       self.backoff_base * 2 ** attempt))
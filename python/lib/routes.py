@@ -0,0 +1,44 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+from collections import namedtuple
+
+
+# One call of the API, as described by the ROUTES table of a module
+# generated with --routes. parameters holds an (argument name, wire name,
+# default) tuple for each argument of the method, in order.
+Route = namedtuple('Route', ['response_class', 'path', 'http_method',
+                             'sends_parameters', 'takes_object_id',
+                             'parameters'])
+
+
+def call_route(obj, route, values):
+    """Make the call of a Route for obj, an instance of a generated class,
+    and return what its API client's invoke returns. values are the
+    arguments of the method, in the order of route.parameters; those
+    which are empty are not sent.
+
+    """
+    params = {}
+    for (name, wire_name, default), value in zip(route.parameters, values):
+        if value:
+            params[wire_name] = value
+
+    kwargs = {'http_method': route.http_method}
+    if route.sends_parameters:
+        kwargs['parameters'] = params
+    if route.takes_object_id:
+        kwargs['object_id'] = obj.object_id
+    return obj._api.invoke(route.response_class, route.path, **kwargs)
@@ -0,0 +1,78 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+import threading
+
+
+def make_call_key(path, parameters=None, object_id=None):
+    """Return a hashable key identifying a call by path template, object
+    id and parameters.
+
+    """
+    params = tuple(sorted((name, repr(value))
+                          for name, value in (parameters or {}).items()))
+    return (path, object_id, params)
+
+
+class _Flight:
+    """A call in progress and, once finished, its outcome."""
+    def __init__(self):
+        """Initiate new _Flight instance."""
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time.
+
+    Threads asking for a key which is already being fetched wait for that
+    call and receive its result (the same object, which callers should not
+    modify) or its exception.
+
+    """
+    def __init__(self):
+        """Initiate new SingleFlight instance."""
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args, **kwargs):
+        """Return (result, shared): the result of func(*args, **kwargs), or
+        of the identical call already in flight, and whether it was shared
+        with such a call.
+
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return (flight.result, True)
+
+        try:
+            flight.result = func(*args, **kwargs)
+        except Exception, err:
+            flight.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return (flight.result, False)
@@ -0,0 +1,382 @@
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+import time
+import threading
+from reconciler import Reconciler
+from event_dispatcher import get_event_data
+
+
+class StateMirror:
+    """Local copy of the channels and bridges of Asterisk, kept current
+    by Stasis events.
+
+    The mirror starts from a snapshot (GET /channels and /bridges), taken
+    on the first read, and then applies every channel and bridge event.
+    Events are applied on the thread receiving them, before they are
+    queued for the handlers, so in the order Asterisk sent them, and
+    including those the dispatcher's queues drop when they overflow.
+    Channels are indexed by id, state and bridge membership.
+
+    The mirror is current while the event stream which fed it since the
+    snapshot stays connected. Otherwise events may have been lost; reads
+    are still answered locally for max_staleness seconds after the mirror
+    was last known current, then a new snapshot is taken. Without an
+    event stream (no app given), it is thus a copy refreshed every
+    max_staleness seconds. Reads can also force a refresh.
+
+    Reads return the decoded JSON objects; do not modify them.
+
+    """
+    def __init__(self, max_staleness=5, reconcile_interval=None):
+        """Initiate new StateMirror instance.
+
+        If reconcile_interval is given, a Reconciler compares the mirror
+        with Asterisk that often, fixes it and reports the differences as
+        synthetic events.
+
+        """
+        self.max_staleness = max_staleness
+        self.reconcile_interval = reconcile_interval
+        self.reconciler = None
+        self.events_applied = 0
+        self.refreshes = 0
+        self._api = None
+        self._channels = {}
+        self._channels_by_state = {}
+        self._bridges = {}
+        self._bridge_of_channel = {}
+        self._synced = False
+        self._synced_stream_state = None
+        self._current_at = 0
+        self._buffer = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def attach(self, api):
+        """Feed the mirror from api, an AsteriskRestAPI or ClusterRestAPI.
+        Asterisk is not contacted until the first read.
+
+        """
+        self._api = api
+        api.add_event_listener(self.handle_event)
+        if api.get_app() is not None:
+            api.start_events()
+        if self.reconcile_interval:
+            self.reconciler = Reconciler(self, api, self.reconcile_interval)
+            self.reconciler.start()
+
+    def close(self):
+        """Stop the reconciler, if any."""
+        if self.reconciler is not None:
+            self.reconciler.stop()
+
+    def refresh(self):
+        """Replace the mirror's content by a new snapshot from Asterisk.
+        Events received meanwhile are applied after it.
+
+        """
+        self._sync(self._replace)
+
+    def reconcile(self):
+        """Fetch channels and bridges from Asterisk, bypassing any
+        response cache, and fix the mirror where it differs, e.g. because
+        events were lost. Return the list of synthetic events describing
+        the differences, which have been applied to the mirror (see
+        make_diff_events), and the number of objects whose other fields
+        were updated, as a tuple. If the mirror had no snapshot yet, take
+        one and return ([], 0).
+
+        """
+        if not self._synced:
+            self.refresh()
+            return ([], 0)
+        return self._sync(self._reconcile)
+
+    def _sync(self, apply_snapshot):
+        """Fetch a snapshot, pass it to apply_snapshot with the lock held,
+        then apply the events received meanwhile. Return what
+        apply_snapshot returns.
+
+        """
+        with self._refresh_lock:
+            stream_state = self._api.get_event_stream_state()
+            with self._lock:
+                self._buffer = []
+            try:
+                channels = self._fetch('/channels')
+                bridges = self._fetch('/bridges')
+            except Exception:
+                with self._lock:
+                    self._apply_buffer()
+                raise
+
+            with self._lock:
+                result = apply_snapshot(channels, bridges)
+                self._apply_buffer()
+                self._synced = True
+                self._synced_stream_state = stream_state
+                self._current_at = time.time()
+            return result
+
+    def _apply_buffer(self):
+        """Apply the events buffered during a snapshot, lock held."""
+        buffered, self._buffer = self._buffer, None
+        for event in buffered:
+            self._apply(event)
+
+    def _replace(self, channels, bridges):
+        """Replace the mirror's content, lock held."""
+        self._channels = {}
+        self._channels_by_state = {}
+        self._bridges = {}
+        self._bridge_of_channel = {}
+        for channel in channels:
+            self._put_channel(channel)
+        for bridge in bridges:
+            self._put_bridge(bridge)
+        self.refreshes += 1
+
+    def _reconcile(self, channels, bridges):
+        """Fix the mirror's content, lock held; see reconcile."""
+        channels = dict((channel['id'], channel) for channel in channels)
+        bridges = dict((bridge['id'], bridge) for bridge in bridges)
+        events = make_diff_events(self._channels, channels, self._bridges,
+                                  bridges)
+        for event in events:
+            self._apply(event)
+        # Changes no event describes, e.g. of a channel's caller id, and
+        # channels which left a bridge after they were destroyed.
+        updated = 0
+        for channel_id in set(self._channels) - set(channels):
+            self._remove_channel(channel_id)
+        for channel_id, channel in channels.items():
+            if self._channels.get(channel_id) != channel:
+                self._put_channel(channel)
+                updated += 1
+        for bridge_id, bridge in bridges.items():
+            if self._bridges.get(bridge_id) != bridge:
+                self._put_bridge(bridge)
+                updated += 1
+        return (events, updated)
+
+    def _fetch(self, path):
+        """Return the list of objects of a listing call, made to Asterisk
+        even if the client has a response cache.
+
+        """
+        result = self._api.call(path, http_method='GET', use_cache=False)
+        if not result['success'] \
+                or not isinstance(result['response'], list):
+            raise ValueError("Cannot fetch %s: %s"
+                             % (path, result['error']))
+        return result['response']
+
+    def handle_event(self, event):
+        """Apply a Stasis event to the mirror. Synthetic events come from
+        the mirror itself and are already applied.
+
+        """
+        if event.get('synthetic'):
+            return
+        with self._lock:
+            if self._buffer is not None:
+                self._buffer.append(event)
+            else:
+                self._apply(event)
+
+    def _apply(self, event):
+        """Apply an event, lock held."""
+        event_type = event.get('type')
+        bridge = get_event_data(event, 'bridge')
+        if bridge is not None and 'id' in bridge:
+            if event_type == 'BridgeDestroyed':
+                self._remove_bridge(bridge['id'])
+            else:
+                self._put_bridge(bridge)
+        channel = get_event_data(event, 'channel')
+        if channel is not None and 'id' in channel:
+            if event_type == 'ChannelDestroyed':
+                self._remove_channel(channel['id'])
+            else:
+                self._put_channel(channel)
+        self.events_applied += 1
+
+    def _put_channel(self, channel):
+        """Add or replace a channel, lock held."""
+        old = self._channels.get(channel['id'])
+        if old is not None:
+            self._channels_by_state[old.get('state')].discard(old['id'])
+        self._channels[channel['id']] = channel
+        self._channels_by_state.setdefault(channel.get('state'),
+                                           set()).add(channel['id'])
+
+    def _remove_channel(self, channel_id):
+        """Remove a channel, lock held."""
+        old = self._channels.pop(channel_id, None)
+        if old is not None:
+            self._channels_by_state[old.get('state')].discard(channel_id)
+        self._bridge_of_channel.pop(channel_id, None)
+
+    def _put_bridge(self, bridge):
+        """Add or replace a bridge and its channels' membership, lock
+        held.
+
+        """
+        self._remove_bridge(bridge['id'])
+        self._bridges[bridge['id']] = bridge
+        for channel_id in bridge.get('channels') or []:
+            self._bridge_of_channel[channel_id] = bridge['id']
+
+    def _remove_bridge(self, bridge_id):
+        """Remove a bridge and its channels' membership, lock held."""
+        old = self._bridges.pop(bridge_id, None)
+        if old is None:
+            return
+        for channel_id in old.get('channels') or []:
+            if self._bridge_of_channel.get(channel_id) == bridge_id:
+                del self._bridge_of_channel[channel_id]
+
+    def is_current(self):
+        """Return True if every event since the snapshot was received."""
+        return self._synced and self._api.get_event_stream_state() \
+            == self._synced_stream_state and self._synced_stream_state[0]
+
+    def _ensure_fresh(self, refresh, max_staleness):
+        """Take a snapshot if forced, or if the mirror is too stale."""
+        now = time.time()
+        if not refresh:
+            if self.is_current():
+                self._current_at = now
+                return
+            if max_staleness is None:
+                max_staleness = self.max_staleness
+            if self._synced and now - self._current_at <= max_staleness:
+                return
+        self.refresh()
+
+    def get_channels(self, refresh=False, max_staleness=None):
+        """Return the list of channels. refresh forces a new snapshot;
+        max_staleness overrides the constructor's.
+
+        """
+        self._ensure_fresh(refresh, max_staleness)
+        with self._lock:
+            return self._channels.values()
+
+    def get_channel(self, channel_id, refresh=False, max_staleness=None):
+        """Return a channel, or None."""
+        self._ensure_fresh(refresh, max_staleness)
+        return self._channels.get(channel_id)
+
+    def get_channels_by_state(self, state, refresh=False,
+                              max_staleness=None):
+        """Return the list of channels in state, e.g. 'Up'."""
+        self._ensure_fresh(refresh, max_staleness)
+        with self._lock:
+            return [self._channels[channel_id] for channel_id
+                    in self._channels_by_state.get(state, ())]
+
+    def get_bridges(self, refresh=False, max_staleness=None):
+        """Return the list of bridges."""
+        self._ensure_fresh(refresh, max_staleness)
+        with self._lock:
+            return self._bridges.values()
+
+    def get_bridge(self, bridge_id, refresh=False, max_staleness=None):
+        """Return a bridge, or None."""
+        self._ensure_fresh(refresh, max_staleness)
+        return self._bridges.get(bridge_id)
+
+    def get_channel_bridge(self, channel_id, refresh=False,
+                           max_staleness=None):
+        """Return the bridge a channel is in, or None."""
+        self._ensure_fresh(refresh, max_staleness)
+        with self._lock:
+            return self._bridges.get(self._bridge_of_channel.get(channel_id))
+
+    def get_stats(self):
+        """Return a dict of mirror statistics."""
+        current = self.is_current()
+        if current or not self._synced:
+            stale_for = 0.0
+        else:
+            stale_for = time.time() - self._current_at
+        return {
+            'channels': len(self._channels),
+            'bridges': len(self._bridges),
+            'synced': self._synced,
+            'current': current,
+            'stale_for': stale_for,
+            'events_applied': self.events_applied,
+            'refreshes': self.refreshes,
+        }
+
+
+def make_event(event_type, **objects):
+    """Return a synthetic Stasis event about objects."""
+    event = {'type': event_type, 'synthetic': True,
+             'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime())}
+    event.update(objects)
+    return event
+
+
+def make_diff_events(old_channels, channels, old_bridges, bridges):
+    """Return the synthetic events turning the channels and bridges
+    old_channels and old_bridges (dicts by id) into channels and bridges:
+    ChannelCreated, ChannelStateChange and ChannelDestroyed for channels,
+    BridgeCreated and BridgeDestroyed for bridges, ChannelEnteredBridge
+    and ChannelLeftBridge for membership changes.
+
+    Ids are compared as sets and only objects present on both sides are
+    compared field by field.
+
+    """
+    events = []
+    channel_ids = set(channels)
+    old_channel_ids = set(old_channels)
+    for channel_id in channel_ids - old_channel_ids:
+        events.append(make_event('ChannelCreated',
+                                 channel=channels[channel_id]))
+    for channel_id in channel_ids & old_channel_ids:
+        channel = channels[channel_id]
+        if channel.get('state') != old_channels[channel_id].get('state'):
+            events.append(make_event('ChannelStateChange', channel=channel))
+
+    bridge_ids = set(bridges)
+    old_bridge_ids = set(old_bridges)
+    for bridge_id in bridge_ids - old_bridge_ids:
+        events.append(make_event('BridgeCreated', bridge=bridges[bridge_id]))
+    for bridge_id in bridge_ids:
+        bridge = bridges[bridge_id]
+        members = set(bridge.get('channels') or [])
+        old_members = set((old_bridges.get(bridge_id) or {})
+                          .get('channels') or [])
+        for channel_id in members - old_members:
+            events.append(make_event(
+                'ChannelEnteredBridge', bridge=bridge,
+                channel=channels.get(channel_id, {'id': channel_id})))
+        for channel_id in old_members - members:
+            events.append(make_event(
+                'ChannelLeftBridge', bridge=bridge,
+                channel=channels.get(channel_id, {'id': channel_id})))
+    for bridge_id in old_bridge_ids - bridge_ids:
+        events.append(make_event('BridgeDestroyed',
+                                 bridge=old_bridges[bridge_id]))
+
+    for channel_id in old_channel_ids - channel_ids:
+        events.append(make_event('ChannelDestroyed',
+                                 channel=old_channels[channel_id]))
+    return events
@@ -22,17 +22,31 @@ import json
 import requests
 
 
-HOST = '192.168.1.124'
+HOST = 'localhost'
 PORT = '8088'
-PATH = '/home/erin/asterisk_rest_libraries'
+PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                    'test_resources')
 
 
-def main():
+def main(argv):
     """Test Asterisk REST API with HTTP requests derived from Swagger
     JSON Resources.  This does not use generated code or any piece of
     the library package.
 
+    Takes --host, --port and --path (of the Swagger JSON resources);
+    fake_asterisk.py can stand in for Asterisk.
+
     """
+    global HOST, PORT, PATH
+    for a in argv[1:]:
+        pieces = a.split("=", 1)
+        if pieces[0] == '--host':
+            HOST = pieces[1]
+        elif pieces[0] == '--port':
+            PORT = pieces[1]
+        elif pieces[0] == '--path':
+            PATH = pieces[1]
+
     os.chdir(PATH)
     for jsonfile in glob.glob("*.json"):
         res = get_json_from_file(jsonfile)
@@ -117,4 +131,4 @@ def generate_params(ops):
     return res
 
 if __name__ == "__main__":
-    sys.exit(main() or 0)
+    sys.exit(main(sys.argv) or 0)
@@ -18,12 +18,17 @@
 import sys
 sys.path.append('python/lib')
 import asteriskpy
+from errors import AsteriskPyCallException
 
 
 def main(argv):
-    """Test automatically generated python module."""
+    """Test automatically generated python module.
+
+    Takes --api_url=...; defaults to a local Asterisk, or fake_asterisk.py.
+
+    """
     args = {
-        'api_url': 'http://192.168.1.124:8088/stasis',
+        'api_url': 'http://localhost:8088/stasis',
     }
     for a in argv:
         pieces = a.split("=", 1)
@@ -48,34 +53,41 @@ def main(argv):
 
     for channel in channels:
         print "got channel with id %s" % (channel.get_id())
-        print "method delete returns %s" % (channel.delete())
-        print "method reject returns %s" % (channel.reject())
-        print "method answer returns %s" % (channel.answer())
-        print "method mute returns %s" % (channel.mute())
-        print "method unmute returns %s" % (channel.unmute())
-        print "method record returns %s" % (channel.record('rec name'))
-        print "method dial returns %s" % (channel.dial())
+        try_method('delete', channel.delete)
+        try_method('reject', channel.reject)
+        try_method('answer', channel.answer)
+        try_method('mute', channel.mute)
+        try_method('unmute', channel.unmute)
+        try_method('record', channel.record, 'rec name')
+        try_method('dial', channel.dial)
 
     chan = asteriskpy.Channel(ast._api)
     for bridge in bridges:
         print "got bridge with id %s" % (bridge.get_id())
-        print "method delete returns %s" % (bridge.delete())
-        print "method add_channel_to returns %s" \
-            % (bridge.add_channel_to(chan.get_id()))
-        print "method remove_channel_from returns %s" \
-            % (bridge.remove_channel_from(chan.get_id()))
-        print "method record returns %s" % (bridge.record('rec name'))
+        try_method('delete', bridge.delete)
+        try_method('add_channel_to', bridge.add_channel_to, chan.get_id())
+        try_method('remove_channel_from', bridge.remove_channel_from,
+                   chan.get_id())
+        try_method('record', bridge.record, 'rec name')
 
     for recording in recordings:
         print "got recording with id %s" % (recording.get_id())
-        print "method delete returns %s" % (recording.delete())
-        print "method stop returns %s" % (recording.stop())
-        print "method pause returns %s" % (recording.pause())
-        print "method unpause returns %s" % (recording.unpause())
-        print "method mute returns %s" % (recording.mute())
-        print "method unmute returns %s" % (recording.unmute())
+        try_method('delete', recording.delete)
+        try_method('stop', recording.stop)
+        try_method('pause', recording.pause)
+        try_method('unpause', recording.unpause)
+        try_method('mute', recording.mute)
+        try_method('unmute', recording.unmute)
 
     return 0
 
+
+def try_method(name, method, *args):
+    """Print what a method returns, or the error Asterisk answered with."""
+    try:
+        print "method %s returns %s" % (name, method(*args))
+    except AsteriskPyCallException, err:
+        print "method %s fails: %s" % (name, err)
+
 if __name__ == "__main__":
     sys.exit(main(sys.argv) or 0)
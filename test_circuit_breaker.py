@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+
+import sys
+sys.path.append('python/lib')
+import fake_asterisk
+from asterisk_rest_api import AsteriskRestAPI
+from circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from retry_policy import RetryPolicy
+from errors import AsteriskPyCircuitOpenException
+
+
+class FakeClock:
+    """Clock which only moves when told to."""
+    def __init__(self, now=1000.0):
+        """Initiate new FakeClock instance."""
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def main(argv):
+    """Test CircuitBreaker with a fake clock: opening after consecutive
+    failures, half-open probing, and failing fast in front of
+    fake_asterisk.py.
+
+    """
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10,
+                             clock=clock)
+    failures = 0
+
+    breaker.record_failure()
+    failures += check("closed below threshold", get_state(breaker), CLOSED)
+    breaker.record_failure()
+    failures += check("open at threshold", get_state(breaker), OPEN)
+    failures += check("refused while open", is_allowed(breaker), False)
+    clock.now += 9.9
+    failures += check("refused until recovery", is_allowed(breaker), False)
+    clock.now += 0.1
+    failures += check("probe allowed", is_allowed(breaker), True)
+    failures += check("half open", get_state(breaker), HALF_OPEN)
+    failures += check("one probe at a time", is_allowed(breaker), False)
+    breaker.record_failure()
+    failures += check("failed probe opens", get_state(breaker), OPEN)
+    clock.now += 10
+    failures += check("new probe allowed", is_allowed(breaker), True)
+    breaker.record_success()
+    failures += check("successful probe closes", get_state(breaker),
+                      CLOSED)
+    failures += check("calls allowed", [is_allowed(breaker)
+                                        for i in range(3)], [True] * 3)
+
+    failures += check_with_server()
+    return 1 if failures else 0
+
+
+def check_with_server():
+    """Have a breaker open on a failing fake_asterisk.py, refuse calls
+    without sending them, and close on a successful probe once the server
+    recovers. Return the failure count.
+
+    """
+    server = fake_asterisk.FakeAsteriskServer(('127.0.0.1', 0),
+                                              error_rate=1.0)
+    server.start()
+    clock = FakeClock()
+    api = AsteriskRestAPI(uri=server.get_uri(),
+                          retry_policy=RetryPolicy(max_retries=0),
+                          circuit_breaker=CircuitBreaker(
+                              failure_threshold=2, recovery_timeout=10,
+                              clock=clock))
+    requests_sent = count_requests(api)
+
+    failures = 0
+    statuses = [api.call('/asterisk/info')['status'] for i in range(2)]
+    failures += check("server errors", statuses, [500, 500])
+    failures += check("call refused", is_refused(api), True)
+    failures += check("requests sent", requests_sent, [2])
+
+    server.error_rate = 0.0
+    clock.now += 10
+    failures += check("probe succeeds",
+                      api.call('/asterisk/info')['success'], True)
+    failures += check("closed again", api.get_circuit_state()['state'],
+                      CLOSED)
+    failures += check("requests sent with probe", requests_sent, [3])
+
+    api.close()
+    server.shutdown()
+    return failures
+
+
+def get_state(breaker):
+    """Return the state of a breaker."""
+    return breaker.get_state()['state']
+
+
+def is_allowed(breaker):
+    """Return True if the breaker lets a call through now."""
+    try:
+        breaker.before_call()
+    except AsteriskPyCircuitOpenException:
+        return False
+    return True
+
+
+def is_refused(api):
+    """Return True if api refuses a call with an open circuit."""
+    try:
+        api.call('/asterisk/info')
+    except AsteriskPyCircuitOpenException:
+        return True
+    return False
+
+
+def count_requests(api):
+    """Count the GET requests api sends; return a one-item list holding
+    the count.
+
+    """
+    count = [0]
+    get = api._session.get
+
+    def counted_get(*args, **kwargs):
+        count[0] += 1
+        return get(*args, **kwargs)
+    api._session.get = counted_get
+    return count
+
+
+def check(name, got, expected):
+    """Print whether got is expected; return 1 if not, else 0."""
+    if got == expected:
+        print "%s: ok" % (name)
+        return 0
+    print "%s: got %s, expected %s" % (name, got, expected)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv) or 0)
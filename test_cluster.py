@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+
+import sys
+sys.path.append('python/lib')
+import fake_asterisk
+from cluster import ClusterRestAPI
+
+
+def main(argv):
+    """Test ClusterRestAPI against two fake_asterisk.py servers: a GET of
+    an object of unknown owner is made once, and the owners remembered
+    are bounded.
+
+    """
+    servers = []
+    for i in range(2):
+        server = fake_asterisk.FakeAsteriskServer(
+            ('127.0.0.1', 0), asterisk=fake_asterisk.FakeAsterisk(channels=3))
+        server.start()
+        servers.append(server)
+    api = ClusterRestAPI([each.get_uri() for each in servers],
+                         max_owners=4)
+    calls = count_calls(api)
+
+    channel_id = sorted(servers[1].asterisk.channels)[0]
+    result = api.call('/channels/%s', object_id=channel_id)
+    failures = 0
+    failures += check("object found", result['response']['id'], channel_id)
+    failures += check("calls per node", calls, [1, 1])
+    failures += check("owner", api.get_owner_uri(channel_id),
+                      servers[1].get_uri())
+
+    calls[:] = [0, 0]
+    api.call('/channels/%s/answer', http_method='POST', object_id=channel_id)
+    failures += check("calls to the owner only", calls, [0, 1])
+
+    result = api.call('/channels')
+    failures += check("listing", len(result['response']), 6)
+    failures += check("owners remembered", len(api._owners), 4)
+    failures += check("most recent kept",
+                      [api.get_owner_uri(channel['id']) is not None
+                       for channel in result['response']],
+                      [False, False, True, True, True, True])
+
+    api.close()
+    for server in servers:
+        server.shutdown()
+    return 1 if failures else 0
+
+
+def count_calls(api):
+    """Count the calls made to each node of api; return the list of
+    counts, updated as calls are made.
+
+    """
+    calls = [0] * len(api.nodes)
+    for i, node in enumerate(api.nodes):
+        node.api.call = make_counted(node.api.call, calls, i)
+    return calls
+
+
+def make_counted(call, calls, i):
+    """Return call, counting each of its calls in calls[i]."""
+    def counted_call(*args, **kwargs):
+        calls[i] += 1
+        return call(*args, **kwargs)
+    return counted_call
+
+
+def check(name, got, expected):
+    """Print whether got is expected; return 1 if not, else 0."""
+    if got == expected:
+        print "%s: ok" % (name)
+        return 0
+    print "%s: got %s, expected %s" % (name, got, expected)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv) or 0)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+
+import sys
+sys.path.append('python/lib')
+import threading
+from event_dispatcher import EventDispatcher
+from event_queue import DROP_OLDEST
+
+
+def main(argv):
+    """Test per-object event dispatch, that the handlers of an object are
+    removed once it is destroyed, and that the queue counters survive
+    stopping the workers.
+
+    Takes --workers=...; defaults to 0, delivering on the calling thread.
+
+    """
+    args = {
+        'workers': '0',
+    }
+    for a in argv:
+        pieces = a.split("=", 1)
+        try:
+            args[pieces[0].strip('-')] = pieces[1]
+        except IndexError:
+            args[pieces[0].strip('-')] = True
+
+    dispatcher = EventDispatcher(workers=int(args['workers']))
+    received = []
+
+    def on_event(event):
+        received.append((event['type'], event['channel']['id']))
+
+    dispatcher.add_handler('ChannelStateChange', on_event, object_id='ch1')
+    dispatcher.add_handler('ChannelDestroyed', on_event, object_id='ch1')
+    dispatcher.add_handler('ChannelStateChange', on_event, object_id='ch2')
+    print "registered %d handlers" % (dispatcher.get_stats()['handlers'])
+
+    dispatcher.dispatch(make_event('ChannelStateChange', 'ch1'))
+    dispatcher.dispatch(make_event('ChannelStateChange', 'ch2'))
+    dispatcher.dispatch(make_event('ChannelStateChange', 'ch3'))
+    dispatcher.dispatch(make_event('ChannelDestroyed', 'ch1'))
+    dispatcher.dispatch(make_event('ChannelStateChange', 'ch1'))
+    dispatcher.close()
+
+    failures = 0
+    failures += check("events delivered", received, [
+        ('ChannelStateChange', 'ch1'),
+        ('ChannelStateChange', 'ch2'),
+        ('ChannelDestroyed', 'ch1'),
+    ], key=sorted)
+    failures += check("handlers left", dispatcher.get_stats()['handlers'], 1)
+    failures += check("objects with handlers",
+                      sorted(k[1] for k in dispatcher._index), ['ch2'])
+    failures += check_stats_after_close()
+    return 1 if failures else 0
+
+
+def check_stats_after_close():
+    """Overflow a queue, stop and restart the workers, and check that the
+    drop and depth counters did not go back. Return the failure count.
+
+    """
+    dispatcher = EventDispatcher(workers=1, queue_size=1,
+                                 overflow=DROP_OLDEST)
+    release = threading.Event()
+    dispatcher.add_handler('*', lambda event: release.wait(5))
+    # One taken by the blocked worker at most, one waiting, two dropped.
+    for i in range(4):
+        dispatcher.dispatch(make_event('ChannelStateChange', 'ch1'))
+    before = dispatcher.get_stats()
+    release.set()
+    dispatcher.close()
+    closed = dispatcher.get_stats()
+    dispatcher.dispatch(make_event('ChannelStateChange', 'ch1'))
+    dispatcher.close()
+    restarted = dispatcher.get_stats()
+
+    failures = 0
+    failures += check("events dropped", before['events_dropped'] >= 2, True)
+    for name in ('events_dropped', 'queue_max_depth', 'producer_waits',
+                 'dropped_by_type'):
+        failures += check("%s after close" % (name), closed[name],
+                          before[name])
+        failures += check("%s after restart" % (name), restarted[name],
+                          before[name])
+    failures += check("events dispatched", restarted['events_dispatched'],
+                      5 - before['events_dropped'])
+    return failures
+
+
+def make_event(event_type, channel_id):
+    """Return a Stasis event about one channel."""
+    return {'type': event_type, 'channel': {'id': channel_id}}
+
+
+def check(name, got, expected, key=None):
+    """Print whether got is expected; return 1 if not, else 0."""
+    if key is not None:
+        got, expected = key(got), key(expected)
+    if got == expected:
+        print "%s: ok" % (name)
+        return 0
+    print "%s: got %s, expected %s" % (name, got, expected)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv) or 0)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+
+import sys
+sys.path.append('python/lib')
+import time
+import threading
+import asteriskpy
+import fake_asterisk
+
+
+def main(argv):
+    """Test the Stasis event WebSocket against fake_asterisk.py: an event
+    caused by a REST call reaches the handlers of its channel once, with
+    the live Channel instance, and those handlers are removed when the
+    channel is destroyed.
+
+    """
+    server = fake_asterisk.FakeAsteriskServer(('127.0.0.1', 0))
+    server.start()
+    ast = asteriskpy.AsteriskPy(api_url=server.get_uri(), app='test')
+    channel = ast.create_channel({'endpoint': 'SIP/100'})
+    other = ast.create_channel({'endpoint': 'SIP/101'})
+
+    received = []
+    destroyed = threading.Event()
+    channel.add_event_handler('ChannelStateChange', received.append)
+    # Events about one channel are handled in order, so this one comes
+    # after the others.
+    channel.add_event_handler('ChannelDestroyed',
+                              lambda event: destroyed.set())
+    failures = 0
+    failures += check("connected", wait_until_connected(ast, 5), True)
+
+    other.answer()
+    channel.answer()
+    channel.delete()
+    destroyed.wait(5)
+    ast._api.close()
+
+    failures += check("handler calls", len(received), 1)
+    failures += check("event object", received and
+                      received[0]['channel'] is channel, True)
+    failures += check("channel state", channel.state, 'Up')
+    failures += check("handlers left",
+                      ast._api.get_event_stats()['handlers'], 0)
+    server.shutdown()
+    return 1 if failures else 0
+
+
+def wait_until_connected(ast, timeout):
+    """Return True once the event stream of ast is connected, False if it
+    is not after timeout seconds.
+
+    """
+    deadline = time.time() + timeout
+    while not ast._api.get_event_stream_state()[0]:
+        if time.time() >= deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def check(name, got, expected):
+    """Print whether got is expected; return 1 if not, else 0."""
+    if got == expected:
+        print "%s: ok" % (name)
+        return 0
+    print "%s: got %s, expected %s" % (name, got, expected)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv) or 0)
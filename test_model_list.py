@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+
+import sys
+sys.path.append('python/lib')
+import requests
+import asteriskpy
+import fake_asterisk
+
+
+def main(argv):
+    """Test the bulk operations of ModelList against fake_asterisk.py:
+    a call failing at the HTTP level is reported in the BatchResult
+    without stopping the others.
+
+    """
+    server = fake_asterisk.FakeAsteriskServer(
+        ('127.0.0.1', 0), asterisk=fake_asterisk.FakeAsterisk(channels=4))
+    server.start()
+    ast = asteriskpy.AsteriskPy(api_url=server.get_uri())
+
+    channels = ast.get_channels()
+    broken_id = channels[1].get_id()
+    break_requests_for(ast._api._session, broken_id)
+    result = channels.mute_all()
+
+    failures = 0
+    failures += check("results", len(result), 4)
+    failures += check("failed objects",
+                      [r['object'] for i, r in result.get_failures()],
+                      [channels[1]])
+    failures += check("failure reported", 'broken' in
+                      (result[1]['error'] or ''), True)
+    failures += check("muted in Asterisk",
+                      sorted(channel_id for channel_id, channel
+                             in server.asterisk.channels.items()
+                             if channel['muted']),
+                      sorted(channel.get_id() for channel in channels
+                             if channel.get_id() != broken_id))
+    failures += check("timing", result.get_timing()['failures'], 1)
+
+    ast._api.close()
+    server.shutdown()
+    return 1 if failures else 0
+
+
+def break_requests_for(session, object_id):
+    """Make the POST requests of session about object_id fail as a broken
+    HTTP response would.
+
+    """
+    post = session.post
+
+    def broken_post(url, **kwargs):
+        if object_id in url:
+            raise requests.exceptions.ChunkedEncodingError(
+                "broken response for %s" % (object_id))
+        return post(url, **kwargs)
+    session.post = broken_post
+
+
+def check(name, got, expected):
+    """Print whether got is expected; return 1 if not, else 0."""
+    if got == expected:
+        print "%s: ok" % (name)
+        return 0
+    print "%s: got %s, expected %s" % (name, got, expected)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv) or 0)
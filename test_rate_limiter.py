@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+
+import sys
+sys.path.append('python/lib')
+import fake_asterisk
+from asterisk_rest_api import AsteriskRestAPI
+from rate_limiter import RateLimiter, ORIGINATE, READ
+from errors import AsteriskPyRateLimitException
+
+
+class FakeTime:
+    """Clock which only moves when told to, or when slept on if
+    sleep_moves is True.
+
+    """
+    def __init__(self, now=1000.0, sleep_moves=True):
+        """Initiate new FakeTime instance."""
+        self.now = now
+        self.sleep_moves = sleep_moves
+        self.sleeps = []
+
+    def clock(self):
+        """Return the current fake time."""
+        return self.now
+
+    def sleep(self, seconds):
+        """Record a sleep, and move the clock by it if sleep_moves."""
+        self.sleeps.append(seconds)
+        if self.sleep_moves:
+            self.now += seconds
+
+
+def main(argv):
+    """Test RateLimiter with a fake clock: blocking, failing fast,
+    estimated waits, and the waits recorded by AsteriskRestAPI.
+
+    """
+    failures = 0
+
+    fake = FakeTime()
+    limiter = make_limiter(fake, rate=2, burst=2)
+    failures += check("burst without waiting",
+                      [limiter.acquire(READ) for i in range(2)], [0.0, 0.0])
+    failures += check("estimated wait", limiter.estimate_wait(READ), 0.5)
+    failures += check("estimate takes no token",
+                      limiter.estimate_wait(READ), 0.5)
+    failures += check("refused beyond max_wait",
+                      get_retry_after(limiter, READ, max_wait=0.1), 0.5)
+    failures += check("blocking wait", limiter.acquire(READ), 0.5)
+    failures += check("slept", fake.sleeps, [0.5])
+    fake.now += 1
+    failures += check("refilled", limiter.estimate_wait(READ), 0.0)
+
+    # Blocked callers reserve their token, so later ones wait longer.
+    fake = FakeTime(sleep_moves=False)
+    limiter = make_limiter(fake, rate=1, burst=1)
+    failures += check("waits in order",
+                      [limiter.acquire(READ) for i in range(3)],
+                      [0.0, 1.0, 2.0])
+
+    fake = FakeTime()
+    limiter = make_limiter(fake, class_limits={ORIGINATE: (1, 1)},
+                           mode='fail')
+    failures += check("first originate", limiter.acquire(ORIGINATE), 0.0)
+    failures += check("fail fast", get_retry_after(limiter, ORIGINATE), 1.0)
+    failures += check("other classes unlimited",
+                      [limiter.acquire(READ) for i in range(3)],
+                      [0.0] * 3)
+
+    failures += check_with_server()
+    return 1 if failures else 0
+
+
+def check_with_server():
+    """Check AsteriskRestAPI waits on its limiter and records the wait in
+    its metrics. Return the failure count.
+
+    """
+    server = fake_asterisk.FakeAsteriskServer(('127.0.0.1', 0))
+    server.start()
+    fake = FakeTime()
+    api = AsteriskRestAPI(uri=server.get_uri(), rate_limiter=make_limiter(
+        fake, class_limits={READ: (2, 1)}))
+    failures = 0
+    for i in range(3):
+        api.call('/asterisk/info')
+    failures += check("slept", fake.sleeps, [0.5, 0.5])
+    failures += check("wait recorded",
+                      'asteriskpy_rate_limit_wait_seconds_sum{class="read"} '
+                      '1.0' in api.export_metrics().split('\n'), True)
+    api.close()
+    server.shutdown()
+    return failures
+
+
+def make_limiter(fake, **kwargs):
+    """Return a RateLimiter on the fake time of a FakeTime."""
+    return RateLimiter(clock=fake.clock, sleep=fake.sleep, **kwargs)
+
+
+def get_retry_after(limiter, operation_class, max_wait=None):
+    """Return the retry_after of the AsteriskPyRateLimitException thrown by
+    limiter for a call, or None if the call is allowed.
+
+    """
+    try:
+        limiter.acquire(operation_class, max_wait)
+    except AsteriskPyRateLimitException, err:
+        return err.retry_after
+    return None
+
+
+def check(name, got, expected):
+    """Print whether got is expected; return 1 if not, else 0."""
+    if got == expected:
+        print "%s: ok" % (name)
+        return 0
+    print "%s: got %s, expected %s" % (name, got, expected)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv) or 0)
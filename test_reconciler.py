@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+
+import sys
+sys.path.append('python/lib')
+import fake_asterisk
+from asterisk_rest_api import AsteriskRestAPI
+from reconciler import Reconciler
+from state_mirror import StateMirror
+
+
+def main(argv):
+    """Test Reconciler against fake_asterisk.py: changes made while no
+    events arrive are reported as drift by kind, fixed in the mirror and
+    dispatched as synthetic events, and a pass finding nothing reports
+    no drift.
+
+    """
+    server = fake_asterisk.FakeAsteriskServer(
+        ('127.0.0.1', 0), asterisk=fake_asterisk.FakeAsterisk(channels=4))
+    server.start()
+    api = AsteriskRestAPI(uri=server.get_uri())
+    mirror = StateMirror(max_staleness=60)
+    mirror.attach(api)
+    reconciler = Reconciler(mirror, api)
+    dispatched = []
+    api.add_event_listener(dispatched.append)
+
+    failures = 0
+    failures += check("first pass takes a snapshot",
+                      get_drift(reconciler.reconcile())['events'], 0)
+
+    # Changes whose events the mirror never sees.
+    asterisk = server.asterisk
+    bridged, destroyed, changed, renamed = sorted(asterisk.channels)
+    created = asterisk.make_channel({'endpoint': 'SIP/101'})
+    asterisk.channels[created['id']] = created
+    del asterisk.channels[destroyed]
+    asterisk.channels[changed] = dict(asterisk.channels[changed],
+                                      state='Ringing')
+    # No event describes a change of caller id.
+    asterisk.channels[renamed] = dict(asterisk.channels[renamed],
+                                      caller={'name': 'Bob',
+                                              'number': '100'})
+    bridge = asterisk.new_bridge({})
+    asterisk.add_channel_to_bridge({'bridgeId': bridge['id'],
+                                    'channel': [bridged]})
+
+    failures += check("drift", get_drift(reconciler.reconcile()), {
+        'channels_added': 1, 'channels_removed': 1, 'channels_changed': 1,
+        'bridges_added': 1, 'bridges_removed': 0, 'bridges_changed': 1,
+        'objects_updated': 1, 'events': 5, 'drift': 1.2})
+    failures += check("synthetic events dispatched",
+                      sorted((event['type'], event['synthetic'])
+                             for event in dispatched), [
+                          ('BridgeCreated', True),
+                          ('ChannelCreated', True),
+                          ('ChannelDestroyed', True),
+                          ('ChannelEnteredBridge', True),
+                          ('ChannelStateChange', True)])
+    failures += check("mirror fixed", sorted(
+        (channel['id'], channel['state'], channel['caller']['name'])
+        for channel in mirror.get_channels()), sorted(
+        (channel['id'], channel['state'], channel['caller']['name'])
+        for channel in asterisk.channels.values()))
+    failures += check("bridge membership",
+                      mirror.get_channel_bridge(bridged)['id'], bridge['id'])
+
+    del dispatched[:]
+    failures += check("no drift left",
+                      get_drift(reconciler.reconcile())['drift'], 0.0)
+    failures += check("nothing dispatched", dispatched, [])
+    stats = reconciler.get_stats()
+    failures += check("totals", (stats['passes'], stats['channels_added'],
+                                 stats['objects_updated']), (3, 1, 1))
+
+    api.close()
+    server.shutdown()
+    return 1 if failures else 0
+
+
+def get_drift(drift):
+    """Return a drift report without its duration."""
+    drift = dict(drift)
+    del drift['seconds']
+    return drift
+
+
+def check(name, got, expected):
+    """Print whether got is expected; return 1 if not, else 0."""
+    if got == expected:
+        print "%s: ok" % (name)
+        return 0
+    print "%s: got %s, expected %s" % (name, got, expected)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv) or 0)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+
+import sys
+sys.path.append('python/lib')
+import fake_asterisk
+from asterisk_rest_api import AsteriskRestAPI
+from response_cache import ResponseCache
+from single_flight import make_call_key
+
+
+class FakeClock:
+    """Clock which only moves when told to."""
+    def __init__(self, now=1000.0):
+        """Initiate new FakeClock instance."""
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+CHANNEL = '/channels/%s'
+CHANNELS = '/channels'
+BRIDGES = '/bridges'
+
+
+def main(argv):
+    """Test ResponseCache with a fake clock: expiry after the TTL of a
+    path, invalidation of one object's entries and its resource's
+    listings on a write, LRU eviction, and GET results cached by
+    AsteriskRestAPI until a write to the object.
+
+    """
+    clock = FakeClock()
+    cache = ResponseCache(ttls={CHANNEL: 5}, clock=clock)
+    key = make_call_key(CHANNEL, None, 'a')
+    failures = 0
+
+    cache.put(key, 'a1')
+    cache.put(make_call_key('/asterisk/info'), 'info')
+    failures += check("path without TTL not cached",
+                      cache.get(make_call_key('/asterisk/info')), None)
+    clock.now += 5
+    failures += check("kept until TTL", cache.get(key), 'a1')
+    clock.now += 0.1
+    failures += check("expired after TTL", cache.get(key), None)
+    failures += check("expired entry removed",
+                      cache.get_stats()['entries'], 0)
+
+    cache = ResponseCache(default_ttl=60, clock=clock)
+    for path, object_id in ((CHANNEL, 'a'), (CHANNEL, 'b'),
+                            (CHANNELS, None), (BRIDGES, None)):
+        cache.put(make_call_key(path, None, object_id), path)
+    cache.invalidate('/channels/%s/answer', 'a')
+    failures += check("entries left after write", [
+        cache.get(make_call_key(path, None, object_id)) is not None
+        for path, object_id in ((CHANNEL, 'a'), (CHANNEL, 'b'),
+                                (CHANNELS, None), (BRIDGES, None))],
+        [False, True, False, True])
+    cache.invalidate(CHANNELS)
+    failures += check("entries left after create", [
+        cache.get(make_call_key(path, None, object_id)) is not None
+        for path, object_id in ((CHANNEL, 'b'), (BRIDGES, None))],
+        [True, True])
+    failures += check("stats", cache.get_stats(), {
+        'hits': 4, 'misses': 2, 'evictions': 0, 'invalidations': 2,
+        'entries': 2})
+
+    cache = ResponseCache(default_ttl=60, max_entries=2, clock=clock)
+    cache.put(make_call_key(CHANNEL, None, 'a'), 'a')
+    cache.put(make_call_key(CHANNEL, None, 'b'), 'b')
+    cache.get(make_call_key(CHANNEL, None, 'a'))
+    cache.put(make_call_key(CHANNEL, None, 'c'), 'c')
+    failures += check("least recently used evicted", [
+        cache.get(make_call_key(CHANNEL, None, object_id))
+        for object_id in 'abc'], ['a', None, 'c'])
+    failures += check("copy keeps clock", cache.copy().clock, clock)
+
+    failures += check_with_server()
+    return 1 if failures else 0
+
+
+def check_with_server():
+    """Check AsteriskRestAPI answers repeated GET calls from its cache,
+    and calls fake_asterisk.py again for an object after writing to it.
+    Return the failure count.
+
+    """
+    server = fake_asterisk.FakeAsteriskServer(
+        ('127.0.0.1', 0), asterisk=fake_asterisk.FakeAsterisk(channels=2))
+    server.start()
+    api = AsteriskRestAPI(uri=server.get_uri(), response_cache=ResponseCache(
+        ttls={CHANNEL: 60}, clock=FakeClock()))
+    requests_sent = count_requests(api)
+    channel_id, other_id = sorted(server.asterisk.channels)
+
+    failures = 0
+    for object_id in (channel_id, channel_id, other_id):
+        api.call(CHANNEL, object_id=object_id)
+    failures += check("cached GETs", requests_sent, [2])
+    api.call('/channels/%s/answer', http_method='POST',
+             object_id=channel_id)
+    result = api.call(CHANNEL, object_id=channel_id)
+    api.call(CHANNEL, object_id=other_id)
+    failures += check("GET after write", requests_sent, [3])
+    failures += check("fresh state", result['response']['state'], 'Up')
+
+    api.close()
+    server.shutdown()
+    return failures
+
+
+def count_requests(api):
+    """Count the GET requests api sends; return a one-item list holding
+    the count.
+
+    """
+    count = [0]
+    get = api._session.get
+
+    def counted_get(*args, **kwargs):
+        count[0] += 1
+        return get(*args, **kwargs)
+    api._session.get = counted_get
+    return count
+
+
+def check(name, got, expected):
+    """Print whether got is expected; return 1 if not, else 0."""
+    if got == expected:
+        print "%s: ok" % (name)
+        return 0
+    print "%s: got %s, expected %s" % (name, got, expected)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv) or 0)
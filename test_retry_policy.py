@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+
+import sys
+sys.path.append('python/lib')
+import time
+import random
+import fake_asterisk
+from asterisk_rest_api import AsteriskRestAPI
+from circuit_breaker import CircuitBreaker
+from retry_policy import RetryPolicy
+
+
+class LongestDelay:
+    """Stand-in for random.Random drawing the longest delay allowed."""
+    def uniform(self, low, high):
+        return high
+
+
+def main(argv):
+    """Test RetryPolicy: which failures are retried, the bounds of the
+    backoff delays, and retries of calls to fake_asterisk.py, within
+    their deadline.
+
+    """
+    policy = RetryPolicy(max_retries=2, backoff_base=0.1, backoff_max=0.3)
+    failures = 0
+    failures += check("decisions", [
+        policy.should_retry('GET', 0, 503),
+        policy.should_retry('DELETE', 1, 'timeout'),
+        policy.should_retry('GET', 0, 'connection_error'),
+        policy.should_retry('POST', 0, 503),
+        policy.should_retry('GET', 0, 500),
+        policy.should_retry('GET', 2, 503),
+    ], [True, True, True, False, False, False])
+
+    policy.rng = LongestDelay()
+    failures += check("longest delays",
+                      [round(policy.get_delay(n), 6) for n in range(4)],
+                      [0.1, 0.2, 0.3, 0.3])
+    seeded = [RetryPolicy(rng=random.Random(7)).get_delay(n)
+              for n in range(3)]
+    failures += check("seeded delays",
+                      [RetryPolicy(rng=random.Random(7)).get_delay(n)
+                       for n in range(3)], seeded)
+    failures += check("delays in bounds",
+                      [0 <= seeded[n] <= 0.1 * 2 ** n for n in range(3)],
+                      [True] * 3)
+
+    failures += check_with_server()
+    return 1 if failures else 0
+
+
+def check_with_server():
+    """Retry calls to a fake_asterisk.py answering 503 and check how many
+    requests each sends, and that retries stop at the deadline. Return
+    the failure count.
+
+    """
+    server = fake_asterisk.FakeAsteriskServer(('127.0.0.1', 0),
+                                              error_rate=1.0,
+                                              error_status=503)
+    server.start()
+    failures = 0
+
+    api, requests_sent = make_api(server, RetryPolicy(
+        max_retries=2, backoff_base=0.001, rng=LongestDelay()))
+    result = api.call('/asterisk/info')
+    failures += check("GET status", result['status'], 503)
+    failures += check("GET attempts", requests_sent, {'GET': 3})
+    api.call('/channels', http_method='POST')
+    failures += check("POST not retried", requests_sent,
+                      {'GET': 3, 'POST': 1})
+    api.close()
+
+    # The first retry would end after the deadline: none is made.
+    api, requests_sent = make_api(server, RetryPolicy(
+        max_retries=5, backoff_base=10, backoff_max=10, rng=LongestDelay()))
+    start = time.time()
+    api.call('/asterisk/info', timeout=1)
+    failures += check("attempts within deadline", requests_sent,
+                      {'GET': 1})
+    failures += check("returned before deadline", time.time() - start < 1,
+                      True)
+    api.close()
+
+    server.shutdown()
+    return failures
+
+
+def make_api(server, retry_policy):
+    """Return an AsteriskRestAPI for server, whose breaker never opens,
+    and a dict counting its requests by method.
+
+    """
+    api = AsteriskRestAPI(uri=server.get_uri(), retry_policy=retry_policy,
+                          circuit_breaker=CircuitBreaker(
+                              failure_threshold=1000))
+    requests_sent = {}
+    for method in ('GET', 'POST'):
+        name = method.lower()
+        setattr(api._session, name,
+                make_counted(getattr(api._session, name), requests_sent,
+                             method))
+    return (api, requests_sent)
+
+
+def make_counted(send, requests_sent, method):
+    """Return send, counting each of its calls in requests_sent[method]."""
+    def counted_send(*args, **kwargs):
+        requests_sent[method] = requests_sent.get(method, 0) + 1
+        return send(*args, **kwargs)
+    return counted_send
+
+
+def check(name, got, expected):
+    """Print whether got is expected; return 1 if not, else 0."""
+    if got == expected:
+        print "%s: ok" % (name)
+        return 0
+    print "%s: got %s, expected %s" % (name, got, expected)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv) or 0)
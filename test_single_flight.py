@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+
+import sys
+sys.path.append('python/lib')
+import time
+import threading
+import fake_asterisk
+from asterisk_rest_api import AsteriskRestAPI
+from single_flight import SingleFlight, make_call_key
+
+
+class CountedEvent:
+    """threading.Event which counts the threads waiting on it, so a test
+    can tell when its callers have all joined a flight.
+
+    """
+    def __init__(self, event):
+        """Initiate new CountedEvent instance wrapping event."""
+        self.event = event
+        self.waiting = 0
+        self.condition = threading.Condition()
+
+    def wait(self, timeout=None):
+        with self.condition:
+            self.waiting += 1
+            self.condition.notify_all()
+        return self.event.wait(timeout)
+
+    def wait_for_waiting(self, count, timeout=5):
+        """Return True once count threads wait, False after timeout."""
+        deadline = time.time() + timeout
+        with self.condition:
+            while self.waiting < count:
+                if time.time() >= deadline:
+                    return False
+                self.condition.wait(deadline - time.time())
+        return True
+
+    def set(self):
+        self.event.set()
+
+
+def main(argv):
+    """Test SingleFlight: calls with one key made while the first is in
+    flight share its result or exception, and AsteriskRestAPI sends
+    identical GET calls made concurrently once.
+
+    """
+    failures = 0
+    failures += check("call keys", [
+        make_call_key('/channels/%s', {'a': 1, 'b': 2}, 'x') ==
+        make_call_key('/channels/%s', {'b': 2, 'a': 1}, 'x'),
+        make_call_key('/channels/%s', None, 'x') ==
+        make_call_key('/channels/%s', None, 'y'),
+    ], [True, False])
+
+    flights = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def fetch(value):
+        calls.append(value)
+        release.wait(5)
+        if isinstance(value, Exception):
+            raise value
+        return {'value': value}
+
+    results = run_together(flights, 'key', [
+        lambda value=value: flights.do('key', fetch, value)
+        for value in (1, 2, 3)], release)
+    failures += check("calls made", calls, [1])
+    failures += check("results", [(result[0]['value'], result[1])
+                                  for result in results],
+                      [(1, False), (1, True), (1, True)])
+    failures += check("same object", results[1][0] is results[0][0], True)
+    failures += check("flight ended", flights.do('key', fetch, 4),
+                      ({'value': 4}, False))
+
+    calls[:] = []
+    release.clear()
+    error = ValueError('lost')
+    results = run_together(flights, 'key', [
+        lambda value=value: flights.do('key', fetch, value)
+        for value in (error, 5)], release)
+    failures += check("error shared", [result is error
+                                       for result in results],
+                      [True, True])
+    failures += check("calls made on error", calls, [error])
+    failures += check("other keys not shared",
+                      flights.do('other', fetch, 6), ({'value': 6}, False))
+
+    failures += check_with_server()
+    return 1 if failures else 0
+
+
+def run_together(flights, key, functions, release):
+    """Call each of functions in its own thread, the first starting the
+    flight of key in flights and the others joining it, then set release.
+    Return what each call returned or raised, in order.
+
+    """
+    results = [None] * len(functions)
+
+    def run(i):
+        try:
+            results[i] = functions[i]()
+        except Exception, err:
+            results[i] = err
+
+    threads = [threading.Thread(target=run, args=(i,))
+               for i in range(len(functions))]
+    threads[0].start()
+    flight = wait_for_flight(flights, key)
+    flight.done = CountedEvent(flight.done)
+    for thread in threads[1:]:
+        thread.start()
+    flight.done.wait_for_waiting(len(functions) - 1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def wait_for_flight(flights, key, timeout=5):
+    """Return the flight of key in flights once it has started, or None
+    after timeout seconds.
+
+    """
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        flight = flights._flights.get(key)
+        if flight is not None:
+            return flight
+        time.sleep(0.001)
+    return None
+
+
+def check_with_server():
+    """Make three identical GET calls to fake_asterisk.py at once and
+    check a single request is sent and the others are counted as
+    coalesced. Return the failure count.
+
+    """
+    server = fake_asterisk.FakeAsteriskServer(('127.0.0.1', 0))
+    server.start()
+    api = AsteriskRestAPI(uri=server.get_uri())
+    requests_sent = []
+    release = threading.Event()
+    get = api._session.get
+
+    def held_get(*args, **kwargs):
+        requests_sent.append(args[0])
+        release.wait(5)
+        return get(*args, **kwargs)
+    api._session.get = held_get
+
+    key = make_call_key('/asterisk/info', None, None)
+    results = run_together(api._single_flight, key, [
+        lambda: api.call('/asterisk/info')] * 3, release)
+    failures = 0
+    failures += check("requests sent", len(requests_sent), 1)
+    failures += check("results", [result['success'] for result in results],
+                      [True] * 3)
+    failures += check("same result", results[1] is results[0], True)
+    failures += check("coalesced counted",
+                      'asteriskpy_coalesced_total{operation="/asterisk/info"'
+                      ',method="GET"} 2' in api.export_metrics().split('\n'),
+                      True)
+    api.close()
+    server.shutdown()
+    return failures
+
+
+def check(name, got, expected):
+    """Print whether got is expected; return 1 if not, else 0."""
+    if got == expected:
+        print "%s: ok" % (name)
+        return 0
+    print "%s: got %s, expected %s" % (name, got, expected)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv) or 0)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""
+ Copyright (C) 2013 Digium, Inc.
+
+ Erin Spiceland <espiceland@digium.com>
+
+ See http://www.asterisk.org for more information about
+ the Asterisk project. Please do not directly contact
+ any of the maintainers of this project for assistance;
+ the project provides a web site, mailing lists and IRC
+ channels for your use.
+
+ This program is free software, distributed under the terms
+ detailed in the the LICENSE file at the top of the source tree.
+
+"""
+
+import sys
+sys.path.append('python/lib')
+import threading
+import fake_asterisk
+from asterisk_rest_api import AsteriskRestAPI
+from event_dispatcher import EventDispatcher
+from event_queue import DROP_OLDEST
+from state_mirror import StateMirror
+
+
+def main(argv):
+    """Test StateMirror against fake_asterisk.py: events are applied in
+    the order they are dispatched, also those about different objects,
+    and also those the dispatcher drops from a full queue.
+
+    """
+    server = fake_asterisk.FakeAsteriskServer(
+        ('127.0.0.1', 0), asterisk=fake_asterisk.FakeAsterisk(channels=2))
+    server.start()
+    dispatcher = EventDispatcher(workers=4, queue_size=1,
+                                 overflow=DROP_OLDEST)
+    api = AsteriskRestAPI(uri=server.get_uri(), event_dispatcher=dispatcher)
+    mirror = StateMirror(max_staleness=60)
+    mirror.attach(api)
+
+    # Handlers stuck until the end, so that the queues overflow.
+    release = threading.Event()
+    api.add_event_handler('*', lambda event: release.wait(5))
+
+    channel_ids = sorted(channel['id'] for channel in mirror.get_channels())
+    first, second = channel_ids
+    bridge = {'id': 'b1', 'bridge_type': 'mixing', 'channels': [first]}
+    events = [
+        # Routed to a worker by bridge id, the others by channel id.
+        make_event('BridgeCreated', bridge=bridge),
+        make_event('ChannelLeftBridge', bridge=dict(bridge, channels=[]),
+                   channel=make_channel(first, 'Up')),
+        # Three for one worker, with one taken and one waiting at most.
+        make_event('ChannelStateChange', channel=make_channel(second,
+                                                              'Ring')),
+        make_event('ChannelStateChange', channel=make_channel(second,
+                                                              'Ringing')),
+        make_event('ChannelStateChange', channel=make_channel(second,
+                                                              'Up')),
+        make_event('ChannelDestroyed', channel=make_channel(first, 'Up')),
+    ]
+    for event in events:
+        api.dispatch_event(event)
+    stats = api.get_event_stats()
+    release.set()
+
+    failures = 0
+    failures += check("events dropped", stats['events_dropped'] > 0, True)
+    failures += check("events applied",
+                      mirror.get_stats()['events_applied'], len(events))
+    failures += check("bridge membership",
+                      mirror.get_channel_bridge(first), None)
+    failures += check("bridge channels", mirror.get_bridge('b1')['channels'],
+                      [])
+    failures += check("channels", [channel['id'] for channel
+                                   in mirror.get_channels()], [second])
+    failures += check("channel state",
+                      [channel['id'] for channel
+                       in mirror.get_channels_by_state('Up')], [second])
+    failures += check("no refresh", mirror.get_stats()['refreshes'], 1)
+
+    api.close()
+    server.shutdown()
+    return 1 if failures else 0
+
+
+def make_event(event_type, **objects):
+    """Return a Stasis event about objects."""
+    event = {'type': event_type, 'application': 'test'}
+    event.update(objects)
+    return event
+
+
+def make_channel(channel_id, state):
+    """Return the JSON of a channel in a state."""
+    return {'id': channel_id, 'name': 'SIP/100-%s' % (channel_id[:8]),
+            'state': state}
+
+
+def check(name, got, expected):
+    """Print whether got is expected; return 1 if not, else 0."""
+    if got == expected:
+        print "%s: ok" % (name)
+        return 0
+    print "%s: got %s, expected %s" % (name, got, expected)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv) or 0)